@@ -1,7 +1,279 @@
-def detect_offensive_content(text: str) -> bool:
-    # Simple example (replace with real ML later)
-    bad_words = ["hate", "violence", "kill"]
-    for word in bad_words:
-        if word in text.lower():
+"""
+Content moderation engine for TRENDY App
+Compiles category term lists into a single Aho-Corasick automaton and scans
+text in one pass, with leetspeak normalization and word-boundary checks.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Use the C extension automaton when installed; the pure-Python one is the fallback
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# One-to-one substitutions so offsets in the normalized text match the original
+LEETSPEAK = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+    "@": "a", "$": "s", "!": "i", "|": "l", "+": "t",
+})
+
+DEFAULT_TERMS: Dict[str, List[str]] = {
+    "hate": ["hate"],
+    "violence": ["violence", "kill"],
+}
+
+
+def normalize(text: str) -> str:
+    return text.lower().translate(LEETSPEAK)
+
+
+@dataclass(frozen=True)
+class ModerationMatch:
+    start: int
+    end: int
+    term: str
+    category: str
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"start": self.start, "end": self.end, "term": self.term, "category": self.category}
+
+
+class TermAutomaton:
+    """Aho-Corasick automaton over normalized terms"""
+
+    def __init__(self, terms: Dict[str, str]):
+        # terms: normalized term -> category
+        self.categories = dict(terms)
+        self._native = None
+        if AHOCORASICK_AVAILABLE and self.categories:
+            self._native = ahocorasick.Automaton()
+            for term in self.categories:
+                self._native.add_word(term, term)
+            self._native.make_automaton()
+            return
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[str, ...]] = [()]
+
+        for term in self.categories:
+            node = 0
+            for ch in term:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._out[node] = self._out[node] + (term,)
+
+        # Breadth-first failure links; outputs inherit from their fallback state
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        if self._native is not None:
+            for end_index, term in self._native.iter(text):
+                yield end_index - len(term) + 1, end_index + 1, term
+            return
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                for term in out[node]:
+                    yield i - len(term) + 1, i + 1, term
+
+
+def _scan(automaton: TermAutomaton, text: Optional[str]) -> List[ModerationMatch]:
+    if not text:
+        return []
+    normalized = normalize(text)
+    if len(normalized) != len(text):
+        text = normalized  # a few Unicode lowercasings change length; spans then refer to the normalized text
+    length = len(text)
+    matches = []
+    for start, end, term in automaton.iter_matches(normalized):
+        # Boundaries are judged on the original text so "kill!" still ends at "!"
+        if start > 0 and text[start - 1].isalnum():
+            continue
+        if end < length and text[end].isalnum():
+            continue
+        matches.append(ModerationMatch(start, end, term, automaton.categories[term]))
+    return matches
+
+
+class ModerationEngine:
+    def __init__(self, terms: Optional[Dict[str, Iterable[str]]] = None, terms_dir: Optional[str] = None,
+                 reload_interval: float = 30.0):
+        self.terms_dir = terms_dir
+        self.reload_interval = reload_interval
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        self._mtimes: Dict[str, float] = {}
+        self._automaton = TermAutomaton({})
+        if terms_dir and os.path.isdir(terms_dir):
+            self.reload()
+        else:
+            self.load_terms(terms or DEFAULT_TERMS)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._automaton)
+
+    def load_terms(self, terms: Dict[str, Iterable[str]]):
+        """Compile {category: [terms]} and swap it in atomically"""
+        compiled = {}
+        for category, words in terms.items():
+            for word in words:
+                word = normalize(word.strip())
+                if word:
+                    compiled[word] = category
+        automaton = TermAutomaton(compiled)
+        self._automaton = automaton
+        logger.info("Moderation engine loaded %d terms", len(automaton))
+
+    def _list_files(self) -> Dict[str, str]:
+        return {
+            os.path.splitext(name)[0]: os.path.join(self.terms_dir, name)
+            for name in sorted(os.listdir(self.terms_dir))
+            if name.endswith(".txt")
+        }
+
+    def reload(self) -> bool:
+        """Rebuild from terms_dir (one `<category>.txt` per category, one term per line)"""
+        with self._lock:
+            files = self._list_files()
+            terms = {}
+            for category, path in files.items():
+                with open(path, encoding="utf-8") as f:
+                    terms[category] = [line for line in f.read().splitlines() if line and not line.startswith("#")]
+            self._mtimes = {path: os.path.getmtime(path) for path in files.values()}
+            self.load_terms(terms)
             return True
-    return False
+
+    def reload_if_changed(self) -> bool:
+        """Hot reload when any list file was added, removed or modified"""
+        if not self.terms_dir or not os.path.isdir(self.terms_dir):
+            return False
+        current = {path: os.path.getmtime(path) for path in self._list_files().values()}
+        if current == self._mtimes:
+            return False
+        return self.reload()
+
+    def maybe_reload(self):
+        """Check list files for changes at most once per reload_interval seconds"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            self.reload_if_changed()
+        except OSError as e:
+            logger.error(f"Moderation term reload failed: {str(e)}")
+
+    def scan(self, text: str) -> List[ModerationMatch]:
+        """Whole-word matches of any listed term, with spans in the original text"""
+        return _scan(self._automaton, text)
+
+    def scan_batch(self, texts: Iterable[Optional[str]]) -> List[List[ModerationMatch]]:
+        automaton = self._automaton  # one automaton for the whole batch, even across a reload
+        return [_scan(automaton, text) for text in texts]
+
+    def is_offensive(self, text: str) -> bool:
+        return bool(self.scan(text))
+
+
+settings = get_settings()
+moderation_engine = ModerationEngine(
+    terms_dir=settings.moderation_terms_dir,
+    reload_interval=settings.moderation_reload_interval_seconds
+)
+
+
+def detect_offensive_content(text: str) -> bool:
+    moderation_engine.maybe_reload()
+    return moderation_engine.is_offensive(text)
+
+
+def moderate_text(text: str) -> Dict[str, object]:
+    moderation_engine.maybe_reload()
+    matches = moderation_engine.scan(text)
+    return {
+        "flagged": bool(matches),
+        "categories": sorted({m.category for m in matches}),
+        "matches": [m.to_dict() for m in matches],
+    }
+
+
+def rescan_posts(db, batch_size: int = 1000) -> Dict[str, int]:
+    """Re-run moderation over approved and pending posts in id order, rejecting matches in bulk.
+    A rescan only tightens: posts already rejected by the classifier or an admin are
+    never touched, and a post that no longer matches keeps its current status."""
+    from app.models.post import Post
+
+    scanned = flagged = 0
+    last_id = 0
+    while True:
+        rows = db.query(Post.id, Post.content).filter(
+            Post.id > last_id,
+            Post.moderation_status.in_(("approved", "pending"))
+        ).order_by(Post.id).limit(batch_size).all()
+        if not rows:
+            return {"scanned": scanned, "flagged": flagged}
+        results = moderation_engine.scan_batch(content for _, content in rows)
+        updates = [
+            {"id": post_id, "is_flagged": True, "moderation_status": "rejected"}
+            for (post_id, _), matches in zip(rows, results) if matches
+        ]
+        if updates:
+            db.bulk_update_mappings(Post, updates)
+            db.commit()
+        flagged += len(updates)
+        scanned += len(rows)
+        last_id = rows[-1][0]
+
+
+def rescan_comments(db, batch_size: int = 1000) -> Dict[str, int]:
+    """Re-run moderation over all comments; returns ids of comments that match"""
+    from app.models.post import Comment
+
+    scanned = 0
+    flagged_ids: List[int] = []
+    last_id = 0
+    while True:
+        rows = db.query(Comment.id, Comment.content).filter(
+            Comment.id > last_id
+        ).order_by(Comment.id).limit(batch_size).all()
+        if not rows:
+            return {"scanned": scanned, "flagged": len(flagged_ids), "flagged_ids": flagged_ids}
+        results = moderation_engine.scan_batch(content for _, content in rows)
+        flagged_ids.extend(comment_id for (comment_id, _), matches in zip(rows, results) if matches)
+        scanned += len(rows)
+        last_id = rows[-1][0]
@@ -0,0 +1,177 @@
+"""
+Asynchronous moderation stage for TRENDY App
+Posts are stored as `pending` and their ids queued; a pool of workers pulls
+micro-batches, runs a pluggable classifier over each batch and writes the
+resulting statuses back in bulk.
+"""
+
+import asyncio
+import importlib
+import logging
+import queue
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from app.ai.moderation import moderation_engine
+from app.models.post import Post
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ClassifierResult:
+    flagged: bool
+    score: float = 0.0
+    categories: List[str] = field(default_factory=list)
+
+
+class ModerationClassifier:
+    """Classifies a whole batch at once so model backends can vectorize"""
+
+    def classify_batch(self, texts: List[str]) -> List[ClassifierResult]:
+        raise NotImplementedError
+
+
+class TermListClassifier(ModerationClassifier):
+    """Default classifier backed by the term-list moderation engine"""
+
+    def classify_batch(self, texts: List[str]) -> List[ClassifierResult]:
+        moderation_engine.maybe_reload()
+        return [
+            ClassifierResult(
+                flagged=bool(matches),
+                score=1.0 if matches else 0.0,
+                categories=sorted({m.category for m in matches})
+            )
+            for matches in moderation_engine.scan_batch(texts)
+        ]
+
+
+def load_classifier(path: Optional[str]) -> ModerationClassifier:
+    """Instantiate a classifier from "package.module:ClassName", defaulting to term lists"""
+    if not path:
+        return TermListClassifier()
+    module_name, class_name = path.split(":", 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class ModerationQueue:
+    def __init__(self, classifier: Optional[ModerationClassifier] = None, batch_size: int = 64,
+                 batch_wait_seconds: float = 0.05, max_queue_size: int = 100000):
+        self.classifier = classifier or TermListClassifier()
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self.post_ids: "queue.Queue[int]" = queue.Queue(maxsize=max_queue_size)
+        self.processed = 0
+        self.rejected = 0
+        self.last_batch_ms = 0.0
+
+    def enqueue(self, post_id: int) -> bool:
+        """Non-blocking; posts left behind on overflow stay pending and are picked up by requeue_pending"""
+        try:
+            self.post_ids.put_nowait(post_id)
+            return True
+        except queue.Full:
+            logger.warning("Moderation queue full; post %s stays pending until requeued", post_id)
+            return False
+
+    def requeue_pending(self, db: Session, limit: int = 10000) -> int:
+        """Re-enqueue pending posts (served by the partial index), e.g. after a restart"""
+        post_ids = [
+            post_id for (post_id,) in db.query(Post.id).filter(
+                Post.moderation_status == "pending"
+            ).order_by(Post.created_at).limit(limit)
+        ]
+        return sum(1 for post_id in post_ids if self.enqueue(post_id))
+
+    def _next_batch(self) -> List[int]:
+        batch: List[int] = []
+        deadline = time.monotonic() + self.batch_wait_seconds
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.post_ids.get_nowait())
+            except queue.Empty:
+                if batch or time.monotonic() >= deadline:
+                    break
+                time.sleep(0.005)
+        return batch
+
+    def process_batch(self, db: Session, post_ids: List[int]) -> int:
+        """Classify one micro-batch and update statuses with a single bulk UPDATE"""
+        started = time.perf_counter()
+        rows = db.query(Post.id, Post.content).filter(
+            Post.id.in_(post_ids),
+            Post.moderation_status == "pending"
+        ).all()
+        if not rows:
+            return 0
+
+        results = self.classifier.classify_batch([content or "" for _, content in rows])
+        updates = [
+            {
+                "id": post_id,
+                "moderation_status": "rejected" if result.flagged else "approved",
+                "is_flagged": result.flagged,
+            }
+            for (post_id, _), result in zip(rows, results)
+        ]
+        db.bulk_update_mappings(Post, updates)
+        db.commit()
+
+        self.processed += len(updates)
+        self.rejected += sum(1 for update in updates if update["is_flagged"])
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+        return len(updates)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "queued": self.post_ids.qsize(),
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "batch_size": self.batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 2),
+            "classifier": type(self.classifier).__name__,
+        }
+
+    async def run_worker(self, session_factory, worker_id: int):
+        """One pool worker; batching and classification run in the default executor"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            post_ids = self._next_batch()
+            if not post_ids:
+                return 0
+            db = session_factory()
+            try:
+                return self.process_batch(db, post_ids)
+            except Exception:
+                db.rollback()
+                # Leave them pending; requeue_pending will retry
+                raise
+            finally:
+                db.close()
+
+        while True:
+            try:
+                if self.post_ids.empty():
+                    await asyncio.sleep(self.batch_wait_seconds)
+                    continue
+                await loop.run_in_executor(None, tick)
+            except Exception as e:
+                logger.error(f"Moderation worker {worker_id} failed: {str(e)}")
+                await asyncio.sleep(1.0)
+
+    def start_workers(self, session_factory, workers: int) -> List["asyncio.Task"]:
+        return [asyncio.create_task(self.run_worker(session_factory, i)) for i in range(workers)]
+
+
+# Create global instance
+settings = get_settings()
+moderation_queue = ModerationQueue(
+    classifier=load_classifier(settings.moderation_classifier),
+    batch_size=settings.moderation_batch_size,
+    batch_wait_seconds=settings.moderation_batch_wait_ms / 1000
+)
@@ -5,9 +5,9 @@ import json
 from app.database import get_db
 from app.models.post import Post
 from app.models.user import User
-from app.auth.middleware import get_current_user
+from app.auth.middleware import get_current_user, get_current_user_id
+from app.services.visibility import visibility_service
 from pydantic import BaseModel
-import requests
 import os
 from datetime import datetime
 
@@ -235,14 +235,18 @@ async def get_mood_based_feed(
     preferred_mood: str = Query("happy", description="Preferred mood for feed"),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Get a mood-based feed of posts
     """
     try:
         # Get all posts (in production, you'd want to filter by user's network)
-        posts = db.query(Post).order_by(Post.created_at.desc()).limit(100).all()
+        query = db.query(Post).filter(Post.moderation_status == "approved")
+        hidden = visibility_service.exclude_clause(db, user_id, Post.user_id)
+        if hidden is not None:
+            query = query.filter(hidden)
+        posts = query.order_by(Post.created_at.desc()).limit(100).all()
         
         # Filter posts by mood
         mood_filtered_posts = []
@@ -253,10 +257,15 @@ async def get_mood_based_feed(
                 if len(mood_filtered_posts) >= limit:
                     break
         
-        # Format the response
+        # Format the response (authors loaded in one query)
+        author_ids = {post.user_id for post in mood_filtered_posts}
+        authors = {
+            user.id: user
+            for user in db.query(User).filter(User.id.in_(author_ids)).all()
+        } if author_ids else {}
         result_posts = []
         for post in mood_filtered_posts:
-            user = db.query(User).filter(User.id == post.user_id).first()
+            user = authors.get(post.user_id)
             result_posts.append({
                 "id": post.id,
                 "content": post.content,
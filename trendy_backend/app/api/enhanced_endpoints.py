@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
@@ -6,6 +7,16 @@ from datetime import datetime
 from ..database import get_db
 from ..models.enhanced_user import EnhancedUser
 from ..models.enhanced_post import EnhancedPost
+from ..models.post import Post
+from ..models.user import User
+from ..ai.moderation_queue import moderation_queue
+from ..auth.middleware import optional_auth
+from ..services.notification_service import notification_pipeline
+from ..services.visibility import visibility_service
+from ..services.user_counters import user_counters
+from ..services.entitlements import entitlement_service
+from ..services.sketch_service import extract_hashtags, sketch_analytics
+from ..services.story_service import story_service
 
 router = APIRouter(prefix="/api/v2", tags=["enhanced"])
 
@@ -55,78 +66,113 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+def _post_type(post: PostCreate) -> str:
+    if post.is_reel:
+        return "reel"
+    if post.is_story:
+        return "story"
+    if post.is_tweet:
+        return "tweet"
+    return "regular"
+
+def _feed_query(db: Session, viewer_id: Optional[int]):
+    """Published posts that passed moderation, minus authors the viewer blocked, muted or is blocked by"""
+    query = db.query(Post).filter(Post.moderation_status == "approved", Post.is_published == True)
+    hidden = visibility_service.exclude_clause(db, viewer_id, Post.user_id)
+    if hidden is not None:
+        query = query.filter(hidden)
+    return query
+
+def _post_dict(post: Post, is_premium_author: bool) -> dict:
+    return {
+        "id": post.id,
+        "user_id": post.user_id,
+        "post_type": post.media_type,
+        "content": post.content,
+        "media_urls": post.media_urls,
+        "likes_count": post.likes_count or 0,
+        "comments_count": post.comments_count or 0,
+        "shares_count": post.shares_count or 0,
+        "views_count": post.views_count or 0,
+        "created_at": post.created_at,
+        "is_premium_author": is_premium_author
+    }
+
+def _post_dicts(db: Session, posts: List[Post]) -> List[dict]:
+    """Serialize a feed page; premium badges for all its authors come from one batched entitlement lookup"""
+    premium_authors = entitlement_service.premium_authors(db, [post.user_id for post in posts], "premium_badge")
+    return [_post_dict(post, post.user_id in premium_authors) for post in posts]
+
+def _record_views(posts: List[Post], viewer_id: Optional[int]):
+    """Count a served feed page towards post, creator and site reach (in-memory sketches only)"""
+    for post in posts:
+        sketch_analytics.record_view(post.id, post.user_id, viewer_id)
+
 @router.post("/posts", response_model=dict)
 async def create_post(post: PostCreate, db: Session = Depends(get_db)):
     """Create a post with all social media features"""
-    db_post = EnhancedPost(**post.dict())
+    # The post row lives in posts; EnhancedPost only carries the reel/story/tweet extras.
+    # AI moderation runs asynchronously and the post stays out of feeds until approved.
+    db_post = Post(
+        user_id=post.user_id,
+        content=post.content,
+        media_urls=post.media_urls or [],
+        media_type=post.post_type,
+        location=post.location_name,
+        moderation_status="pending"
+    )
     db.add(db_post)
+    db.flush()
+    db.add(EnhancedPost(
+        post_id=db_post.id,
+        post_type=_post_type(post),
+        location=post.location_name,
+        music_id=post.spotify_track_id
+    ))
+    user_counters.adjust(db, [post.user_id], "posts_count", 1)
     db.commit()
-    db.refresh(db_post)
-    return {"id": db_post.id, "message": "Post created successfully"}
+    moderation_queue.enqueue(db_post.id)
+    sketch_analytics.record_hashtags(extract_hashtags(post.content))
+    return {"id": db_post.id, "moderation_status": db_post.moderation_status, "message": "Post created successfully"}
 
 @router.get("/posts", response_model=List[dict])
 async def get_posts(
     skip: int = 0,
     limit: int = 20,
     post_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(optional_auth)
 ):
     """Get posts with filtering by type"""
-    query = db.query(EnhancedPost)
+    viewer_id = current_user.id if current_user else None
+    query = _feed_query(db, viewer_id)
     if post_type and post_type != 'all':
-        query = query.filter(EnhancedPost.post_type == post_type)
-    posts = query.offset(skip).limit(limit).all()
-    
-    return [
-        {
-            "id": post.id,
-            "user_id": post.user_id,
-            "post_type": post.post_type,
-            "content": post.content,
-            "media_urls": post.media_urls,
-            "likes_count": post.likes_count,
-            "comments_count": post.comments_count,
-            "shares_count": post.shares_count,
-            "views_count": post.views_count,
-            "created_at": post.created_at
-        }
-        for post in posts
-    ]
+        query = query.filter(Post.media_type == post_type)
+    posts = query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    _record_views(posts, viewer_id)
+    return _post_dicts(db, posts)
 
 @router.get("/posts/trending")
-async def get_trending_posts(db: Session = Depends(get_db)):
+async def get_trending_posts(db: Session = Depends(get_db), current_user: Optional[User] = Depends(optional_auth)):
     """Get trending posts across all platforms"""
-    posts = db.query(EnhancedPost).filter(
-        EnhancedPost.is_published == True
-    ).order_by(
-        EnhancedPost.views_count.desc(),
-        EnhancedPost.likes_count.desc()
+    posts = _feed_query(db, current_user.id if current_user else None).order_by(
+        Post.views_count.desc(),
+        Post.likes_count.desc()
     ).limit(50).all()
-    
-    return [
-        {
-            "id": post.id,
-            "user_id": post.user_id,
-            "post_type": post.post_type,
-            "content": post.content,
-            "media_urls": post.media_urls,
-            "likes_count": post.likes_count,
-            "comments_count": post.comments_count,
-            "shares_count": post.shares_count,
-            "views_count": post.views_count,
-            "created_at": post.created_at
-        }
-        for post in posts
-    ]
+    return _post_dicts(db, posts)
 
 @router.post("/posts/{post_id}/like")
-async def like_post(post_id: int, db: Session = Depends(get_db)):
+async def like_post(post_id: int, db: Session = Depends(get_db), current_user: Optional[User] = Depends(optional_auth)):
     """Like a post (works for all post types)"""
-    post = db.query(EnhancedPost).filter(EnhancedPost.id == post_id).first()
+    post = db.query(Post).filter(Post.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    post.likes_count += 1
+    post.likes_count = (post.likes_count or 0) + 1
     db.commit()
+    if current_user:
+        notification_pipeline.enqueue(
+            recipient_id=post.user_id, actor_id=current_user.id, type="like", target_type="post", target_id=post.id
+        )
     return {"message": "Post liked successfully"}
 
 @router.get("/users/{user_id}/analytics")
@@ -136,23 +182,40 @@ async def get_user_analytics(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    posts = db.query(EnhancedPost).filter(EnhancedPost.user_id == user_id).all()
+    totals = db.query(
+        func.count(Post.id),
+        func.coalesce(func.sum(Post.likes_count), 0),
+        func.coalesce(func.sum(Post.comments_count), 0),
+        func.coalesce(func.sum(Post.shares_count), 0),
+        func.coalesce(func.sum(Post.views_count), 0)
+    ).filter(Post.user_id == user_id).one()
+    media_types = dict(
+        db.query(Post.media_type, func.count(Post.id)).filter(Post.user_id == user_id).group_by(Post.media_type)
+    )
+    post_types = dict(
+        db.query(EnhancedPost.post_type, func.count(EnhancedPost.id)).join(
+            Post, Post.id == EnhancedPost.post_id
+        ).filter(Post.user_id == user_id).group_by(EnhancedPost.post_type)
+    )
     
     analytics = {
-        "total_posts": len(posts),
-        "total_likes": sum(post.likes_count for post in posts),
-        "total_comments": sum(post.comments_count for post in posts),
-        "total_shares": sum(post.shares_count for post in posts),
-        "total_views": sum(post.views_count for post in posts),
-        "total_earnings": sum(post.earnings for post in posts),
+        "total_posts": totals[0],
+        "total_likes": totals[1],
+        "total_comments": totals[2],
+        "total_shares": totals[3],
+        "total_views": totals[4],
+        "total_earnings": user.total_earnings or 0.0,
         "post_breakdown": {
-            "text_posts": len([p for p in posts if p.post_type == "text"]),
-            "image_posts": len([p for p in posts if p.post_type == "image"]),
-            "video_posts": len([p for p in posts if p.post_type == "video"]),
-            "reels": len([p for p in posts if p.is_reel]),
-            "stories": len([p for p in posts if p.is_story]),
-            "tweets": len([p for p in posts if p.is_tweet])
-        }
+            "text_posts": media_types.get("text", 0),
+            "image_posts": media_types.get("image", 0),
+            "video_posts": media_types.get("video", 0),
+            "reels": post_types.get("reel", 0),
+            "stories": post_types.get("story", 0),
+            "tweets": post_types.get("tweet", 0)
+        },
+        # HyperLogLog estimates of distinct viewers across the creator's posts
+        "reach_30d": sketch_analytics.creator_reach(db, user_id, days=30),
+        "reach_lifetime": sketch_analytics.creator_reach(db, user_id)
     }
     return analytics
 
@@ -182,33 +245,23 @@ async def enable_tiktok_creator(user_id: int, db: Session = Depends(get_db)):
 @router.get("/instagram/stories")
 async def get_instagram_stories(user_id: int, db: Session = Depends(get_db)):
     """Get Instagram-style stories for user"""
-    stories = db.query(EnhancedPost).filter(
-        EnhancedPost.user_id == user_id,
-        EnhancedPost.is_story == True,
-        EnhancedPost.is_published == True
-    ).order_by(EnhancedPost.created_at.desc()).all()
-    
-    return stories
+    return story_service.active_for_user(db, user_id)
 
 @router.get("/twitter/timeline")
 async def get_twitter_timeline(user_id: int, db: Session = Depends(get_db)):
     """Get Twitter-style timeline for user"""
-    tweets = db.query(EnhancedPost).filter(
-        EnhancedPost.is_tweet == True,
-        EnhancedPost.is_published == True
-    ).order_by(EnhancedPost.created_at.desc()).limit(50).all()
-    
-    return tweets
+    tweets = _feed_query(db, user_id).join(EnhancedPost, EnhancedPost.post_id == Post.id).filter(
+        EnhancedPost.post_type == "tweet"
+    ).order_by(Post.created_at.desc()).limit(50).all()
+    _record_views(tweets, user_id)
+    return _post_dicts(db, tweets)
 
 @router.get("/facebook/feed")
 async def get_facebook_feed(user_id: int, db: Session = Depends(get_db)):
     """Get Facebook-style feed for user"""
-    posts = db.query(EnhancedPost).filter(
-        EnhancedPost.is_facebook_post == True,
-        EnhancedPost.is_published == True
-    ).order_by(EnhancedPost.created_at.desc()).limit(50).all()
-    
-    return posts
+    posts = _feed_query(db, user_id).order_by(Post.created_at.desc()).limit(50).all()
+    _record_views(posts, user_id)
+    return _post_dicts(db, posts)
 
 @router.post("/posts/{post_id}/monetize")
 async def monetize_post(post_id: int, price: float, db: Session = Depends(get_db)):
@@ -223,11 +276,9 @@ async def monetize_post(post_id: int, price: float, db: Session = Depends(get_db
     return {"message": "Post monetized successfully"}
 
 @router.get("/search")
-async def search_posts(query: str, db: Session = Depends(get_db)):
+async def search_posts(query: str, db: Session = Depends(get_db), current_user: Optional[User] = Depends(optional_auth)):
     """Search posts across all platforms"""
-    posts = db.query(EnhancedPost).filter(
-        EnhancedPost.content.contains(query),
-        EnhancedPost.is_published == True
-    ).order_by(EnhancedPost.created_at.desc()).limit(20).all()
-    
-    return posts
+    posts = _feed_query(db, current_user.id if current_user else None).filter(
+        Post.content.contains(query)
+    ).order_by(Post.created_at.desc()).limit(20).all()
+    return _post_dicts(db, posts)
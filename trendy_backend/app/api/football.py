@@ -2,7 +2,6 @@ from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List, Optional
 from pydantic import BaseModel
 from app.auth.middleware import get_current_user
-import httpx
 import os
 from datetime import datetime
 
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
@@ -129,10 +130,16 @@ async def get_groups(
         # Combine and deduplicate
         all_groups = user_groups.union(public_groups).order_by(Group.created_at.desc()).offset(skip).limit(limit).all()
         
-        # Add member counts
+        # Add member counts (one grouped query for the whole page)
+        member_counts = dict(
+            db.query(GroupMember.group_id, func.count(GroupMember.id))
+            .filter(GroupMember.group_id.in_([group.id for group in all_groups]))
+            .group_by(GroupMember.group_id)
+            .all()
+        ) if all_groups else {}
         groups_with_counts = []
         for group in all_groups:
-            member_count = db.query(GroupMember).filter(GroupMember.group_id == group.id).count()
+            member_count = member_counts.get(group.id, 0)
             groups_with_counts.append(GroupResponse(
                 id=group.id,
                 name=group.name,
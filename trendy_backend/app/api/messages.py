@@ -3,10 +3,13 @@ from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import json
 from app.database import get_db
-from app.models import Message, Group, GroupMember, User
-from app.auth.middleware import get_current_user
+from app.models import Message, Group, GroupMember, User, InboxEntry
+from app.auth.middleware import get_current_user_id, get_current_admin_user
+from app.services.conversation_service import conversation_service
+from app.services.message_reaper import message_reaper
+from app.services.visibility import visibility_service
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
@@ -18,6 +21,8 @@ class MessageCreate(BaseModel):
     media_url: Optional[str] = None
     message_type: str = "text"  # text, image, video, audio, file
     reply_to_message_id: Optional[int] = None
+    is_burn_after_reading: bool = False
+    expires_in_seconds: Optional[int] = None
 
 class MessageUpdate(BaseModel):
     content: str
@@ -27,6 +32,7 @@ class MessageResponse(BaseModel):
     sender_id: int
     receiver_id: Optional[int]
     group_id: Optional[int]
+    conversation_id: Optional[int] = None
     content: str
     media_url: Optional[str]
     message_type: str
@@ -45,6 +51,23 @@ class MessageResponse(BaseModel):
 class ThreadedMessageResponse(MessageResponse):
     replies: List[MessageResponse] = []
 
+class InboxEntryResponse(BaseModel):
+    conversation_id: int
+    last_message_id: Optional[int]
+    last_message_at: Optional[datetime]
+    last_sender_id: Optional[int]
+    last_message_preview: Optional[str]
+    unread_count: int
+    last_read_message_id: Optional[int]
+    
+    class Config:
+        from_attributes = True
+
+class ConversationPageResponse(BaseModel):
+    conversation_id: int
+    messages: List[MessageResponse]
+    next_cursor: Optional[str] = None
+
 class VoiceChannelCreate(BaseModel):
     group_id: int
     name: str
@@ -71,7 +94,7 @@ active_voice_channels: Dict[int, Dict[str, Any]] = {}
 async def create_message(
     message: MessageCreate,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Create a new message (direct message or group message)
@@ -96,6 +119,8 @@ async def create_message(
             receiver = db.query(User).filter(User.id == message.receiver_id).first()
             if not receiver:
                 raise HTTPException(status_code=404, detail="Receiver not found")
+            if visibility_service.is_blocked_between(db, user_id, message.receiver_id):
+                raise HTTPException(status_code=403, detail="You cannot message this user")
         
         # If it's a reply, verify the parent message exists
         if message.reply_to_message_id:
@@ -103,22 +128,35 @@ async def create_message(
             if not parent_message:
                 raise HTTPException(status_code=404, detail="Parent message not found")
         
+        conversation = conversation_service.conversation_for_message(
+            db, user_id, message.receiver_id, message.group_id
+        )
+        
         # Create the message
+        now = datetime.utcnow()
         new_message = Message(
             sender_id=user_id,
             receiver_id=message.receiver_id,
             group_id=message.group_id,
+            conversation_id=conversation.id,
             content=message.content,
             media_url=message.media_url,
             message_type=message.message_type,
-            reply_to_message_id=message.reply_to_message_id
+            reply_to_message_id=message.reply_to_message_id,
+            is_burn_after_reading=message.is_burn_after_reading,
+            sent_at=now,
+            expires_at=now + timedelta(seconds=message.expires_in_seconds) if message.expires_in_seconds else None
         )
         
         db.add(new_message)
+        db.flush()
+        conversation_service.record_message(db, conversation, new_message)
         db.commit()
         db.refresh(new_message)
         
         return new_message
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create message: {str(e)}")
@@ -128,29 +166,111 @@ async def get_messages(
     skip: int = 0,
     limit: int = 50,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Get messages for the current user (both sent and received)
     """
     try:
-        messages = db.query(Message).filter(
-            (Message.sender_id == user_id) | 
-            (Message.receiver_id == user_id) |
-            (Message.group_id.in_(
-                db.query(GroupMember.group_id).filter(GroupMember.user_id == user_id)
-            ))
-        ).order_by(Message.sent_at.desc()).offset(skip).limit(limit).all()
+        # Conversations come from the user's inbox entries; each is an index range on
+        # (conversation_id, sent_at, id) instead of an OR across sender/receiver/group
+        conversation_ids = db.query(InboxEntry.conversation_id).filter(InboxEntry.user_id == user_id)
+        query = db.query(Message).filter(Message.conversation_id.in_(conversation_ids))
+        hidden = visibility_service.exclude_clause(db, user_id, Message.sender_id, "messages")
+        if hidden is not None:
+            query = query.filter(hidden)
+        messages = query.order_by(Message.sent_at.desc()).offset(skip).limit(limit).all()
         
         return messages
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve messages: {str(e)}")
 
+@router.get("/inbox", response_model=List[InboxEntryResponse])
+async def get_inbox(
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[datetime] = Query(None, description="last_message_at of the last entry on the previous page"),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get the user's conversations ordered by latest activity, with unread counts
+    """
+    try:
+        return conversation_service.get_inbox(db, user_id, limit=limit, before=before)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve inbox: {str(e)}")
+
+@router.get("/conversations/{conversation_id}", response_model=ConversationPageResponse)
+async def get_conversation_messages(
+    conversation_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Get a page of messages in a conversation, newest first
+    """
+    entry = conversation_service.get_inbox_entry(db, user_id, conversation_id)
+    if not entry:
+        raise HTTPException(status_code=403, detail="You are not a participant in this conversation")
+    
+    page_cursor = None
+    if cursor:
+        try:
+            sent_at, message_id = cursor.rsplit("_", 1)
+            page_cursor = (datetime.fromisoformat(sent_at), int(message_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    try:
+        messages = conversation_service.get_page(db, conversation_id, limit=limit, cursor=page_cursor)
+        next_cursor = None
+        if len(messages) == limit:
+            last = messages[-1]
+            next_cursor = f"{last.sent_at.isoformat()}_{last.id}"
+        # Cursor comes from the unfiltered page so hidden senders never stall paging
+        messages = visibility_service.filter_items(db, user_id, messages, lambda m: m.sender_id, "messages")
+        
+        return ConversationPageResponse(
+            conversation_id=conversation_id,
+            messages=[MessageResponse.model_validate(m) for m in messages],
+            next_cursor=next_cursor
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve conversation: {str(e)}")
+
+@router.post("/conversations/{conversation_id}/read")
+async def mark_conversation_read(
+    conversation_id: int,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Mark a conversation as read for the current user
+    """
+    entry = conversation_service.get_inbox_entry(db, user_id, conversation_id)
+    if not entry:
+        raise HTTPException(status_code=403, detail="You are not a participant in this conversation")
+    
+    try:
+        conversation_service.mark_read(db, entry)
+        burned = message_reaper.burn_on_read(db, conversation_id, user_id, entry.last_read_message_id)
+        db.commit()
+        return {
+            "message": "Conversation marked as read",
+            "last_read_message_id": entry.last_read_message_id,
+            "burned_messages": burned
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to mark conversation as read: {str(e)}")
+
 @router.get("/thread/{message_id}", response_model=ThreadedMessageResponse)
 async def get_message_thread(
     message_id: int,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Get a message and all its replies (threaded view)
@@ -179,6 +299,7 @@ async def get_message_thread(
         replies = db.query(Message).filter(
             Message.reply_to_message_id == message_id
         ).order_by(Message.sent_at.asc()).all()
+        replies = visibility_service.filter_items(db, user_id, replies, lambda m: m.sender_id, "messages")
         
         # Create response with replies
         response = ThreadedMessageResponse(
@@ -209,7 +330,7 @@ async def update_message(
     message_id: int,
     message_update: MessageUpdate,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Update a message (only allowed for the sender)
@@ -241,7 +362,7 @@ async def update_message(
 async def delete_message(
     message_id: int,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Delete a message (only allowed for the sender)
@@ -266,12 +387,22 @@ async def delete_message(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete message: {str(e)}")
 
+@router.get("/reaper/stats")
+async def get_reaper_stats(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """
+    Expiry reaper metrics, including the current backlog of expired messages
+    """
+    return {**message_reaper.stats(), "backlog": message_reaper.backlog_size(db)}
+
 # Voice Channel Endpoints
 @router.post("/voice-channels", response_model=VoiceChannelResponse)
 async def create_voice_channel(
     voice_channel: VoiceChannelCreate,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Create a new voice channel in a group
@@ -317,7 +448,7 @@ async def create_voice_channel(
 async def join_voice_channel(
     channel_id: int,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Join a voice channel
@@ -349,7 +480,7 @@ async def join_voice_channel(
 async def leave_voice_channel(
     channel_id: int,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Leave a voice channel
@@ -371,7 +502,7 @@ async def leave_voice_channel(
 async def get_group_voice_channels(
     group_id: int,
     db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Get all voice channels for a group
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List, Optional
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from app.database import get_db
 from app.auth.middleware import get_current_user
+from app.services.photo_service import PhotoIndex, photo_interactions
 
 router = APIRouter()
 
@@ -86,6 +89,9 @@ MOCK_PHOTOS = [
     )
 ]
 
+# Search and trending index; rebuild (and reassign) when the catalog changes
+photo_index = PhotoIndex(MOCK_PHOTOS)
+
 @router.get("/")
 async def get_photos(
     skip: int = Query(0, ge=0),
@@ -111,15 +117,12 @@ async def get_photos(
 @router.get("/trending", response_model=List[PhotoResponse])
 async def get_trending_photos(
     limit: int = Query(20, ge=1, le=100),
-    category: Optional[str] = Query(None, description="Filter by category")
+    category: Optional[str] = Query(None, description="Filter by category"),
+    db: Session = Depends(get_db)
 ):
     """Get trending photos based on current popularity"""
-    photos_list = MOCK_PHOTOS
-    
-    if category:
-        photos_list = [photo for photo in photos_list if category.lower() in photo.category.lower()]
-    
-    return sorted(photos_list, key=lambda x: x.trending_score, reverse=True)[:limit]
+    photo_interactions.load_scores(db, photo_index)
+    return photo_index.trending(limit=limit, category=category)
 
 @router.get("/search", response_model=List[PhotoResponse])
 async def search_photos(
@@ -129,36 +132,7 @@ async def search_photos(
     limit: int = Query(20, ge=1, le=100)
 ):
     """Search photos by title, tags, photographer, or category"""
-    query = q.lower()
-    results = []
-    
-    for photo in MOCK_PHOTOS:
-        match = False
-        
-        # Check title
-        if query in photo.title.lower():
-            match = True
-        
-        # Check tags
-        if any(query in tag.lower() for tag in photo.tags):
-            match = True
-            
-        # Check photographer
-        if photographer and photographer.lower() in photo.photographer.lower():
-            match = True
-        elif not photographer and query in photo.photographer.lower():
-            match = True
-            
-        # Check category
-        if category and category.lower() in photo.category.lower():
-            match = True
-        elif not category and query in photo.category.lower():
-            match = True
-            
-        if match:
-            results.append(photo)
-    
-    return results[:limit]
+    return photo_index.search(q, category=category, photographer=photographer, limit=limit)
 
 @router.get("/categories", response_model=List[str])
 async def get_categories():
@@ -170,31 +144,47 @@ async def get_categories():
 
 @router.post("/like")
 async def like_photo(
-    request: dict
+    request: PhotoLikeRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
 ):
     """Like/unlike a photo"""
-    # TODO: Store in user preferences
+    if not photo_index.get(request.photo_id):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    photo_interactions.load_scores(db, photo_index)
+    changed = photo_interactions.set_favorite(db, photo_index, current_user.id, request.photo_id, request.liked)
     return {
-        "message": "Photo preference updated",
-        "photo_id": request.get("photo_id"),
-        "liked": request.get("liked")
+        "message": "Photo preference updated" if changed else "Photo preference unchanged",
+        "photo_id": request.photo_id,
+        "liked": request.liked
     }
 
+@router.post("/{photo_id}/view")
+async def view_photo(
+    photo_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Record a photo view in the user's history"""
+    if not photo_index.get(photo_id):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    photo_interactions.record_view(db, current_user.id, photo_id)
+    return {"message": "View recorded", "photo_id": photo_id}
+
 @router.get("/favorites", response_model=List[PhotoResponse])
 async def get_favorite_photos(
     limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get user's favorite photos"""
-    # TODO: Retrieve from user preferences
-    return MOCK_PHOTOS[:5]  # Mock response
+    """Get user's favorite photos, most recent first"""
+    return photo_index.get_many(photo_interactions.favorites(db, current_user.id, limit))
 
 @router.get("/history", response_model=List[PhotoResponse])
 async def get_photo_history(
     limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get user's photo viewing history"""
-    # TODO: Retrieve from user history
-    return MOCK_PHOTOS[:10]  # Mock response 
-
+    """Get user's photo viewing history, most recent first"""
+    return photo_index.get_many(photo_interactions.history(db, current_user.id, limit))
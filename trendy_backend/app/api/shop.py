@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from app.auth.middleware import get_current_user
 
@@ -41,6 +42,12 @@ class CategoryResponse(BaseModel):
     subcategories: List[str]
     image_url: str
 
+class ProductSearchResponse(BaseModel):
+    items: List[ProductResponse]
+    total: int
+    facets: Dict[str, Dict[str, int]]
+    price_range: Optional[Dict[str, float]] = None
+
 # Mock data - replace with actual shopping API integration
 MOCK_PRODUCTS = [
     ProductResponse(
@@ -162,6 +169,12 @@ MOCK_CATEGORIES = [
     )
 ]
 
+@lru_cache()
+def get_catalog():
+    """Built on the first shop request, so NumPy is not imported at startup; clear the cache when the catalog changes"""
+    from app.core.catalog import CatalogIndex
+    return CatalogIndex(MOCK_PRODUCTS)
+
 @router.get("/products", response_model=List[ProductResponse])
 async def get_products(
     category: Optional[str] = Query(None, description="Filter by category"),
@@ -174,31 +187,48 @@ async def get_products(
     current_user: dict = Depends(get_current_user)
 ):
     """Get shopping products with filtering and sorting"""
-    products = MOCK_PRODUCTS
-    
-    if category:
-        products = [p for p in products if category.lower() in p.category.lower()]
-    
-    if subcategory:
-        products = [p for p in products if subcategory.lower() in p.subcategory.lower()]
-    
-    if brand:
-        products = [p for p in products if brand.lower() in p.brand.lower()]
-    
-    if min_price:
-        products = [p for p in products if p.price >= min_price]
-    
-    if max_price:
-        products = [p for p in products if p.price <= max_price]
-    
-    if sort_by == "price":
-        products = sorted(products, key=lambda x: x.price)
-    elif sort_by == "rating":
-        products = sorted(products, key=lambda x: x.rating, reverse=True)
-    else:
-        products = sorted(products, key=lambda x: x.trending_score, reverse=True)
-    
-    return products[:limit]
+    return get_catalog().search(
+        category=category,
+        subcategory=subcategory,
+        brand=brand,
+        min_price=min_price,
+        max_price=max_price,
+        sort_by=sort_by,
+        limit=limit,
+        with_facets=False
+    ).items
+
+@router.get("/products/search", response_model=ProductSearchResponse)
+async def search_products(
+    category: Optional[str] = Query(None, description="Filter by category"),
+    subcategory: Optional[str] = Query(None, description="Filter by subcategory"),
+    brand: Optional[str] = Query(None, description="Filter by brand"),
+    min_price: Optional[float] = Query(None, description="Minimum price"),
+    max_price: Optional[float] = Query(None, description="Maximum price"),
+    in_stock: bool = Query(False, description="Only products in stock"),
+    sort_by: Optional[str] = Query("trending", description="Sort by: trending, price, price_desc, rating"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: dict = Depends(get_current_user)
+):
+    """Faceted product search: a page of results plus per-facet counts"""
+    result = get_catalog().search(
+        category=category,
+        subcategory=subcategory,
+        brand=brand,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock_only=in_stock,
+        sort_by=sort_by,
+        limit=limit,
+        offset=offset
+    )
+    return ProductSearchResponse(
+        items=result.items,
+        total=result.total,
+        facets=result.facets,
+        price_range=result.price_range
+    )
 
 @router.get("/recommendations", response_model=List[ProductResponse])
 async def get_product_recommendations(
@@ -209,12 +239,7 @@ async def get_product_recommendations(
 ):
     """Get personalized product recommendations"""
     # TODO: Implement ML-based recommendations using user preferences
-    products = MOCK_PRODUCTS
-    
-    if category:
-        products = [p for p in products if category.lower() in p.category.lower()]
-    
-    return sorted(products, key=lambda x: x.trending_score, reverse=True)[:limit]
+    return get_catalog().search(category=category, sort_by="trending", limit=limit, with_facets=False).items
 
 @router.get("/categories", response_model=List[CategoryResponse])
 async def get_categories(current_user: dict = Depends(get_current_user)):
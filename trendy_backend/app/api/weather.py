@@ -1,4 +1,3 @@
-import requests
 from fastapi import APIRouter, HTTPException
 import os
 
@@ -21,6 +20,7 @@ async def get_weather(city: str):
     url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
     
     try:
+        import requests  # only needed outside demo mode; not loaded at startup
         response = requests.get(url, timeout=10)
         if response.status_code == 200:
             return response.json()
@@ -45,6 +45,7 @@ async def get_forecast(city: str):
     url = f"http://api.openweathermap.org/data/2.5/forecast?q={city}&appid={api_key}&units=metric"
     
     try:
+        import requests
         response = requests.get(url, timeout=10)
         if response.status_code == 200:
             return response.json()
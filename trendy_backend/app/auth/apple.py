@@ -3,7 +3,6 @@ Apple Sign-In Implementation for TRENDY App
 """
 
 import os
-import httpx
 from typing import Dict, Any
 from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
@@ -27,6 +26,8 @@ class AppleAuth:
         """
         Verify Apple ID token and return user info
         """
+        import httpx
+
         try:
             # Verify the token with Apple
             url = "https://appleid.apple.com/auth/verify"
@@ -6,7 +6,6 @@ Fixed version with proper JWT verification
 import logging
 import os
 import jwt
-import httpx
 from typing import Dict, Any
 from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
@@ -30,6 +29,8 @@ class AppleAuth:
     
     async def get_apple_public_keys(self):
         """Get Apple's public keys for JWT verification"""
+        import httpx
+
         try:
             logger.info("Fetching Apple public keys")
             async with httpx.AsyncClient() as client:
@@ -3,19 +3,18 @@ Email Verification Module for TRENDY App
 Handles email verification workflow and user activation
 """
 
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from datetime import datetime, timedelta
-import secrets
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from datetime import timedelta
+from typing import Optional
 
 from app.database import get_db
 from app.models.user import User
 from app.core.config import get_settings
 from app.auth.jwt_handler import create_access_token
+from app.services.email_service import email_service
+from app.services.token_store import token_store, TokenThrottled, VERIFY_EMAIL, PASSWORD_RESET
 
 router = APIRouter(prefix="/auth/email", tags=["email-verification"])
 
@@ -23,67 +22,34 @@ class EmailVerificationRequest(BaseModel):
     email: str
 
 class EmailVerificationConfirm(BaseModel):
-    email: str
     token: str
+    email: Optional[str] = None
 
 class ResendVerificationRequest(BaseModel):
     email: str
 
-class EmailService:
-    """Email service for sending verification emails"""
-    
-    @staticmethod
-    async def send_verification_email(email: str, token: str, background_tasks: BackgroundTasks):
-        """Send verification email to user"""
-        
-        settings = get_settings()
-        subject = "Verify your TRENDY account"
-        verification_url = f"{settings.FRONTEND_URL}/verify-email?token={token}&email={email}"
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Verify your TRENDY account</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; }}
-                .container {{ max-width: 600px; margin: 0 auto; }}
-                .header {{ background: #1a73e8; color: white; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .button {{ background: #1a73e8; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px; display: inline-block; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Welcome to TRENDY!</h1>
-                </div>
-                <div class="content">
-                    <h2>Verify your email address</h2>
-                    <p>Thank you for signing up for TRENDY! Please click the button below to verify your email address.</p>
-                    <p>
-                        <a href="{verification_url}" class="button">Verify Email Address</a>
-                    </p>
-                    <p>If the button doesn't work, copy and paste this link into your browser:</p>
-                    <p>{verification_url}</p>
-                    <p>This link will expire in 24 hours.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        background_tasks.add_task(
-            send_email_async,
-            email=email,
-            subject=subject,
-            html_content=html_content
-        )
+class PasswordResetRequest(BaseModel):
+    email: str
+
+class PasswordResetConfirmRequest(BaseModel):
+    token: str
+    new_password: str
+
+def _issue_token(db: Session, user: User, purpose: str, ttl: timedelta) -> str:
+    try:
+        return token_store.issue(db, user.id, purpose, ttl)
+    except TokenThrottled as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def queue_verification_email(db: Session, user: User):
+    """Issue a fresh verification token and queue the email for delivery"""
+    ttl = timedelta(hours=get_settings().email_verification_token_hours)
+    token = _issue_token(db, user, VERIFY_EMAIL, ttl)
+    await email_service.send_verification_email(db, user.email, user.username, token)
 
 @router.post("/send-verification")
 async def send_verification_email(
     request: EmailVerificationRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Send email verification to user"""
@@ -95,19 +61,7 @@ async def send_verification_email(
     if user.is_verified:
         raise HTTPException(status_code=400, detail="Email already verified")
     
-    # Generate verification token
-    verification_token = secrets.token_urlsafe(32)
-    user.email_verification_token = verification_token
-    user.email_verification_expires = datetime.utcnow() + timedelta(hours=24)
-    
-    db.commit()
-    
-    # Send verification email
-    await EmailService.send_verification_email(
-        email=request.email,
-        token=verification_token,
-        background_tasks=background_tasks
-    )
+    await queue_verification_email(db, user)
     
     return {"message": "Verification email sent successfully"}
 
@@ -115,25 +69,22 @@ async def send_verification_email(
 async def verify_email(request: EmailVerificationConfirm, db: Session = Depends(get_db)):
     """Verify email address with token"""
     
-    user = db.query(User).filter(
-        User.email == request.email,
-        User.email_verification_token == request.token
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=400, detail="Invalid verification token")
+    scoped_user_id = None
+    if request.email is not None:
+        scoped_user_id = db.query(User.id).filter(User.email == request.email).scalar()
+        if scoped_user_id is None:
+            raise HTTPException(status_code=400, detail="Invalid or expired verification token")
     
-    if user.email_verification_expires < datetime.utcnow():
-        raise HTTPException(status_code=400, detail="Verification token expired")
+    user_id = token_store.consume(db, request.token, VERIFY_EMAIL, scoped_user_id)
+    if user_id is None:
+        raise HTTPException(status_code=400, detail="Invalid or expired verification token")
     
+    user = db.query(User).filter(User.id == user_id).first()
     if user.is_verified:
         raise HTTPException(status_code=400, detail="Email already verified")
     
     # Mark email as verified
     user.is_verified = True
-    user.email_verification_token = None
-    user.email_verification_expires = None
-    
     db.commit()
     
     return {"message": "Email verified successfully"}
@@ -141,7 +92,6 @@ async def verify_email(request: EmailVerificationConfirm, db: Session = Depends(
 @router.post("/resend-verification")
 async def resend_verification(
     request: ResendVerificationRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Resend verification email"""
@@ -153,37 +103,34 @@ async def resend_verification(
     if user.is_verified:
         raise HTTPException(status_code=400, detail="Email already verified")
     
-    # Generate new verification token
-    verification_token = secrets.token_urlsafe(32)
-    user.email_verification_token = verification_token
-    user.email_verification_expires = datetime.utcnow() + timedelta(hours=24)
-    
-    db.commit()
-    
-    # Send verification email
-    await EmailService.send_verification_email(
-        email=request.email,
-        token=verification_token,
-        background_tasks=background_tasks
-    )
+    await queue_verification_email(db, user)
     
     return {"message": "Verification email resent successfully"}
 
-async def send_email_async(email: str, subject: str, html_content: str):
-    """Send email asynchronously"""
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = settings.EMAIL_FROM
-        msg["To"] = email
-        
-        html_part = MIMEText(html_content, "html")
-        msg.attach(html_part)
-        
-        with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-            
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
+@router.post("/password-reset/request")
+async def request_password_reset(request: PasswordResetRequest, db: Session = Depends(get_db)):
+    """Request password reset email"""
+    
+    user = db.query(User).filter(User.email == request.email).first()
+    # Same answer whether or not the email exists or was throttled, for security
+    if user:
+        ttl = timedelta(minutes=get_settings().password_reset_token_minutes)
+        try:
+            token = token_store.issue(db, user.id, PASSWORD_RESET, ttl)
+        except TokenThrottled:
+            token = None
+        if token:
+            await email_service.send_password_reset_email(db, user.email, user.username, token)
+    
+    return {"message": "If the email exists, a reset link has been sent"}
+
+@router.post("/password-reset/confirm")
+async def confirm_password_reset(request: PasswordResetConfirmRequest, db: Session = Depends(get_db)):
+    """Confirm password reset with token"""
+    
+    user_id = token_store.consume(db, request.token, PASSWORD_RESET)
+    if user_id is None:
+        raise HTTPException(status_code=400, detail="Invalid or expired reset token")
+    
+    # Passwords are held by Firebase Auth; the token is single-use and is now spent
+    return {"message": "Password reset successfully"}
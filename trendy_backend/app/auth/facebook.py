@@ -3,7 +3,6 @@ Facebook OAuth Implementation for TRENDY App
 """
 
 import logging
-import httpx
 from typing import Dict, Any
 from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
@@ -37,6 +36,9 @@ class FacebookAuth:
         """
         Verify Facebook access token and return user info
         """
+        # httpx (and httpcore/h11) is only needed for the outbound call; keep it out of startup
+        import httpx
+
         try:
             logger.info("Verifying Facebook token")
             # First, debug the token to get app ID and user ID
@@ -110,6 +112,8 @@ class FacebookAuth:
         """
         Exchange authorization code for access token
         """
+        import httpx
+
         try:
             logger.info("Getting Facebook access token")
             token_url = "https://graph.facebook.com/v19.0/oauth/access_token"
@@ -5,8 +5,6 @@ Google OAuth Implementation for TRENDY App
 import logging
 from typing import Dict, Any
 from fastapi import HTTPException, status, Depends
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -36,6 +34,10 @@ class GoogleAuth:
         """
         Verify Google ID token and return user info
         """
+        # google-auth pulls in requests and the ASN.1 modules; load them on the first sign-in, not at startup
+        from google.oauth2 import id_token
+        from google.auth.transport import requests as google_requests
+
         try:
             logger.info("Verifying Google token")
             # Verify the token
@@ -3,34 +3,41 @@ Unified Authentication Middleware for TRENDY App
 Handles Firebase authentication consistently across all endpoints
 """
 
+import logging
+import os
 from fastapi import HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, Dict, Any
-import firebase_admin
-from firebase_admin import auth, credentials
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.user import User
 from app.core.config import get_settings
+from app.services.entitlements import entitlement_service
 
-settings = get_settings()
+logger = logging.getLogger(__name__)
 
-# Initialize Firebase Admin if not already initialized
-if not firebase_admin._apps:
+def init_firebase(settings=None) -> bool:
+    """Initialize Firebase Admin once per process; called from the app lifespan, not at import."""
+    # firebase_admin pulls in the Google client libraries; keep it out of the import of app.main
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if firebase_admin._apps:
+        return True
+    settings = settings or get_settings()
     try:
         # Check if the credentials file exists before trying to initialize
-        import os
         if os.path.exists(settings.firebase_credentials_json_path):
             cred = credentials.Certificate(settings.firebase_credentials_json_path)
             firebase_admin.initialize_app(cred)
-            print("Firebase Admin initialized successfully")
-        else:
-            print(f"Warning: Firebase credentials file not found at {settings.firebase_credentials_json_path}")
-            print("Firebase authentication will be disabled. Using mock authentication for development.")
+            logger.info("Firebase Admin initialized successfully")
+            return True
+        logger.warning(f"Firebase credentials file not found at {settings.firebase_credentials_json_path}; "
+                       "Firebase authentication is disabled")
     except Exception as e:
-        print(f"Warning: Failed to initialize Firebase Admin: {str(e)}")
-        print("Firebase authentication will be disabled. Using mock authentication for development.")
+        logger.warning(f"Failed to initialize Firebase Admin: {str(e)}; Firebase authentication is disabled")
+    return False
 
 security = HTTPBearer()
 
@@ -39,6 +46,8 @@ async def verify_firebase_token(credentials: HTTPAuthorizationCredentials = Depe
     Verify Firebase JWT token and return decoded token data.
     This is the primary authentication dependency for all endpoints.
     """
+    from firebase_admin import auth
+
     try:
         token = credentials.credentials
         decoded_token = auth.verify_id_token(token)
@@ -116,6 +125,20 @@ async def get_current_admin_user(current_user: User = Depends(get_current_user))
         )
     return current_user
 
+def require_feature(feature: str):
+    """Dependency factory for premium gating; resolves through the entitlement cache."""
+    async def dependency(
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+    ) -> User:
+        if not entitlement_service.has_feature(db, current_user.id, feature):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Your plan does not include {feature}"
+            )
+        return current_user
+    return dependency
+
 async def optional_auth(
     request: Request,
     db: Session = Depends(get_db)
@@ -130,6 +153,8 @@ async def optional_auth(
         return None
     
     try:
+        from firebase_admin import auth
+
         token = auth_header.split(" ", 1)[1]
         decoded_token = auth.verify_id_token(token)
         
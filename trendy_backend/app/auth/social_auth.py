@@ -6,7 +6,6 @@ Handles Google, Facebook, and Apple OAuth integration
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import httpx
 import jwt
 from datetime import datetime, timedelta
 import secrets
@@ -85,6 +84,8 @@ async def social_login(request: SocialLoginRequest, db: Session = Depends(get_db
 
 async def verify_google_token(token: str) -> dict:
     """Verify Google OAuth token"""
+    import httpx
+
     try:
         async with httpx.AsyncClient() as client:
             response = await client.get(
@@ -105,6 +106,8 @@ async def verify_google_token(token: str) -> dict:
 
 async def verify_facebook_token(token: str) -> dict:
     """Verify Facebook OAuth token"""
+    import httpx
+
     try:
         async with httpx.AsyncClient() as client:
             response = await client.get(
@@ -1,50 +1,316 @@
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+"""
+Analytics event store for TRENDY App
+Events are appended to compact columnar buffers (typed arrays plus interned
+user ids and event types), flushed periodically to the analytics_events table,
+and counted per event type and time bucket so site-wide analytics read
+O(buckets) counters instead of walking every event.
+"""
+
+import asyncio
 import json
+import logging
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.analytics_event import AnalyticsEvent, AnalyticsCounter
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer:
+    """Columnar append buffer: one typed array per column, strings interned once"""
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.user_codes = array("q")
+        self.type_codes = array("H")
+        self.payloads: List[Optional[str]] = []
+        self.users: List[str] = []
+        self._user_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, timestamp: float, user_id: str, type_code: int, payload: Optional[str]):
+        code = self._user_index.get(user_id)
+        if code is None:
+            code = self._user_index[user_id] = len(self.users)
+            self.users.append(user_id)
+        self.timestamps.append(timestamp)
+        self.user_codes.append(code)
+        self.type_codes.append(type_code)
+        self.payloads.append(payload)
+
+    def extend(self, other: "EventBuffer"):
+        for i in range(len(other)):
+            self.append(other.timestamps[i], other.users[other.user_codes[i]], other.type_codes[i], other.payloads[i])
+
+    def rows_for_user(self, user_id: str) -> List[int]:
+        code = self._user_index.get(user_id)
+        if code is None:
+            return []
+        return [i for i, user_code in enumerate(self.user_codes) if user_code == code]
+
 
 class AnalyticsEngine:
     """Analytics and activity tracking engine"""
-    
-    def __init__(self):
-        self.analytics_db = {}
-        
+
+    def __init__(self, bucket_seconds: int = 3600, retention_days: int = 90, max_buffer_size: int = 10000):
+        self.bucket_seconds = bucket_seconds
+        self.retention_days = retention_days
+        self.max_buffer_size = max_buffer_size
+        self._lock = threading.Lock()
+        self._buffer = EventBuffer()
+        self._event_types: List[str] = []
+        self._type_index: Dict[str, int] = {}
+        # bucket start (epoch seconds) -> event type code -> count, this process only
+        self._counters: Dict[int, Dict[int, int]] = {}
+        # Counter increments not yet written to analytics_counters
+        self._pending_counts: Dict[Tuple[int, int], int] = {}
+        self.flush_requested = threading.Event()
+        self.dropped_events = 0
+
+    def _type_code(self, event_type: str) -> int:
+        code = self._type_index.get(event_type)
+        if code is None:
+            code = self._type_index[event_type] = len(self._event_types)
+            self._event_types.append(event_type)
+        return code
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds) * self.bucket_seconds
+
     def track_event(self, user_id: str, event_type: str, event_data: Dict[str, Any]):
-        """Track user events"""
-        if user_id not in self.analytics_db:
-            self.analytics_db[user_id] = []
-        
-        self.analytics_db[user_id].append({
-            'event_type': event_type,
-            'event_data': event_data,
-            'timestamp': datetime.now()
-        })
-    
-    def get_user_analytics(self, user_id: str, days: int = 30) -> Dict[str, Any]:
+        """Track user events; O(1) and never touches the database"""
+        now = time.time()
+        payload = json.dumps(event_data, default=str, separators=(",", ":")) if event_data else None
+        with self._lock:
+            type_code = self._type_code(event_type)
+            if len(self._buffer) >= self.max_buffer_size * 10:
+                # The flusher is far behind; keep counters accurate but shed the raw event
+                self.dropped_events += 1
+            else:
+                self._buffer.append(now, str(user_id), type_code, payload)
+            bucket = self._bucket(now)
+            counts = self._counters.setdefault(bucket, {})
+            counts[type_code] = counts.get(type_code, 0) + 1
+            self._pending_counts[(bucket, type_code)] = self._pending_counts.get((bucket, type_code), 0) + 1
+            if len(self._buffer) >= self.max_buffer_size:
+                self.flush_requested.set()
+
+    def _swap(self) -> Tuple[EventBuffer, Dict[Tuple[int, int], int]]:
+        with self._lock:
+            buffer, self._buffer = self._buffer, EventBuffer()
+            pending, self._pending_counts = self._pending_counts, {}
+            self.flush_requested.clear()
+            cutoff = self._bucket(time.time() - self.retention_days * 86400)
+            for bucket in [b for b in self._counters if b < cutoff]:
+                del self._counters[bucket]
+        return buffer, pending
+
+    def _restore(self, buffer: EventBuffer, pending: Dict[Tuple[int, int], int]):
+        """Put a failed flush back in front of anything tracked since"""
+        with self._lock:
+            buffer.extend(self._buffer)
+            self._buffer = buffer
+            for key, count in pending.items():
+                self._pending_counts[key] = self._pending_counts.get(key, 0) + count
+
+    def _write_counters(self, db: Session, pending: Dict[Tuple[int, int], int]):
+        for (bucket, type_code), count in pending.items():
+            bucket_start = datetime.utcfromtimestamp(bucket)
+            event_type = self._event_types[type_code]
+            match = db.query(AnalyticsCounter).filter(
+                AnalyticsCounter.bucket_start == bucket_start,
+                AnalyticsCounter.event_type == event_type
+            )
+            if match.update({AnalyticsCounter.count: AnalyticsCounter.count + count}, synchronize_session=False):
+                continue
+            try:
+                with db.begin_nested():
+                    db.add(AnalyticsCounter(bucket_start=bucket_start, event_type=event_type, count=count))
+            except IntegrityError:
+                # Another worker created the bucket first
+                match.update({AnalyticsCounter.count: AnalyticsCounter.count + count}, synchronize_session=False)
+
+    def flush(self, db: Session) -> Dict[str, int]:
+        """Bulk-insert buffered events and fold counter increments into analytics_counters"""
+        buffer, pending = self._swap()
+        if not len(buffer) and not pending:
+            return {"events": 0, "counters": 0}
+        try:
+            if len(buffer):
+                db.bulk_insert_mappings(AnalyticsEvent, [
+                    {
+                        "user_id": buffer.users[buffer.user_codes[i]],
+                        "event_type": self._event_types[buffer.type_codes[i]],
+                        "data": json.loads(buffer.payloads[i]) if buffer.payloads[i] else None,
+                        "created_at": datetime.utcfromtimestamp(buffer.timestamps[i]),
+                    }
+                    for i in range(len(buffer))
+                ])
+            self._write_counters(db, pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore(buffer, pending)
+            raise
+        return {"events": len(buffer), "counters": len(pending)}
+
+    def load_counters(self, db: Session, days: Optional[int] = None):
+        """Warm the in-memory counters from analytics_counters, e.g. at startup"""
+        since = datetime.utcnow() - timedelta(days=days or self.retention_days)
+        rows = db.query(AnalyticsCounter.bucket_start, AnalyticsCounter.event_type, AnalyticsCounter.count).filter(
+            AnalyticsCounter.bucket_start >= since
+        ).all()
+        with self._lock:
+            self._counters = {}
+            for bucket_start, event_type, count in rows:
+                bucket = self._bucket((bucket_start - datetime(1970, 1, 1)).total_seconds())
+                counts = self._counters.setdefault(bucket, {})
+                type_code = self._type_code(event_type)
+                counts[type_code] = counts.get(type_code, 0) + count
+            # Increments not yet flushed are not in the table
+            for (bucket, type_code), count in self._pending_counts.items():
+                counts = self._counters.setdefault(bucket, {})
+                counts[type_code] = counts.get(type_code, 0) + count
+
+    def _buffered_events(self, user_id: str, since: float) -> List[Dict[str, Any]]:
+        with self._lock:
+            buffer = self._buffer
+            return [
+                {
+                    "event_type": self._event_types[buffer.type_codes[i]],
+                    "event_data": json.loads(buffer.payloads[i]) if buffer.payloads[i] else {},
+                    "timestamp": datetime.utcfromtimestamp(buffer.timestamps[i]).isoformat(),
+                }
+                for i in buffer.rows_for_user(str(user_id))
+                if buffer.timestamps[i] >= since
+            ]
+
+    def get_user_analytics(self, user_id: str, days: int = 30, db: Optional[Session] = None,
+                           timeline_limit: int = 100) -> Dict[str, Any]:
         """Get user analytics for specified days"""
-        if user_id not in self.analytics_db:
+        since = datetime.utcnow() - timedelta(days=days)
+        timeline = self._buffered_events(user_id, (since - datetime(1970, 1, 1)).total_seconds())
+        event_types: Dict[str, int] = {}
+        for event in timeline:
+            event_types[event["event_type"]] = event_types.get(event["event_type"], 0) + 1
+
+        if db is not None:
+            # Index range on (user_id, created_at)
+            for event_type, count in db.query(AnalyticsEvent.event_type, func.count(AnalyticsEvent.id)).filter(
+                AnalyticsEvent.user_id == str(user_id),
+                AnalyticsEvent.created_at >= since
+            ).group_by(AnalyticsEvent.event_type):
+                event_types[event_type] = event_types.get(event_type, 0) + count
+            stored = db.query(AnalyticsEvent).filter(
+                AnalyticsEvent.user_id == str(user_id),
+                AnalyticsEvent.created_at >= since
+            ).order_by(AnalyticsEvent.created_at.desc()).limit(timeline_limit).all()
+            timeline = list(reversed(timeline)) + [
+                {"event_type": e.event_type, "event_data": e.data or {}, "timestamp": e.created_at.isoformat()}
+                for e in stored
+            ]
+        else:
+            timeline = list(reversed(timeline))
+
+        if not event_types:
             return {}
-        
-        events = [e for e in self.analytics_db[user_id] if e['timestamp'] > datetime.now() - timedelta(days=days)]
-        
         return {
-            'total_events': len(events),
-            'event_types': {},
-            'timeline': events
+            'total_events': sum(event_types.values()),
+            'event_types': event_types,
+            'timeline': timeline[:timeline_limit]
         }
-    
-    def get_site_analytics(self, days: int = 30) -> Dict[str, Any]:
-        """Get site-wide analytics"""
-        total_events = 0
-        event_types = {}
-        
-        for user_id, events in self.analytics_db.items():
-            for event in events:
-                if event['timestamp'] > datetime.now() - timedelta(days=days):
-                    total_events += 1
-                    event_type = event['event_type']
-                    event_types[event_type] = event_types.get(event_type, 0) + 1
-        
+
+    def get_site_analytics(self, days: int = 30, db: Optional[Session] = None) -> Dict[str, Any]:
+        """Get site-wide analytics from per-bucket counters.
+
+        With a session the shared analytics_counters table is read (all workers)
+        plus this process's unflushed increments; without one, only this
+        process's in-memory counters are used.
+        """
+        cutoff = self._bucket(time.time() - days * 86400)
+        event_types: Dict[str, int] = {}
+        with self._lock:
+            if db is None:
+                sources = [(type_code, count) for bucket, counts in self._counters.items() if bucket >= cutoff
+                           for type_code, count in counts.items()]
+            else:
+                sources = [(type_code, count) for (bucket, type_code), count in self._pending_counts.items()
+                           if bucket >= cutoff]
+            for type_code, count in sources:
+                event_type = self._event_types[type_code]
+                event_types[event_type] = event_types.get(event_type, 0) + count
+
+        if db is not None:
+            for event_type, count in db.query(AnalyticsCounter.event_type, func.sum(AnalyticsCounter.count)).filter(
+                AnalyticsCounter.bucket_start >= datetime.utcfromtimestamp(cutoff)
+            ).group_by(AnalyticsCounter.event_type):
+                event_types[event_type] = event_types.get(event_type, 0) + int(count or 0)
+
         return {
-            'total_events': total_events,
+            'total_events': sum(event_types.values()),
             'event_types': event_types
         }
+
+    def purge_expired(self, db: Session, batch_size: int = 10000) -> int:
+        """Delete raw events and counters older than the retention window in bounded batches"""
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        deleted = 0
+        while True:
+            ids = [event_id for (event_id,) in db.query(AnalyticsEvent.id).filter(
+                AnalyticsEvent.created_at < cutoff
+            ).limit(batch_size)]
+            if not ids:
+                break
+            deleted += db.query(AnalyticsEvent).filter(AnalyticsEvent.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        db.query(AnalyticsCounter).filter(AnalyticsCounter.bucket_start < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    async def run_forever(self, session_factory, interval_seconds: float = 5.0):
+        """Background loop; flushes every interval or as soon as the buffer fills"""
+        loop = asyncio.get_event_loop()
+        last_purge = 0.0
+
+        def tick(purge: bool):
+            db = session_factory()
+            try:
+                result = self.flush(db)
+                if purge:
+                    result["purged"] = self.purge_expired(db)
+                return result
+            finally:
+                db.close()
+
+        while True:
+            try:
+                purge = time.monotonic() - last_purge >= 3600
+                result = await loop.run_in_executor(None, tick, purge)
+                if purge:
+                    last_purge = time.monotonic()
+                    if result.get("purged"):
+                        logger.info("Analytics purged %d expired events", result["purged"])
+            except Exception as e:
+                logger.error(f"Analytics flush failed: {str(e)}")
+            deadline = time.monotonic() + interval_seconds
+            while time.monotonic() < deadline and not self.flush_requested.is_set():
+                await asyncio.sleep(min(0.25, interval_seconds))
+
+
+# Create global instance
+settings = get_settings()
+analytics_engine = AnalyticsEngine(
+    bucket_seconds=settings.analytics_bucket_seconds,
+    retention_days=settings.analytics_retention_days,
+    max_buffer_size=settings.analytics_buffer_size
+)
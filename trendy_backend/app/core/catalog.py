@@ -0,0 +1,131 @@
+"""
+Shop catalog index for TRENDY App
+Products are loaded once into struct-of-arrays columns: NumPy price, rating
+and trending arrays plus interned category/subcategory/brand codes. Each facet
+value has a packed bitmap (N/8 bytes), price ranges are vectorized masks, and
+every sort order is precomputed, so a query is a handful of array operations
+instead of a pass over product objects. Facet counts are disjunctive: each
+facet is counted with every filter applied except its own.
+"""
+
+import logging
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FACETS = ("category", "subcategory", "brand")
+
+
+class CatalogResult(NamedTuple):
+    items: list
+    total: int
+    facets: Dict[str, Dict[str, int]]
+    price_range: Optional[Dict[str, float]]
+
+
+class CatalogIndex:
+    """Immutable index over a product list; build a new one to reload the catalog"""
+
+    def __init__(self, products: Sequence):
+        self.products = list(products)
+        n = self.size = len(self.products)
+        self.rows = {str(product.id): row for row, product in enumerate(self.products)}
+        self.price = np.fromiter((p.price for p in self.products), dtype=np.float64, count=n)
+        self.rating = np.fromiter((p.rating for p in self.products), dtype=np.float32, count=n)
+        self.trending = np.fromiter((p.trending_score for p in self.products), dtype=np.float32, count=n)
+        self.in_stock = np.fromiter((bool(p.in_stock) for p in self.products), dtype=bool, count=n)
+
+        self.values: Dict[str, List[str]] = {}
+        self._lowered: Dict[str, List[str]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.bitmaps: Dict[str, np.ndarray] = {}
+        for facet in FACETS:
+            interned: Dict[str, int] = {}
+            codes = np.fromiter(
+                (interned.setdefault(getattr(p, facet), len(interned)) for p in self.products),
+                dtype=np.int32, count=n
+            )
+            self.values[facet] = list(interned)
+            self._lowered[facet] = [value.lower() for value in interned]
+            self.codes[facet] = codes
+            # One packed bitmap row per distinct value
+            bitmaps = np.zeros((len(interned), (n + 7) // 8), dtype=np.uint8)
+            for code in range(len(interned)):
+                bitmaps[code] = np.packbits(codes == code)
+            self.bitmaps[facet] = bitmaps
+
+        # Stable sorts so ties keep catalog order
+        self.orders = {
+            "trending": np.argsort(-self.trending, kind="stable"),
+            "price": np.argsort(self.price, kind="stable"),
+            "price_desc": np.argsort(-self.price, kind="stable"),
+            "rating": np.argsort(-self.rating, kind="stable"),
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    def get(self, product_id: str):
+        row = self.rows.get(str(product_id))
+        return None if row is None else self.products[row]
+
+    def _facet_mask(self, facet: str, query: str) -> np.ndarray:
+        """Rows whose facet value contains query (case-insensitive), as an OR of value bitmaps"""
+        query = query.lower()
+        codes = [code for code, value in enumerate(self._lowered[facet]) if query in value]
+        if not codes:
+            return np.zeros(self.size, dtype=bool)
+        packed = np.bitwise_or.reduce(self.bitmaps[facet][codes], axis=0)
+        return np.unpackbits(packed, count=self.size).astype(bool)
+
+    def _price_mask(self, min_price: Optional[float], max_price: Optional[float]) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        if min_price is not None:
+            mask &= self.price >= min_price
+        if max_price is not None:
+            mask &= self.price <= max_price
+        return mask
+
+    @staticmethod
+    def _combine(masks: List[np.ndarray], size: int) -> np.ndarray:
+        combined = np.ones(size, dtype=bool)
+        for mask in masks:
+            combined &= mask
+        return combined
+
+    def search(self, category: Optional[str] = None, subcategory: Optional[str] = None,
+               brand: Optional[str] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None, in_stock_only: bool = False,
+               sort_by: str = "trending", limit: int = 20, offset: int = 0,
+               with_facets: bool = True) -> CatalogResult:
+        facet_queries = {"category": category, "subcategory": subcategory, "brand": brand}
+        facet_masks = {
+            facet: self._facet_mask(facet, query) for facet, query in facet_queries.items() if query
+        }
+        base_masks = []
+        if min_price is not None or max_price is not None:
+            base_masks.append(self._price_mask(min_price, max_price))
+        if in_stock_only:
+            base_masks.append(self.in_stock)
+
+        mask = self._combine(base_masks + list(facet_masks.values()), self.size)
+        order = self.orders.get(sort_by, self.orders["trending"])
+        rows = order[mask[order]]
+        items = [self.products[row] for row in rows[offset:offset + limit]]
+
+        facets: Dict[str, Dict[str, int]] = {}
+        price_range = None
+        if with_facets:
+            for facet in FACETS:
+                others = [m for name, m in facet_masks.items() if name != facet]
+                facet_mask = mask if facet not in facet_masks else self._combine(base_masks + others, self.size)
+                counts = np.bincount(self.codes[facet][facet_mask], minlength=len(self.values[facet]))
+                nonzero = np.flatnonzero(counts)
+                ranked = nonzero[np.argsort(-counts[nonzero], kind="stable")]
+                facets[facet] = {self.values[facet][code]: int(counts[code]) for code in ranked}
+            if len(rows):
+                prices = self.price[rows]
+                price_range = {"min": float(prices.min()), "max": float(prices.max())}
+        return CatalogResult(items=items, total=int(len(rows)), facets=facets, price_range=price_range)
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 from functools import lru_cache
@@ -8,6 +8,10 @@ class Settings(BaseSettings):
     # Environment
     env: str = Field(default="development", env="ENV")
     debug: bool = Field(default=True, env="DEBUG")
+    disabled_routers: str = Field(default="", env="DISABLED_ROUTERS")  # router modules this worker skips, e.g. movies,music
+    enabled_routers: str = Field(default="", env="ENABLED_ROUTERS")  # if set, the only router modules this worker loads
+    background_leader: bool = Field(default=True, env="BACKGROUND_LEADER")  # false skips requeues and singleton loops
+    background_leader_lock: str = Field(default="", env="BACKGROUND_LEADER_LOCK")  # flock file; one worker per host leads
     
     # Database
     database_url: str = Field(default="sqlite:///./trendy.db", env="DATABASE_URL")
@@ -35,6 +39,10 @@ class Settings(BaseSettings):
     # Payment Providers
     stripe_secret_key: str = Field(default="sk_test_your_stripe_secret_key_here", env="STRIPE_SECRET_KEY")
     stripe_webhook_secret: str = Field(default="whsec_your_webhook_secret_here", env="STRIPE_WEBHOOK_SECRET")
+    stripe_webhook_batch_size: int = Field(default=100, env="STRIPE_WEBHOOK_BATCH_SIZE")
+    stripe_webhook_max_attempts: int = Field(default=8, env="STRIPE_WEBHOOK_MAX_ATTEMPTS")
+    stripe_webhook_interval_seconds: float = Field(default=1.0, env="STRIPE_WEBHOOK_INTERVAL_SECONDS")
+    stripe_price_tiers: str = Field(default="", env="STRIPE_PRICE_TIERS")  # price_abc=premium,price_def=basic
     google_play_service_acc_json_path: str = Field(default="google-play-service-account.json", env="GOOGLE_PLAY_SERVICE_ACC_JSON_PATH")
     apple_api_key_id: str = Field(default="your_apple_api_key_id_here", env="APPLE_API_KEY_ID")
     apple_issuer_id: str = Field(default="your_apple_issuer_id_here", env="APPLE_ISSUER_ID")
@@ -65,6 +73,122 @@ class Settings(BaseSettings):
     # Cache
     cache_ttl: int = Field(default=3600, env="CACHE_TTL")
     
+    # Query profiling (development/staging)
+    query_profiler_enabled: bool = Field(default=False, env="QUERY_PROFILER_ENABLED")
+    slow_query_ms: float = Field(default=100.0, env="SLOW_QUERY_MS")
+    n_plus_one_threshold: int = Field(default=5, env="N_PLUS_ONE_THRESHOLD")
+    query_budgets: Dict[str, int] = Field(default_factory=dict, env="QUERY_BUDGETS")  # JSON: {"GET /messages/": 3}
+    query_budget_strict: bool = Field(default=False, env="QUERY_BUDGET_STRICT")
+    
+    # Message reaper
+    message_reaper_enabled: bool = Field(default=True, env="MESSAGE_REAPER_ENABLED")
+    message_reaper_interval_seconds: float = Field(default=30.0, env="MESSAGE_REAPER_INTERVAL_SECONDS")
+    message_reaper_batch_size: int = Field(default=500, env="MESSAGE_REAPER_BATCH_SIZE")
+    message_reaper_mode: str = Field(default="tombstone", env="MESSAGE_REAPER_MODE")  # tombstone, delete
+    
+    # Notification pipeline
+    notification_flush_interval_seconds: float = Field(default=1.0, env="NOTIFICATION_FLUSH_INTERVAL_SECONDS")
+    notification_batch_size: int = Field(default=1000, env="NOTIFICATION_BATCH_SIZE")
+    notification_push_batch_size: int = Field(default=500, env="NOTIFICATION_PUSH_BATCH_SIZE")
+    notification_coalesce_minutes: int = Field(default=1440, env="NOTIFICATION_COALESCE_MINUTES")
+    
+    # Content moderation
+    moderation_terms_dir: Optional[str] = Field(default=None, env="MODERATION_TERMS_DIR")  # <category>.txt files
+    moderation_reload_interval_seconds: float = Field(default=30.0, env="MODERATION_RELOAD_INTERVAL_SECONDS")
+    moderation_classifier: Optional[str] = Field(default=None, env="MODERATION_CLASSIFIER")  # "module:Class"
+    moderation_workers: int = Field(default=2, env="MODERATION_WORKERS")
+    moderation_batch_size: int = Field(default=64, env="MODERATION_BATCH_SIZE")
+    moderation_batch_wait_ms: float = Field(default=50.0, env="MODERATION_BATCH_WAIT_MS")
+    
+    # Recommendations
+    recommender_neighbors: int = Field(default=50, env="RECOMMENDER_NEIGHBORS")
+    recommender_max_items_per_user: int = Field(default=200, env="RECOMMENDER_MAX_ITEMS_PER_USER")
+    recommender_recent_items: int = Field(default=50, env="RECOMMENDER_RECENT_ITEMS")
+    recommender_index_path: Optional[str] = Field(default=None, env="RECOMMENDER_INDEX_PATH")  # built offline
+    recommender_vector_dir: Optional[str] = Field(default=None, env="RECOMMENDER_VECTOR_DIR")  # memory-mapped embeddings
+    recommender_ann_min_items: int = Field(default=10000, env="RECOMMENDER_ANN_MIN_ITEMS")
+    recommender_ann_nprobe: int = Field(default=8, env="RECOMMENDER_ANN_NPROBE")
+    
+    # Analytics event store
+    analytics_flush_interval_seconds: float = Field(default=5.0, env="ANALYTICS_FLUSH_INTERVAL_SECONDS")
+    analytics_buffer_size: int = Field(default=10000, env="ANALYTICS_BUFFER_SIZE")
+    analytics_bucket_seconds: int = Field(default=3600, env="ANALYTICS_BUCKET_SECONDS")
+    analytics_retention_days: int = Field(default=90, env="ANALYTICS_RETENTION_DAYS")
+    
+    # Sketch analytics (HLL error ~1.04/sqrt(2^precision); CMS overcount <= e/width * N w.p. 1 - e^-depth)
+    sketch_flush_interval_seconds: float = Field(default=10.0, env="SKETCH_FLUSH_INTERVAL_SECONDS")
+    sketch_hll_precision: int = Field(default=12, env="SKETCH_HLL_PRECISION")
+    sketch_cms_width: int = Field(default=2048, env="SKETCH_CMS_WIDTH")
+    sketch_cms_depth: int = Field(default=5, env="SKETCH_CMS_DEPTH")
+    
+    # Follow graph adjacency cache (per worker)
+    follow_graph_cache_users: int = Field(default=50000, env="FOLLOW_GRAPH_CACHE_USERS")
+    follow_graph_cache_ttl_seconds: float = Field(default=60.0, env="FOLLOW_GRAPH_CACHE_TTL_SECONDS")
+    bulk_follow_max_items: int = Field(default=5000, env="BULK_FOLLOW_MAX_ITEMS")
+    
+    # Denormalized user counters
+    user_counter_cache_ttl_seconds: float = Field(default=30.0, env="USER_COUNTER_CACHE_TTL_SECONDS")
+    user_counter_reconcile_interval_seconds: float = Field(default=60.0, env="USER_COUNTER_RECONCILE_INTERVAL_SECONDS")
+    user_counter_reconcile_batch_size: int = Field(default=1000, env="USER_COUNTER_RECONCILE_BATCH_SIZE")
+    
+    # Photo viewing history entries kept per user
+    photo_history_limit: int = Field(default=500, env="PHOTO_HISTORY_LIMIT")
+    
+    # Media uploads
+    media_storage_backend: str = Field(default="local", env="MEDIA_STORAGE_BACKEND")
+    media_root: str = Field(default="media", env="MEDIA_ROOT")
+    media_public_url: str = Field(default="/api/v1", env="MEDIA_PUBLIC_URL")
+    media_max_upload_bytes: int = Field(default=200 * 1024 * 1024, env="MEDIA_MAX_UPLOAD_BYTES")
+    media_chunk_size: int = Field(default=1024 * 1024, env="MEDIA_CHUNK_SIZE")
+    media_rendition_widths: List[int] = Field(default=[320, 640, 1080], env="MEDIA_RENDITION_WIDTHS")
+    media_thumbnail_size: int = Field(default=256, env="MEDIA_THUMBNAIL_SIZE")
+    media_workers: int = Field(default=2, env="MEDIA_WORKERS")
+    media_url_ttl_seconds: int = Field(default=3600, env="MEDIA_URL_TTL_SECONDS")
+    media_signing_key: Optional[str] = Field(default=None, env="MEDIA_SIGNING_KEY")
+    
+    # Stories
+    story_ttl_hours: float = Field(default=24.0, env="STORY_TTL_HOURS")
+    story_sweep_interval_seconds: float = Field(default=60.0, env="STORY_SWEEP_INTERVAL_SECONDS")
+    story_sweep_batch_size: int = Field(default=1000, env="STORY_SWEEP_BATCH_SIZE")
+    
+    # Email delivery
+    mail_server: str = Field(default="smtp.gmail.com", env="MAIL_SERVER")
+    mail_port: int = Field(default=587, env="MAIL_PORT")
+    mail_username: Optional[str] = Field(default=None, env="MAIL_USERNAME")
+    mail_password: Optional[str] = Field(default=None, env="MAIL_PASSWORD")
+    mail_from: str = Field(default="test@example.com", env="MAIL_FROM")
+    mail_from_name: str = Field(default="TRENDY App", env="MAIL_FROM_NAME")
+    mail_starttls: bool = Field(default=True, env="MAIL_STARTTLS")
+    mail_ssl_tls: bool = Field(default=False, env="MAIL_SSL_TLS")
+    email_verification_url: str = Field(default="http://localhost:8000/api/v1/auth/email/verify", env="EMAIL_VERIFICATION_URL")
+    password_reset_url: str = Field(default="http://localhost:3000/reset-password", env="PASSWORD_RESET_URL")
+    email_verification_token_hours: float = Field(default=24.0, env="EMAIL_VERIFICATION_TOKEN_HOURS")
+    password_reset_token_minutes: float = Field(default=60.0, env="PASSWORD_RESET_TOKEN_MINUTES")
+    email_token_resend_seconds: float = Field(default=60.0, env="EMAIL_TOKEN_RESEND_SECONDS")
+    email_token_purge_interval_seconds: float = Field(default=300.0, env="EMAIL_TOKEN_PURGE_INTERVAL_SECONDS")
+    email_batch_size: int = Field(default=50, env="EMAIL_BATCH_SIZE")
+    email_rate_per_second: float = Field(default=10.0, env="EMAIL_RATE_PER_SECOND")
+    email_max_attempts: int = Field(default=6, env="EMAIL_MAX_ATTEMPTS")
+    email_retry_base_seconds: float = Field(default=30.0, env="EMAIL_RETRY_BASE_SECONDS")
+    email_retry_max_seconds: float = Field(default=3600.0, env="EMAIL_RETRY_MAX_SECONDS")
+    email_lease_seconds: float = Field(default=300.0, env="EMAIL_LEASE_SECONDS")
+    email_worker_interval_seconds: float = Field(default=2.0, env="EMAIL_WORKER_INTERVAL_SECONDS")
+    
+    # Subscription entitlements
+    entitlement_cache_users: int = Field(default=100000, env="ENTITLEMENT_CACHE_USERS")
+    entitlement_cache_ttl_seconds: float = Field(default=300.0, env="ENTITLEMENT_CACHE_TTL_SECONDS")
+    
+    # Creator token ledger
+    ledger_dir: str = Field(default="./data/ledger", env="LEDGER_DIR")
+    ledger_fsync: bool = Field(default=True, env="LEDGER_FSYNC")
+    
+    # Block/mute visibility filter
+    visibility_cache_users: int = Field(default=50000, env="VISIBILITY_CACHE_USERS")
+    visibility_cache_ttl_seconds: float = Field(default=30.0, env="VISIBILITY_CACHE_TTL_SECONDS")
+    visibility_bloom_capacity: int = Field(default=1000000, env="VISIBILITY_BLOOM_CAPACITY")
+    visibility_bloom_error_rate: float = Field(default=0.01, env="VISIBILITY_BLOOM_ERROR_RATE")
+    visibility_refresh_interval_seconds: float = Field(default=30.0, env="VISIBILITY_REFRESH_INTERVAL_SECONDS")
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -0,0 +1,369 @@
+"""
+Creator token ledger for TRENDY App
+An append-only log in three files: accounts (length-prefixed ids, the line
+number is the account index), transactions (fixed-size records, so record n
+lives at n * TX.size) and blocks. A block record carries the Merkle root of
+its transactions and its own hash, both computed once when the block is
+sealed, and is written last: a batch whose block record is missing was never
+committed and is truncated on open.
+
+Balances (int64 micro-units per account) and per-account transaction indexes
+(ascending sequence numbers) are kept in arrays and updated as blocks are
+appended, so a balance read is an array lookup and a history page is a
+bisect plus one positioned read per row. Other processes' appends are picked
+up by reading the log past the last offset seen, under a shared flock;
+writers hold it exclusively.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows; run a single worker there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_ACCOUNT = "system"  # mints tokens; the only account allowed to go negative
+UNITS = 1000000  # amounts are stored as integer micro-units
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1  # balances and amounts are int64 ("q")
+KINDS = {"token_creation": 1, "token_transfer": 2}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+ACCOUNT = struct.Struct("<H")
+TX = struct.Struct("<QIIqdBI")  # seq, sender, receiver, amount, timestamp, kind, block
+BLOCK_HEADER = struct.Struct("<IQId32s32s")  # index, first_seq, count, timestamp, previous_hash, merkle_root
+BLOCK = struct.Struct(BLOCK_HEADER.format + "32s")  # header + sha256(header)
+
+READ_CHUNK = 65536  # records per read while replaying the log
+
+
+class InsufficientFunds(ValueError):
+    pass
+
+
+class LedgerEntry(NamedTuple):
+    seq: int
+    sender: str
+    receiver: str
+    amount: float
+    timestamp: float
+    type: str
+    block: int
+
+
+class LedgerBlock(NamedTuple):
+    index: int
+    first_seq: int
+    count: int
+    timestamp: float
+    previous_hash: str
+    merkle_root: str
+    hash: str
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Pairwise SHA-256 up to a single root; an odd node is paired with itself"""
+    if not leaves:
+        return bytes(32)
+    level = leaves
+    while len(level) > 1:
+        if len(level) % 2:
+            level = level + [level[-1]]
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def to_units(amount: float) -> int:
+    if not math.isfinite(amount):
+        raise ValueError("Amount must be a finite number")
+    units = int(round(amount * UNITS))
+    if not INT64_MIN <= units <= INT64_MAX:
+        raise ValueError(f"Amount {amount} is out of range")
+    return units
+
+
+class Ledger:
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._fds: Dict[str, int] = {}
+        self._reset()
+
+    def _reset(self):
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._balances = array("q")
+        self._history: List[array] = []
+        self._offsets = {"accounts": 0, "transactions": 0, "blocks": 0}
+        self._tx_count = 0
+        self._block_count = 0
+        self._last_hash = bytes(32)
+        self._loaded = False
+
+    # Files
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name in ("accounts", "transactions", "blocks"):
+            if name not in self._fds:
+                path = os.path.join(self.directory, f"{name}.log")
+                self._fds[name] = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        with self._flock(exclusive=True):
+            self._catch_up()
+            self._recover()
+        self._loaded = True
+
+    def _size(self, name: str) -> int:
+        return os.fstat(self._fds[name]).st_size
+
+    @contextmanager
+    def _flock(self, exclusive: bool = False):
+        if fcntl is None:
+            yield
+            return
+        fd = self._fds["blocks"]
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _recover(self):
+        """Cut torn records and transactions of batches whose block was never written; needs the exclusive lock"""
+        for name, end in (("accounts", self._offsets["accounts"]), ("transactions", self._tx_count * TX.size),
+                          ("blocks", self._offsets["blocks"])):
+            if self._size(name) > end:
+                logger.warning(f"Ledger: truncating {self._size(name) - end} uncommitted bytes from {name}.log")
+                os.ftruncate(self._fds[name], end)
+
+    def _catch_up(self):
+        """Apply everything appended to the log since the last read"""
+        fds = self._fds
+        size = self._size("accounts")
+        if size > self._offsets["accounts"]:
+            data = os.pread(fds["accounts"], size - self._offsets["accounts"], self._offsets["accounts"])
+            pos = 0
+            while pos + ACCOUNT.size <= len(data):
+                (length,) = ACCOUNT.unpack_from(data, pos)
+                if pos + ACCOUNT.size + length > len(data):
+                    break  # torn record from a crashed writer; never referenced by a committed block
+                self._add_account(data[pos + ACCOUNT.size:pos + ACCOUNT.size + length].decode("utf-8"))
+                pos += ACCOUNT.size + length
+            self._offsets["accounts"] += pos
+
+        size = self._size("blocks") - self._size("blocks") % BLOCK.size
+        if size <= self._offsets["blocks"]:
+            return
+        data = os.pread(fds["blocks"], size - self._offsets["blocks"], self._offsets["blocks"])
+        for index, first_seq, count, _, previous_hash, _, block_hash in BLOCK.iter_unpack(data):
+            if previous_hash != self._last_hash:
+                raise ValueError(f"Ledger block {index} does not link to block {index - 1}")
+            self._last_hash = block_hash
+            self._block_count = index
+        self._offsets["blocks"] = size
+
+        committed = first_seq + count
+        while self._tx_count < committed:
+            batch = min(READ_CHUNK, committed - self._tx_count)
+            self._apply(os.pread(fds["transactions"], batch * TX.size, self._tx_count * TX.size))
+        self._offsets["transactions"] = self._tx_count * TX.size
+
+    def _add_account(self, name: str) -> int:
+        index = len(self._names)
+        self._names.append(name)
+        self._ids[name] = index
+        self._balances.append(0)
+        self._history.append(array("I"))
+        return index
+
+    def _apply(self, records: bytes):
+        balances, history = self._balances, self._history
+        count = 0
+        for seq, sender, receiver, amount, _, _, _ in TX.iter_unpack(records):
+            balances[sender] -= amount
+            balances[receiver] += amount
+            history[sender].append(seq)
+            if receiver != sender:
+                history[receiver].append(seq)
+            count += 1
+        self._tx_count += count
+
+    @contextmanager
+    def _reading(self):
+        with self._lock:
+            if not self._loaded:
+                self._open()
+            else:
+                with self._flock():
+                    self._catch_up()
+            yield
+
+    # Writes
+
+    def commit(self, transfers: Iterable[Tuple[str, str, float, str]]) -> LedgerBlock:
+        """Append (sender, receiver, amount, type) transfers as one block; all or nothing"""
+        transfers = list(transfers)
+        if not transfers:
+            raise ValueError("A block needs at least one transaction")
+        with self._lock:
+            if not self._loaded:
+                self._open()
+            with self._flock(exclusive=True):
+                self._catch_up()
+                self._recover()
+                return self._append_block(transfers)
+
+    def _append_block(self, transfers: List[Tuple[str, str, float, str]]) -> LedgerBlock:
+        new_accounts: List[str] = []
+        ids: Dict[str, int] = {}
+        pending: Dict[int, int] = {}
+        rows = []
+        for sender, receiver, amount, kind in transfers:
+            if kind not in KINDS:
+                raise ValueError(f"Unknown transaction type {kind}")
+            units = to_units(amount)
+            if units <= 0:
+                raise ValueError("Amount must be positive")
+            endpoints = []
+            for name in (sender, receiver):
+                index = self._ids.get(name, ids.get(name))
+                if index is None:
+                    index = ids[name] = len(self._names) + len(new_accounts)
+                    new_accounts.append(name)
+                endpoints.append(index)
+            sender_id, receiver_id = endpoints
+            if sender != SYSTEM_ACCOUNT:
+                available = (self._balances[sender_id] if sender_id < len(self._balances) else 0) + pending.get(sender_id, 0)
+                if available < units:
+                    raise InsufficientFunds(f"{sender} has {available / UNITS} tokens, needs {units / UNITS}")
+            pending[sender_id] = pending.get(sender_id, 0) - units
+            pending[receiver_id] = pending.get(receiver_id, 0) + units
+            rows.append((sender_id, receiver_id, units, KINDS[kind]))
+        # Checked before anything is written: a block that overflows a balance could never be replayed
+        for account_id, delta in pending.items():
+            current = self._balances[account_id] if account_id < len(self._balances) else 0
+            if not INT64_MIN <= current + delta <= INT64_MAX:
+                name = self._names[account_id] if account_id < len(self._names) else new_accounts[account_id - len(self._names)]
+                raise ValueError(f"Balance of {name} would overflow")
+
+        index = self._block_count + 1
+        first_seq = self._tx_count
+        now = time.time()
+        records = [
+            TX.pack(first_seq + i, sender_id, receiver_id, units, now, kind, index)
+            for i, (sender_id, receiver_id, units, kind) in enumerate(rows)
+        ]
+        root = merkle_root([hashlib.sha256(record).digest() for record in records])
+        header = BLOCK_HEADER.pack(index, first_seq, len(records), now, self._last_hash, root)
+        block_hash = hashlib.sha256(header).digest()
+
+        try:
+            if new_accounts:
+                encoded = [name.encode("utf-8") for name in new_accounts]
+                self._write("accounts", b"".join(ACCOUNT.pack(len(name)) + name for name in encoded))
+                for name in new_accounts:
+                    self._add_account(name)
+                self._offsets["accounts"] = self._size("accounts")
+            tx_bytes = b"".join(records)
+            self._write("transactions", tx_bytes)
+            self._write("blocks", header + block_hash)
+
+            self._apply(tx_bytes)
+        except Exception:
+            # Rebuild from disk on the next call rather than trust half-applied state
+            self._reset()
+            raise
+        self._offsets["transactions"] = self._tx_count * TX.size
+        self._offsets["blocks"] = index * BLOCK.size
+        previous_hash, self._last_hash, self._block_count = self._last_hash, block_hash, index
+        return LedgerBlock(index, first_seq, len(records), now, previous_hash.hex(), root.hex(), block_hash.hex())
+
+    def _write(self, name: str, data: bytes):
+        fd = self._fds[name]
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if self.fsync:
+            os.fsync(fd)
+
+    # Reads
+
+    def balance(self, account: str) -> float:
+        with self._reading():
+            index = self._ids.get(account)
+            return self._balances[index] / UNITS if index is not None else 0.0
+
+    def _entry(self, record: bytes) -> LedgerEntry:
+        seq, sender, receiver, amount, timestamp, kind, block = TX.unpack(record)
+        return LedgerEntry(seq, self._names[sender], self._names[receiver], amount / UNITS, timestamp,
+                           KIND_NAMES[kind], block)
+
+    def history(self, account: str, cursor: Optional[int] = None,
+                limit: int = 50) -> Tuple[List[LedgerEntry], Optional[int]]:
+        """Newest-first page of the account's transactions before cursor, and the cursor for the next page"""
+        with self._reading():
+            index = self._ids.get(account)
+            if index is None:
+                return [], None
+            seqs = self._history[index]
+            end = bisect_left(seqs, cursor) if cursor is not None else len(seqs)
+            start = max(0, end - limit)
+            fd = self._fds["transactions"]
+            entries = [self._entry(os.pread(fd, TX.size, seqs[i] * TX.size)) for i in range(end - 1, start - 1, -1)]
+            return entries, (seqs[start] if start > 0 else None)
+
+    def transaction(self, seq: int) -> Optional[LedgerEntry]:
+        with self._reading():
+            if not 0 <= seq < self._tx_count:
+                return None
+            return self._entry(os.pread(self._fds["transactions"], TX.size, seq * TX.size))
+
+    def blocks(self, start: int = 1, limit: int = 100) -> List[LedgerBlock]:
+        """Blocks from index start, oldest first"""
+        with self._reading():
+            return [
+                LedgerBlock(index, first_seq, count, timestamp, previous.hex(), root.hex(), block_hash.hex())
+                for index, first_seq, count, timestamp, previous, root, block_hash in self._raw_blocks(max(1, start), limit)
+            ]
+
+    def stats(self) -> Dict[str, int]:
+        with self._reading():
+            return {"accounts": len(self._names), "transactions": self._tx_count, "blocks": self._block_count}
+
+    def verify(self) -> int:
+        """Recompute every Merkle root and block hash from the log; returns the number of blocks checked"""
+        with self._reading():
+            previous = bytes(32)
+            for start in range(1, self._block_count + 1, READ_CHUNK):
+                for block in self._raw_blocks(start, READ_CHUNK):
+                    index, first_seq, count, timestamp, previous_hash, root, block_hash = block
+                    records = os.pread(self._fds["transactions"], count * TX.size, first_seq * TX.size)
+                    leaves = [hashlib.sha256(records[i:i + TX.size]).digest() for i in range(0, len(records), TX.size)]
+                    header = BLOCK_HEADER.pack(index, first_seq, count, timestamp, previous_hash, root)
+                    if previous_hash != previous or merkle_root(leaves) != root or hashlib.sha256(header).digest() != block_hash:
+                        raise ValueError(f"Ledger block {index} failed verification")
+                    previous = block_hash
+            return self._block_count
+
+    def _raw_blocks(self, start: int, limit: int):
+        count = max(0, min(limit, self._block_count - start + 1))
+        return BLOCK.iter_unpack(os.pread(self._fds["blocks"], count * BLOCK.size, (start - 1) * BLOCK.size))
+
+    def close(self):
+        with self._lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+            self._reset()
@@ -0,0 +1,201 @@
+"""
+Per-request SQL instrumentation for TRENDY App
+Counts queries per request, flags N+1 patterns and logs slow queries.
+Intended for development and staging; enabled via QUERY_PROFILER_ENABLED.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request or block issues more queries than its budget."""
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so repeated shapes collapse to one key."""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("IN (...)", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+class RequestQueryProfile:
+    """Query statistics collected for a single request (or budget block)"""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.query_count = 0
+        self.total_time_ms = 0.0
+        self.fingerprints: Counter = Counter()
+        self.slow_queries: List[Dict[str, object]] = []
+
+    def record(self, statement: str, duration_ms: float, slow_query_ms: float):
+        self.query_count += 1
+        self.total_time_ms += duration_ms
+        self.fingerprints[fingerprint(statement)] += 1
+        if duration_ms >= slow_query_ms:
+            self.slow_queries.append({"statement": statement, "duration_ms": round(duration_ms, 2)})
+
+    def repeated_statements(self, threshold: int) -> Dict[str, int]:
+        """Return fingerprints executed at least `threshold` times (likely N+1)."""
+        return {fp: count for fp, count in self.fingerprints.items() if count >= threshold}
+
+    def summary(self, n_plus_one_threshold: int) -> Dict[str, object]:
+        return {
+            "route": self.route,
+            "query_count": self.query_count,
+            "total_time_ms": round(self.total_time_ms, 2),
+            "repeated_statements": self.repeated_statements(n_plus_one_threshold),
+            "slow_queries": self.slow_queries,
+        }
+
+
+_current_profile: ContextVar[Optional[RequestQueryProfile]] = ContextVar("query_profile", default=None)
+
+
+class QueryProfiler:
+    """Hooks SQLAlchemy cursor events and attributes queries to the active request"""
+
+    def __init__(
+        self,
+        slow_query_ms: float = 100.0,
+        n_plus_one_threshold: int = 5,
+        route_budgets: Optional[Dict[str, int]] = None,
+        fail_on_budget: bool = False,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.route_budgets = dict(route_budgets or {})
+        self.fail_on_budget = fail_on_budget
+        self._engines: List[Engine] = []
+
+    def install(self, engine: Engine):
+        """Attach cursor listeners to an engine (idempotent)."""
+        if engine in self._engines:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.append(engine)
+
+    def uninstall(self):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_time"].pop()
+        duration_ms = (time.perf_counter() - started) * 1000
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, duration_ms, self.slow_query_ms)
+        if duration_ms >= self.slow_query_ms:
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s",
+                duration_ms,
+                profile.route if profile else "<no request>",
+                statement,
+            )
+
+    @contextmanager
+    def profile(self, route: str):
+        """Collect queries issued inside the block under `route`."""
+        profile = RequestQueryProfile(route)
+        token = _current_profile.set(profile)
+        try:
+            yield profile
+        finally:
+            _current_profile.reset(token)
+            self.report(profile)
+
+    def report(self, profile: RequestQueryProfile):
+        repeated = profile.repeated_statements(self.n_plus_one_threshold)
+        for statement, count in repeated.items():
+            logger.warning("Possible N+1 on %s: %d x %s", profile.route, count, statement)
+
+        budget = self.route_budgets.get(profile.route)
+        if budget is not None and profile.query_count > budget:
+            message = f"{profile.route} issued {profile.query_count} queries (budget {budget})"
+            if self.fail_on_budget:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware that opens a query profile for each HTTP request"""
+
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {scope['path']}"
+        profile = RequestQueryProfile(route)
+        token = _current_profile.set(profile)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(profile.query_count).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_profile.reset(token)
+            # Resolve the templated route path so budgets key on "GET /users/{user_id}"
+            endpoint_route = scope.get("route")
+            if endpoint_route is not None and hasattr(endpoint_route, "path"):
+                profile.route = f"{scope['method']} {endpoint_route.path}"
+            self.profiler.report(profile)
+
+
+@contextmanager
+def assert_max_queries(profiler: QueryProfiler, max_queries: int, label: str = "block"):
+    """Test helper: fail when the wrapped block issues more than `max_queries` queries."""
+    with profiler.profile(label) as profile:
+        yield profile
+    if profile.query_count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label} issued {profile.query_count} queries (budget {max_queries}): "
+            f"{profile.summary(profiler.n_plus_one_threshold)['repeated_statements']}"
+        )
+
+
+def setup_query_profiler(app, engine: Engine, settings) -> Optional[QueryProfiler]:
+    """Install the profiler on `engine` and `app` when enabled in settings."""
+    if not settings.query_profiler_enabled:
+        return None
+    profiler = QueryProfiler(
+        slow_query_ms=settings.slow_query_ms,
+        n_plus_one_threshold=settings.n_plus_one_threshold,
+        route_budgets=settings.query_budgets,
+        fail_on_budget=settings.query_budget_strict,
+    )
+    profiler.install(engine)
+    app.add_middleware(QueryProfilerMiddleware, profiler=profiler)
+    return profiler
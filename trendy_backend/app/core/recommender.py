@@ -1,84 +1,454 @@
-from typing import List, Dict, Any, Optional
+"""
+Recommendation engine for TRENDY App
+Interactions are interned into dense indices and compiled into CSR user-item
+matrices per content type. An offline build precomputes the top-N item-item
+neighbors, so serving a request is a few vectorized NumPy operations over the
+user's most recent items followed by an argpartition top-K.
+"""
+
+from typing import List, Dict, Any, Iterable, NamedTuple, Optional, Tuple
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
 import numpy as np
-from datetime import datetime, timedelta
-import json
+
+from app.core.config import get_settings
+from app.core.vector_index import ExactIndex, IVFIndex, VectorIndex
+
+logger = logging.getLogger(__name__)
+
+# SciPy sparse speeds up the offline similarity build; dense NumPy blocks are the fallback
+try:
+    import scipy.sparse as sp
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+EMPTY_INDICES = np.empty(0, dtype=np.int64)
+EMPTY_WEIGHTS = np.empty(0, dtype=np.float32)
+
+
+class IdMap:
+    """Interns external ids as dense indices 0..n-1"""
+
+    __slots__ = ("index", "ids")
+
+    def __init__(self, ids: Iterable[str] = ()):
+        self.index: Dict[str, int] = {}
+        self.ids: List[str] = []
+        for external_id in ids:
+            self.intern(external_id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def intern(self, external_id: str) -> int:
+        idx = self.index.get(external_id)
+        if idx is None:
+            idx = len(self.ids)
+            self.index[external_id] = idx
+            self.ids.append(external_id)
+        return idx
+
+    def get(self, external_id: str) -> Optional[int]:
+        return self.index.get(external_id)
+
+
+class CSRMatrix(NamedTuple):
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    shape: Tuple[int, int]
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def to_scipy(self):
+        return sp.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def to_dense(self) -> np.ndarray:
+        dense = np.zeros(self.shape, dtype=np.float32)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+
+class UserProfile:
+    """Bounded per-user state: the most recent item weights and the strongest metadata preferences"""
+
+    __slots__ = ("items", "preferences", "last_updated", "max_items", "max_preferences", "_arrays")
+
+    def __init__(self, max_items: int, max_preferences: int):
+        self.items: "OrderedDict[int, float]" = OrderedDict()
+        self.preferences: Dict[str, float] = {}
+        self.last_updated = datetime.now()
+        self.max_items = max_items
+        self.max_preferences = max_preferences
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def add_item(self, item: int, weight: float):
+        # Re-inserting moves the item to the most recent end; the oldest falls off
+        self.items[item] = self.items.pop(item, 0.0) + weight
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+        self._arrays = None
+        self.last_updated = datetime.now()
+
+    def add_preference(self, key: str, weight: float):
+        self.preferences[key] = self.preferences.get(key, 0.0) + weight
+        if len(self.preferences) > self.max_preferences:
+            del self.preferences[min(self.preferences, key=self.preferences.get)]
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(item indices, weights) in recency order, cached until the next update"""
+        if self._arrays is None:
+            count = len(self.items)
+            self._arrays = (
+                np.fromiter(self.items.keys(), dtype=np.int64, count=count),
+                np.fromiter(self.items.values(), dtype=np.float32, count=count),
+            )
+        return self._arrays
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, best first"""
+    if k <= 0 or not len(scores):
+        return EMPTY_INDICES
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class ContentSpace:
+    """Users, items and the precomputed neighbor table for one content type"""
+
+    def __init__(self, max_items: int, max_preferences: int):
+        self.max_items = max_items
+        self.max_preferences = max_preferences
+        self.items = IdMap()
+        self.users = IdMap()
+        self.profiles: List[UserProfile] = []
+        # Fixed-width top-N neighbor table, -1 padded; rows exist for items seen at build time
+        self.neighbors = np.empty((0, 0), dtype=np.int32)
+        self.similarities = np.empty((0, 0), dtype=np.float32)
+        self.popular = EMPTY_INDICES
+        self.popular_scores = EMPTY_WEIGHTS
+        self.built_at: Optional[datetime] = None
+
+    def profile(self, user_id: str, create: bool = False) -> Optional[UserProfile]:
+        idx = self.users.intern(user_id) if create else self.users.get(user_id)
+        if idx is None:
+            return None
+        if idx == len(self.profiles):
+            self.profiles.append(UserProfile(self.max_items, self.max_preferences))
+        return self.profiles[idx]
+
+    def interaction_matrix(self) -> CSRMatrix:
+        """CSR users x items built from the bounded profiles"""
+        rows = [profile.arrays() for profile in self.profiles]
+        lengths = np.fromiter((len(items) for items, _ in rows), dtype=np.int64, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate([items for items, _ in rows]) if rows else EMPTY_INDICES
+        data = np.concatenate([weights for _, weights in rows]) if rows else EMPTY_WEIGHTS
+        return CSRMatrix(indptr, indices, data, (len(self.users), len(self.items)))
+
+    def build(self, neighbors: int, block_size: int = 1024) -> Dict[str, int]:
+        """Precompute top-N cosine neighbors for every item from positive interactions"""
+        matrix = self.interaction_matrix()
+        n_items = matrix.shape[1]
+        data = np.clip(matrix.data, 0, None).astype(np.float32)
+
+        popularity = np.bincount(matrix.indices, weights=data, minlength=n_items).astype(np.float32)
+        norms = np.sqrt(np.bincount(matrix.indices, weights=data ** 2, minlength=n_items)).astype(np.float32)
+        safe_norms = np.where(norms > 0, norms, 1.0)
+        normalized = CSRMatrix(matrix.indptr, matrix.indices, data / safe_norms[matrix.indices], matrix.shape)
+
+        width = min(neighbors, max(n_items - 1, 0))
+        neighbor_table = np.full((n_items, width), -1, dtype=np.int32)
+        similarity_table = np.zeros((n_items, width), dtype=np.float32)
+        if width and normalized.nnz:
+            if SCIPY_AVAILABLE:
+                self._build_sparse(normalized, neighbor_table, similarity_table, block_size)
+            else:
+                self._build_dense(normalized, neighbor_table, similarity_table, block_size)
+
+        popular = _top_k(popularity, min(n_items, 1000))
+        popular = popular[popularity[popular] > 0]
+
+        # Swap in one step so concurrent readers never see a half-built table
+        self.neighbors, self.similarities = neighbor_table, similarity_table
+        self.popular, self.popular_scores = popular, popularity[popular]
+        self.built_at = datetime.now()
+        return {"users": matrix.shape[0], "items": n_items, "interactions": matrix.nnz, "neighbors": width}
+
+    @staticmethod
+    def _build_sparse(normalized: CSRMatrix, neighbor_table: np.ndarray, similarity_table: np.ndarray, block_size: int):
+        x = normalized.to_scipy()
+        xt = x.T.tocsr()
+        width = neighbor_table.shape[1]
+        for start in range(0, x.shape[1], block_size):
+            block = (xt[start:start + block_size] @ x).tocsr()
+            for offset in range(block.shape[0]):
+                row = start + offset
+                lo, hi = block.indptr[offset], block.indptr[offset + 1]
+                cols, sims = block.indices[lo:hi], block.data[lo:hi]
+                keep = cols != row
+                cols, sims = cols[keep], sims[keep]
+                top = _top_k(sims, width)
+                top = top[sims[top] > 0]
+                neighbor_table[row, :len(top)] = cols[top]
+                similarity_table[row, :len(top)] = sims[top]
+
+    @staticmethod
+    def _build_dense(normalized: CSRMatrix, neighbor_table: np.ndarray, similarity_table: np.ndarray, block_size: int):
+        n_users, n_items = normalized.shape
+        if n_users * n_items > 50_000_000:
+            logger.warning("Building %dx%d recommender without SciPy; install scipy for large catalogs", n_users, n_items)
+        dense = normalized.to_dense()
+        width = neighbor_table.shape[1]
+        for start in range(0, n_items, block_size):
+            block = dense[:, start:start + block_size].T @ dense
+            rows = np.arange(block.shape[0])
+            block[rows, start + rows] = 0.0
+            top = np.argpartition(-block, width - 1, axis=1)[:, :width]
+            sims = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-sims, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            sims = np.take_along_axis(sims, order, axis=1)
+            top[sims <= 0] = -1
+            sims[sims <= 0] = 0.0
+            neighbor_table[start:start + block.shape[0]] = top
+            similarity_table[start:start + block.shape[0]] = sims
+
+    def seen_items(self, user_id: str) -> np.ndarray:
+        profile = self.profile(user_id)
+        return profile.arrays()[0] if profile is not None else EMPTY_INDICES
+
+    def score(self, user_id: str, limit: int, recent_items: int, fill_popular: bool = True) -> List[Tuple[str, float]]:
+        """Item-item scores for the user's most recent items, optionally topped up with popular items"""
+        neighbor_table, similarity_table = self.neighbors, self.similarities
+        profile = self.profile(user_id)
+        seen, _ = profile.arrays() if profile is not None else (EMPTY_INDICES, EMPTY_WEIGHTS)
+
+        results: List[Tuple[str, float]] = []
+        if len(seen) and neighbor_table.shape[1]:
+            items, weights = profile.arrays()
+            items, weights = items[-recent_items:], weights[-recent_items:]
+            usable = (items < len(neighbor_table)) & (weights > 0)
+            items, weights = items[usable], weights[usable]
+            candidates = neighbor_table[items].ravel()
+            contributions = (similarity_table[items] * weights[:, None]).ravel()
+            valid = candidates >= 0
+            candidates, contributions = candidates[valid], contributions[valid]
+            if len(candidates):
+                unique, inverse = np.unique(candidates, return_inverse=True)
+                scores = np.bincount(inverse, weights=contributions)
+                fresh = ~np.isin(unique, seen, assume_unique=True)
+                unique, scores = unique[fresh], scores[fresh]
+                top = _top_k(scores, limit)
+                results = [(self.items.ids[unique[i]], float(scores[i])) for i in top]
+
+        if fill_popular:
+            self.fill_popular(results, seen, limit)
+        return results
+
+    def fill_popular(self, results: List[Tuple[str, float]], seen: np.ndarray, limit: int):
+        """Append popular items the user has not seen until results holds limit entries"""
+        popular, popular_scores = self.popular, self.popular_scores
+        if len(results) >= limit or not len(popular):
+            return
+        taken = {item_id for item_id, _ in results}
+        fresh = ~np.isin(popular, seen)
+        for idx, score in zip(popular[fresh], popular_scores[fresh]):
+            item_id = self.items.ids[idx]
+            if item_id not in taken:
+                results.append((item_id, float(score)))
+                if len(results) == limit:
+                    break
+
+    def export(self) -> Dict[str, np.ndarray]:
+        return {
+            "item_ids": np.array(self.items.ids, dtype=str),
+            "neighbors": self.neighbors,
+            "similarities": self.similarities,
+            "popular": self.popular,
+            "popular_scores": self.popular_scores,
+        }
+
+    def restore(self, arrays: Dict[str, np.ndarray]):
+        """Adopt a prebuilt table, remapping its item indices onto this space's interned ids"""
+        mapping = np.fromiter((self.items.intern(str(i)) for i in arrays["item_ids"]), dtype=np.int64,
+                              count=len(arrays["item_ids"]))
+        saved_neighbors = arrays["neighbors"]
+        neighbor_table = np.full((len(self.items), saved_neighbors.shape[1]), -1, dtype=np.int32)
+        similarity_table = np.zeros(neighbor_table.shape, dtype=np.float32)
+        neighbor_table[mapping] = np.where(saved_neighbors >= 0, mapping[saved_neighbors], -1)
+        similarity_table[mapping] = arrays["similarities"]
+        self.neighbors, self.similarities = neighbor_table, similarity_table
+        self.popular, self.popular_scores = mapping[arrays["popular"]], arrays["popular_scores"]
+        self.built_at = datetime.now()
+
 
 class TrendyRecommender:
     """AI-based recommendation engine for music, movies, and shopping"""
-    
-    def __init__(self):
-        self.user_profiles = {}
-        self.content_vectors = {}
+
+    def __init__(self, neighbors: int = 50, max_items_per_user: int = 200, max_preferences_per_user: int = 50,
+                 recent_items: int = 50, index_path: Optional[str] = None, vector_dir: Optional[str] = None,
+                 ann_min_items: int = 10000, ann_nprobe: int = 8):
+        self.neighbors = neighbors
+        self.max_items_per_user = max_items_per_user
+        self.max_preferences_per_user = max_preferences_per_user
+        self.recent_items = recent_items
+        self.index_path = index_path
+        self.vector_dir = vector_dir
+        self.ann_min_items = ann_min_items
+        self.ann_nprobe = ann_nprobe
+        self.spaces: Dict[str, ContentSpace] = {}
+        # Embedding index per content type (exact below ann_min_items, IVF above)
+        self.content_vectors: Dict[str, VectorIndex] = {}
         self.interaction_weights = {
             'like': 1.0,
             'play': 0.8,
             'skip': -0.5,
             'complete': 1.5,
             'share': 2.0,
-            'save': 1.2
+            'save': 1.2,
+            'comment': 1.0
         }
-    
+        self._lock = threading.Lock()
+        self._index_loaded = False
+
+    def _space(self, content_type: str) -> ContentSpace:
+        space = self.spaces.get(content_type)
+        if space is None:
+            with self._lock:
+                space = self.spaces.setdefault(
+                    content_type, ContentSpace(self.max_items_per_user, self.max_preferences_per_user)
+                )
+        return space
+
     def update_user_profile(self, user_id: str, interaction_data: Dict[str, Any]):
-        """Update user profile based on interactions"""
-        if user_id not in self.user_profiles:
-            self.user_profiles[user_id] = {
-                'preferences': {},
-                'interaction_history': [],
-                'last_updated': datetime.now()
-            }
-        
-        # Update interaction history
-        self.user_profiles[user_id]['interaction_history'].append({
-            'content_id': interaction_data.get('content_id'),
-            'content_type': interaction_data.get('content_type'),
-            'action': interaction_data.get('action'),
-            'timestamp': datetime.now(),
-            'metadata': interaction_data.get('metadata', {})
-        })
-        
-        # Update preferences based on interaction
-        self._update_preferences(user_id, interaction_data)
-    
-    def _update_preferences(self, user_id: str, interaction_data: Dict[str, Any]):
-        """Update user preferences based on interaction"""
+        """Fold one interaction into the user's bounded profile; visible to the next request"""
         content_type = interaction_data.get('content_type')
         action = interaction_data.get('action')
         metadata = interaction_data.get('metadata', {})
-        
-        if content_type not in self.user_profiles[user_id]['preferences']:
-            self.user_profiles[user_id]['preferences'][content_type] = {}
-        
-        # Update genre preferences
+        weight = self.interaction_weights.get(action, 0.5)
+
+        space = self._space(content_type)
+        profile = space.profile(str(user_id), create=True)
+        content_id = interaction_data.get('content_id')
+        if content_id is not None:
+            profile.add_item(space.items.intern(str(content_id)), weight)
+
+        # Genre and artist/brand preferences
         if 'genre' in metadata:
-            genre = metadata['genre']
-            weight = self.interaction_weights.get(action, 0.5)
-            if genre not in self.user_profiles[user_id]['preferences'][content_type]:
-                self.user_profiles[user_id]['preferences'][content_type][genre] = 0
-            self.user_profiles[user_id]['preferences'][content_type][genre] += weight
-        
-        # Update artist/brand preferences
+            profile.add_preference(metadata['genre'], weight)
         if 'artist' in metadata or 'brand' in metadata:
-            key = metadata.get('artist') or metadata.get('brand')
-            weight = self.interaction_weights.get(action, 0.5)
-            if key not in self.user_profiles[user_id]['preferences'][content_type]:
-                self.user_profiles[user_id]['preferences'][content_type][key] = 0
-            self.user_profiles[user_id]['preferences'][content_type][key] += weight
-    
+            profile.add_preference(metadata.get('artist') or metadata.get('brand'), weight)
+
+    def load_interactions(self, interactions: Iterable[Tuple[str, str, str, str]]) -> int:
+        """Bulk-load (user_id, content_type, content_id, action) tuples"""
+        count = 0
+        for user_id, content_type, content_id, action in interactions:
+            space = self._space(content_type)
+            space.profile(str(user_id), create=True).add_item(
+                space.items.intern(str(content_id)), self.interaction_weights.get(action, 0.5)
+            )
+            count += 1
+        return count
+
+    def get_user_preferences(self, user_id: str, content_type: str) -> Dict[str, float]:
+        space = self.spaces.get(content_type)
+        profile = space.profile(str(user_id)) if space else None
+        return dict(profile.preferences) if profile else {}
+
+    def build(self, content_types: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Offline step: rebuild item-item neighbor tables from current interactions"""
+        return {
+            content_type: self._space(content_type).build(self.neighbors)
+            for content_type in (content_types or list(self.spaces))
+        }
+
+    def save(self, path: str):
+        arrays = {}
+        for content_type, space in self.spaces.items():
+            for name, array in space.export().items():
+                arrays[f"{content_type}__{name}"] = array
+        np.savez_compressed(path, **arrays)
+
+    def load(self, path: str):
+        with np.load(path, allow_pickle=False) as archive:
+            grouped: Dict[str, Dict[str, np.ndarray]] = {}
+            for key in archive.files:
+                content_type, name = key.split("__", 1)
+                grouped.setdefault(content_type, {})[name] = archive[key]
+        for content_type, arrays in grouped.items():
+            self._space(content_type).restore(arrays)
+        logger.info("Loaded recommender index for %s from %s", ", ".join(grouped), path)
+
+    def set_content_vectors(self, content_type: str, content_ids: Iterable[str], vectors: np.ndarray,
+                            approximate: Optional[bool] = None) -> VectorIndex:
+        """Index content embeddings; approximate defaults to IVF once the catalog reaches ann_min_items"""
+        content_ids = [str(content_id) for content_id in content_ids]
+        if approximate is None:
+            approximate = len(content_ids) >= self.ann_min_items
+        index = IVFIndex(content_ids, vectors, nprobe=self.ann_nprobe) if approximate else ExactIndex(content_ids, vectors)
+        self.content_vectors[content_type] = index
+        return index
+
+    def save_content_vectors(self, path: str):
+        """One memory-mappable index directory per content type"""
+        for content_type, index in self.content_vectors.items():
+            index.save(os.path.join(path, content_type))
+
+    def load_content_vectors(self, path: str):
+        for content_type in sorted(os.listdir(path)):
+            if os.path.exists(os.path.join(path, content_type, "meta.json")):
+                self.content_vectors[content_type] = VectorIndex.load(os.path.join(path, content_type))
+        logger.info("Loaded content vectors for %s from %s", ", ".join(self.content_vectors) or "nothing", path)
+
+    def similar_content(self, content_type: str, queries: np.ndarray, k: int = 10) -> List[List[Tuple[str, float]]]:
+        """Batched nearest-neighbor search over one content type's embeddings"""
+        self._ensure_index()
+        index = self.content_vectors.get(content_type)
+        if index is None:
+            return [[] for _ in range(len(queries))]
+        return index.search(queries, k)
+
+    def _ensure_index(self):
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        if self.index_path and os.path.exists(self.index_path):
+            try:
+                self.load(self.index_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Failed to load recommender index: {str(e)}")
+        if self.vector_dir and os.path.isdir(self.vector_dir):
+            try:
+                self.load_content_vectors(self.vector_dir)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Failed to load content vectors: {str(e)}")
+
     def get_recommendations(self, user_id: str, content_type: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get personalized recommendations for a user"""
-        if user_id not in self.user_profiles:
+        self._ensure_index()
+        space = self.spaces.get(content_type)
+        if space is None:
             return self._get_trending_recommendations(content_type, limit)
-        
-        user_prefs = self.user_profiles[user_id]['preferences'].get(content_type, {})
-        if not user_prefs:
+
+        recommendations = space.score(str(user_id), limit, self.recent_items)
+        if not recommendations:
             return self._get_trending_recommendations(content_type, limit)
-        
-        # Calculate similarity scores
-        recommendations = []
-        # This is a simplified version - in production, use collaborative filtering or neural networks
-        
-        return recommendations
-    
+        return [{"id": item_id, "score": score} for item_id, score in recommendations]
+
     def _get_trending_recommendations(self, content_type: str, limit: int) -> List[Dict[str, Any]]:
         """Get trending recommendations when no user profile exists"""
         # Mock trending recommendations
@@ -86,31 +456,97 @@ class TrendyRecommender:
             {"id": f"{content_type}_{i}", "score": 0.8 - (i * 0.1)}
             for i in range(min(limit, 10))
         ]
-    
+
+    def _content_based(self, space: ContentSpace, content_type: str, user_ids: List[str],
+                       k: int) -> Dict[str, List[Tuple[str, float]]]:
+        """One batched embedding search for every user with indexed items in their history"""
+        index = self.content_vectors.get(content_type)
+        if index is None:
+            return {}
+        queries, queried = [], []
+        for user_id in user_ids:
+            profile = space.profile(user_id)
+            if profile is None or not profile.items:
+                continue
+            items, weights = profile.arrays()
+            items, weights = items[-self.recent_items:], weights[-self.recent_items:]
+            present, vectors = index.vectors_for(space.items.ids[i] for i in items)
+            weights = np.clip(weights[present], 0, None)
+            if len(vectors) and weights.any():
+                # Taste vector: interaction-weighted sum of recent item embeddings
+                queries.append(weights @ vectors)
+                queried.append(user_id)
+        if not queries:
+            return {}
+        return dict(zip(queried, index.search(np.vstack(queries), k + self.recent_items)))
+
+    def get_daily_feeds(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """Daily feeds for many users, merging item-item and embedding recommendations"""
+        self._ensure_index()
+        user_ids = [str(user_id) for user_id in user_ids]
+        feeds: Dict[str, Dict[str, List[Dict[str, Any]]]] = {user_id: {} for user_id in user_ids}
+        for section, content_type, limit in (('music', 'music', 5), ('movies', 'movies', 3), ('products', 'shop', 4)):
+            space = self.spaces.get(content_type)
+            if space is None and content_type not in self.content_vectors:
+                for user_id in user_ids:
+                    feeds[user_id][section] = self._get_trending_recommendations(content_type, limit)
+                continue
+            space = space or self._space(content_type)
+            content_hits = self._content_based(space, content_type, user_ids, limit)
+            for user_id in user_ids:
+                seen = space.seen_items(user_id)
+                results = space.score(user_id, limit, self.recent_items, fill_popular=False)
+                if len(results) < limit and user_id in content_hits:
+                    taken = {item_id for item_id, _ in results} | {space.items.ids[i] for i in seen}
+                    for item_id, score in content_hits[user_id]:
+                        if item_id not in taken:
+                            results.append((item_id, score))
+                            taken.add(item_id)
+                            if len(results) == limit:
+                                break
+                space.fill_popular(results, seen, limit)
+                feeds[user_id][section] = (
+                    [{"id": item_id, "score": score} for item_id, score in results]
+                    or self._get_trending_recommendations(content_type, limit)
+                )
+        return feeds
+
     def get_daily_feed(self, user_id: str) -> Dict[str, List[Dict[str, Any]]]:
         """Generate daily personalized feed"""
-        feed = {
-            'music': self.get_recommendations(user_id, 'music', 5),
-            'movies': self.get_recommendations(user_id, 'movies', 3),
-            'products': self.get_recommendations(user_id, 'shop', 4)
-        }
-        return feed
-    
+        return self.get_daily_feeds([user_id])[str(user_id)]
+
     def calculate_similarity(self, user_vector: Dict[str, float], content_vector: Dict[str, float]) -> float:
         """Calculate similarity between user preferences and content"""
-        # Simple cosine similarity implementation
-        common_keys = set(user_vector.keys()) & set(content_vector.keys())
+        common_keys = user_vector.keys() & content_vector.keys()
         if not common_keys:
             return 0.0
-        
-        dot_product = sum(user_vector[k] * content_vector[k] for k in common_keys)
-        user_magnitude = np.sqrt(sum(v**2 for v in user_vector.values()))
-        content_magnitude = np.sqrt(sum(v**2 for v in content_vector.values()))
-        
-        if user_magnitude == 0 or content_magnitude == 0:
+
+        user_values = np.fromiter(user_vector.values(), dtype=np.float64, count=len(user_vector))
+        content_values = np.fromiter(content_vector.values(), dtype=np.float64, count=len(content_vector))
+        magnitude = np.linalg.norm(user_values) * np.linalg.norm(content_values)
+        if magnitude == 0:
             return 0.0
-        
-        return dot_product / (user_magnitude * content_magnitude)
+
+        user_common = np.fromiter((user_vector[k] for k in common_keys), dtype=np.float64, count=len(common_keys))
+        content_common = np.fromiter((content_vector[k] for k in common_keys), dtype=np.float64, count=len(common_keys))
+        return float(user_common @ content_common / magnitude)
+
+    @staticmethod
+    def cosine_scores(user_vector: np.ndarray, content_matrix: np.ndarray) -> np.ndarray:
+        """Cosine similarity of one dense vector against every row of a matrix"""
+        norms = np.linalg.norm(content_matrix, axis=1) * np.linalg.norm(user_vector)
+        scores = content_matrix @ user_vector
+        return np.divide(scores, norms, out=np.zeros_like(scores), where=norms > 0)
+
 
 # Global recommender instance
-recommender = TrendyRecommender()
+settings = get_settings()
+recommender = TrendyRecommender(
+    neighbors=settings.recommender_neighbors,
+    max_items_per_user=settings.recommender_max_items_per_user,
+    recent_items=settings.recommender_recent_items,
+    index_path=settings.recommender_index_path,
+    vector_dir=settings.recommender_vector_dir,
+    ann_min_items=settings.recommender_ann_min_items,
+    ann_nprobe=settings.recommender_ann_nprobe
+)
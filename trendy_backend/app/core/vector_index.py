@@ -0,0 +1,212 @@
+"""
+Content embedding indexes for TRENDY App
+Exact brute-force search and an IVF (inverted file) approximate index over
+L2-normalized float32 embeddings, scored by cosine similarity. Indexes are
+saved as plain .npy files and loaded memory-mapped so every worker process
+shares one copy of the vectors through the page cache.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SearchResults = List[List[Tuple[str, float]]]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column positions of the k best scores in each row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+class VectorIndex:
+    """Shared storage and persistence; subclasses implement search"""
+
+    kind = "base"
+
+    def __init__(self, ids: Iterable[str], vectors: np.ndarray, normalized: bool = False):
+        self.ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=str)
+        self.vectors = vectors if normalized else normalize_rows(vectors)
+        self._rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def row_of(self, external_id: str) -> Optional[int]:
+        if self._rows is None:
+            self._rows = {external_id: row for row, external_id in enumerate(self.ids.tolist())}
+        return self._rows.get(external_id)
+
+    def vectors_for(self, external_ids: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(mask of ids present in the index, their vectors)"""
+        rows = [self.row_of(external_id) for external_id in external_ids]
+        rows = np.array([-1 if row is None else row for row in rows], dtype=np.int64)
+        present = rows >= 0
+        return present, np.asarray(self.vectors[rows[present]])
+
+    def search(self, queries: np.ndarray, k: int) -> SearchResults:
+        raise NotImplementedError
+
+    def _meta(self) -> Dict[str, object]:
+        return {"kind": self.kind, "count": len(self), "dim": self.dim}
+
+    def _extra_arrays(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def save(self, path: str):
+        """Write one directory of .npy files plus meta.json"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "ids.npy"), self.ids)
+        np.save(os.path.join(path, "vectors.npy"), np.ascontiguousarray(self.vectors, dtype=np.float32))
+        for name, array in self._extra_arrays().items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self._meta(), f)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> "VectorIndex":
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        ids = np.load(os.path.join(path, "ids.npy"))
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r" if mmap else None)
+        if meta["kind"] == IVFIndex.kind:
+            return IVFIndex.from_arrays(
+                ids, vectors,
+                centroids=np.load(os.path.join(path, "centroids.npy")),
+                offsets=np.load(os.path.join(path, "offsets.npy")),
+                nprobe=meta.get("nprobe", 8)
+            )
+        return ExactIndex(ids, vectors, normalized=True)
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force cosine search; the recall baseline for approximate indexes"""
+
+    kind = "exact"
+
+    def __init__(self, ids: Iterable[str], vectors: np.ndarray, normalized: bool = False, chunk_size: int = 65536):
+        super().__init__(ids, vectors, normalized)
+        self.chunk_size = chunk_size
+
+    def search(self, queries: np.ndarray, k: int) -> SearchResults:
+        queries = normalize_rows(queries)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        # Score in item chunks and keep a running top-k so memory stays bounded
+        for start in range(0, len(self), self.chunk_size):
+            scores = queries @ np.asarray(self.vectors[start:start + self.chunk_size]).T
+            top = _top_k_rows(scores, k)
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            keep = _top_k_rows(best_scores, k)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        return [
+            [(self.ids[row], float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+
+class IVFIndex(VectorIndex):
+    """Inverted-file index: spherical k-means lists, vectors stored contiguously per list.
+
+    nprobe is the recall knob: more probed lists means higher recall and latency.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, ids: Iterable[str], vectors: np.ndarray, n_lists: Optional[int] = None, nprobe: int = 8,
+                 train_iterations: int = 10, seed: int = 42):
+        ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=str)
+        vectors = normalize_rows(vectors)
+        n_lists = max(1, min(n_lists or int(np.sqrt(len(ids))), len(ids)))
+        centroids = self._train(vectors, n_lists, train_iterations, np.random.default_rng(seed))
+        assignments = self._assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+        super().__init__(ids[order], vectors[order], normalized=True)
+        self.centroids, self.offsets, self.nprobe = centroids, offsets, nprobe
+
+    @classmethod
+    def from_arrays(cls, ids: np.ndarray, vectors: np.ndarray, centroids: np.ndarray, offsets: np.ndarray,
+                    nprobe: int) -> "IVFIndex":
+        index = cls.__new__(cls)
+        VectorIndex.__init__(index, ids, vectors, normalized=True)
+        index.centroids, index.offsets, index.nprobe = centroids, offsets, nprobe
+        return index
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), chunk_size)
+        ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def _train(cls, vectors: np.ndarray, n_lists: int, iterations: int, rng) -> np.ndarray:
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), n_lists * 256), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=n_lists) == 0
+            # Re-seed empty lists from random sample points
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        return centroids
+
+    def _meta(self) -> Dict[str, object]:
+        return {**super()._meta(), "n_lists": len(self.centroids), "nprobe": self.nprobe}
+
+    def _extra_arrays(self) -> Dict[str, np.ndarray]:
+        return {"centroids": self.centroids, "offsets": self.offsets}
+
+    def search(self, queries: np.ndarray, k: int, nprobe: Optional[int] = None) -> SearchResults:
+        queries = normalize_rows(queries)
+        probes = _top_k_rows(queries @ self.centroids.T, nprobe or self.nprobe)
+        results = []
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            if not len(rows):
+                results.append([])
+                continue
+            scores = np.asarray(self.vectors[rows]) @ query
+            top = _top_k_rows(scores[None, :], k)[0]
+            results.append([(self.ids[rows[i]], float(scores[i])) for i in top])
+        return results
+
+
+def recall_at_k(approximate: SearchResults, exact: SearchResults) -> float:
+    """Fraction of exact top-k ids the approximate search also returned"""
+    hits = total = 0
+    for approx_hits, exact_hits in zip(approximate, exact):
+        truth = {external_id for external_id, _ in exact_hits}
+        hits += len(truth & {external_id for external_id, _ in approx_hits})
+        total += len(truth)
+    return hits / total if total else 1.0
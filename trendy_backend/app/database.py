@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -13,3 +13,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def schema_metadata() -> MetaData:
+    """Every table the models declare, for creating a schema from scratch. The
+    app.db.base models are declared on this Base too, so users.id resolves."""
+    import app.models  # noqa: F401
+
+    return Base.metadata
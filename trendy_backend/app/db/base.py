@@ -1,3 +1,7 @@
-from sqlalchemy.ext.declarative import declarative_base
+"""
+The declarative base for the models that import it from here. It is the
+same Base as app.database, so relationships and foreign keys between all
+models (users.id included) resolve in one registry and one MetaData.
+"""
 
-Base = declarative_base()
+from app.database import Base  # noqa: F401
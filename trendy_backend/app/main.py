@@ -3,44 +3,199 @@ Main FastAPI application for TRENDY App
 Complete implementation with all enhanced features
 """
 
+import asyncio
+import importlib
+import os
+from contextlib import asynccontextmanager
+from typing import Iterable
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from .database import engine, Base
-from .routes import (
-    agora,
-    auth,
-    followers_new,
-    user_relationships,
-    enhanced_content,
-    monetization,
-    ads,
-    revenue_analytics
-)
-from .auth import email_verification
-from .routes import social_auth
-from .api import (
-    movies,
-    music,
-    football,
-    photos,
-    weather,
-    news,
-    crypto,
-    ai_features,
-    messages,
-    groups,
-    shop,
-    enhanced_endpoints
+from .database import engine, SessionLocal
+from .core.config import get_settings
+from .core.query_profiler import setup_query_profiler
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows; give BACKGROUND_LEADER=true to one process there
+    fcntl = None
+
+# (module, prefix) in registration order. Modules are imported by name so a
+# worker only loads the routers it serves: ENABLED_ROUTERS=auth,posts,messages
+# limits it to those, DISABLED_ROUTERS=movies,music skips the ones listed.
+ROUTERS = (
+    ("app.routes.auth", "/api/v1"),
+    ("app.routes.social_auth", "/api/v1"),
+    ("app.auth.email_verification", "/api/v1"),
+    ("app.routes.user_relationships", "/api/v1"),
+    ("app.routes.enhanced_content", "/api/v1"),
+    ("app.routes.posts", "/api/v1"),
+    ("app.routes.followers_new", "/api/v1"),
+    ("app.routes.agora", "/api/v1"),
+    ("app.routes.monetization", "/api/v1"),
+    ("app.routes.ads", "/api/v1"),
+    ("app.routes.revenue_analytics", "/api/v1"),
+    ("app.routes.notifications", "/api/v1"),
+    ("app.routes.ai_moderation", "/api/v1"),
+    ("app.routes.media", "/api/v1"),
+    ("app.routes.stories", "/api/v1"),
+    ("app.api.enhanced_endpoints", "/api/v1"),
+    ("app.api.movies", ""),
+    ("app.api.music", ""),
+    ("app.api.football", ""),
+    ("app.api.photos", ""),
+    ("app.api.weather", ""),
+    ("app.api.news", ""),
+    ("app.api.crypto", ""),
+    ("app.api.ai_features", ""),
+    ("app.api.messages", ""),
+    ("app.api.groups", ""),
+    ("app.api.shop", ""),
+    ("app.api.blockchain", ""),
 )
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+def include_routers(app: FastAPI, disabled: Iterable[str] = (), enabled: Iterable[str] = ()):
+    disabled = {name.strip() for name in disabled if name.strip()}
+    enabled = {name.strip() for name in enabled if name.strip()}
+    for module_name, prefix in ROUTERS:
+        name = module_name.rsplit(".", 1)[1]
+        if name in disabled or (enabled and name not in enabled):
+            continue
+        app.include_router(importlib.import_module(module_name).router, prefix=prefix)
+
+# Background workers. Services are imported here rather than at module level
+# so importing app.main (and every worker that never starts them) stays cheap.
+def claim_background_leader(app: FastAPI, settings) -> bool:
+    """Whether this worker runs the singleton loops. With BACKGROUND_LEADER_LOCK set, only the
+    worker that wins a non-blocking flock on that file leads (uvicorn --workers share one env)."""
+    if not settings.background_leader:
+        return False
+    if not settings.background_leader_lock or fcntl is None:
+        return True
+    fd = os.open(settings.background_leader_lock, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    # Held for the life of this worker; the worker uvicorn starts in its place takes over
+    app.state.leader_lock_fd = fd
+    return True
+
+async def start_background_workers(app: FastAPI, settings):
+    from .services.notification_service import notification_pipeline
+    from .ai.moderation_queue import moderation_queue
+    from .core.analytics import analytics_engine
+    from .services.sketch_service import sketch_analytics
+    from .services.visibility import visibility_service
+
+    # Per-worker loops: each drains queues and caches held in this process
+    app.state.notification_task = asyncio.create_task(
+        notification_pipeline.run_forever(SessionLocal, settings.notification_flush_interval_seconds)
+    )
+    app.state.moderation_tasks = moderation_queue.start_workers(SessionLocal, settings.moderation_workers)
+    app.state.analytics_task = asyncio.create_task(
+        analytics_engine.run_forever(SessionLocal, settings.analytics_flush_interval_seconds)
+    )
+    app.state.sketch_task = asyncio.create_task(
+        sketch_analytics.run_forever(SessionLocal, settings.sketch_flush_interval_seconds)
+    )
+    app.state.visibility_task = asyncio.create_task(
+        visibility_service.run_forever(SessionLocal, settings.visibility_refresh_interval_seconds)
+    )
+    app.state.background_leader = claim_background_leader(app, settings)
+    if not app.state.background_leader:
+        return
+
+    # Singleton work over shared tables; only the leader worker runs it
+    from .services.message_reaper import message_reaper
+    from .services.user_counters import user_counters
+    from .services.media_service import media_service
+    from .services.story_service import story_service
+    from .services.email_service import email_service
+    from .services.token_store import token_store
+    from .services.stripe_webhooks import stripe_webhooks
+
+    # Posts and media left pending by a previous process go back on the queue
+    db = SessionLocal()
+    try:
+        moderation_queue.requeue_pending(db)
+        media_service.requeue_processing(db, SessionLocal)
+    finally:
+        db.close()
+    if settings.message_reaper_enabled:
+        app.state.message_reaper_task = asyncio.create_task(
+            message_reaper.run_forever(SessionLocal, settings.message_reaper_interval_seconds)
+        )
+    app.state.counter_task = asyncio.create_task(
+        user_counters.run_forever(
+            SessionLocal,
+            settings.user_counter_reconcile_interval_seconds,
+            settings.user_counter_reconcile_batch_size
+        )
+    )
+    app.state.story_task = asyncio.create_task(
+        story_service.run_forever(SessionLocal, settings.story_sweep_interval_seconds, settings.story_sweep_batch_size)
+    )
+    app.state.email_task = asyncio.create_task(
+        email_service.run_forever(SessionLocal, settings.email_worker_interval_seconds)
+    )
+    app.state.token_purge_task = asyncio.create_task(
+        token_store.run_forever(SessionLocal, settings.email_token_purge_interval_seconds)
+    )
+    app.state.stripe_webhook_task = asyncio.create_task(
+        stripe_webhooks.run_forever(SessionLocal, settings.stripe_webhook_interval_seconds)
+    )
+
+async def stop_background_workers(app: FastAPI):
+    from .services.notification_service import notification_pipeline
+    from .core.analytics import analytics_engine
+    from .services.sketch_service import sketch_analytics
+    from .services.media_service import media_service
+
+    for name in ("message_reaper_task", "notification_task", "analytics_task", "sketch_task", "visibility_task",
+                 "counter_task", "story_task", "email_task", "token_purge_task",
+                 "stripe_webhook_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    for task in getattr(app.state, "moderation_tasks", []):
+        task.cancel()
+    # Uploads accepted by this worker are processed in its own executor
+    media_service.shutdown()
+    if getattr(app.state, "background_leader", False):
+        from .services.email_service import email_service
+        email_service.shutdown()
+    # Persist notification and analytics events still queued in this worker
+    db = SessionLocal()
+    try:
+        notification_pipeline.flush(db)
+        analytics_engine.flush(db)
+        sketch_analytics.flush(db)
+    finally:
+        db.close()
+    if getattr(app.state, "leader_lock_fd", None) is not None:
+        os.close(app.state.leader_lock_fd)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker startup and shutdown. The schema is managed by scripts/migrate.py, not here."""
+    from .auth.middleware import init_firebase
+
+    settings = get_settings()
+    init_firebase(settings)
+    await start_background_workers(app, settings)
+    try:
+        yield
+    finally:
+        await stop_background_workers(app)
+
+settings = get_settings()
 
 app = FastAPI(
     title="TRENDY App API",
     description="Complete API for TRENDY social media platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -52,30 +207,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include all routes
-app.include_router(auth.router, prefix="/api/v1")
-app.include_router(social_auth.router, prefix="/api/v1")
-app.include_router(email_verification.router, prefix="/api/v1")
-app.include_router(user_relationships.router, prefix="/api/v1")
-app.include_router(enhanced_content.router, prefix="/api/v1")
-app.include_router(followers_new.router, prefix="/api/v1")
-app.include_router(agora.router, prefix="/api/v1")
-app.include_router(monetization.router, prefix="/api/v1")
-app.include_router(ads.router, prefix="/api/v1")
-app.include_router(revenue_analytics.router, prefix="/api/v1")
-
-app.include_router(enhanced_endpoints.router, prefix="/api/v1")
-app.include_router(movies.router)
-app.include_router(music.router)
-app.include_router(football.router)
-app.include_router(photos.router)
-app.include_router(weather.router)
-app.include_router(news.router)
-app.include_router(crypto.router)
-app.include_router(ai_features.router)
-app.include_router(messages.router)
-app.include_router(groups.router)
-app.include_router(shop.router)
+# Per-request query counting / N+1 detection (development and staging)
+query_profiler = setup_query_profiler(app, engine, settings)
+
+include_routers(app, settings.disabled_routers.split(","), settings.enabled_routers.split(","))
 
 # Health check endpoint
 @app.get("/health")
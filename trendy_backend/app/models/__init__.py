@@ -1,6 +1,7 @@
 from .user import User
 from .post import Post, Comment, Like, Follower
 from .message import Message
+from .conversation import Conversation, InboxEntry
 from .group import Group
 from .group_member import GroupMember
 from .message_reaction import MessageReaction
@@ -8,3 +9,10 @@ from .social_provider import SocialProvider
 from .notification_clean import Notification
 from .subscription_corrected import Subscription
 from .ad_impression import AdImpression, UserAdRevenue
+from .analytics_event import AnalyticsEvent, AnalyticsCounter, AnalyticsSketch
+from .photo_interaction import PhotoFavorite, PhotoView
+from .media_asset import MediaAsset
+from .email_outbox import OutboundEmail
+from .auth_token import AuthToken
+from .stripe_event import StripeEvent
+from .enhanced_post import EnhancedPost, Story, StorySeen
@@ -0,0 +1,52 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, JSON, LargeBinary, Index, UniqueConstraint
+from app.database import Base
+
+class AnalyticsEvent(Base):
+    """Append-only event log; rows are only ever bulk-inserted by the analytics flusher"""
+    __tablename__ = "analytics_events"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    user_id = Column(String(64), nullable=False)
+    event_type = Column(String(64), nullable=False)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        # Per-user timeline: WHERE user_id = ? AND created_at >= ? ORDER BY created_at DESC
+        Index("ix_analytics_events_user_created", "user_id", "created_at"),
+        # Time-range scans and retention deletes
+        Index("ix_analytics_events_created", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<AnalyticsEvent(id={self.id}, user_id={self.user_id}, type={self.event_type})>"
+
+class AnalyticsCounter(Base):
+    """Rolling count of events per type and time bucket"""
+    __tablename__ = "analytics_counters"
+    
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)
+    event_type = Column(String(64), nullable=False)
+    count = Column(BigInteger, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "event_type", name="uq_analytics_counters_bucket_type"),
+    )
+    
+    def __repr__(self):
+        return f"<AnalyticsCounter(bucket_start={self.bucket_start}, type={self.event_type}, count={self.count})>"
+
+class AnalyticsSketch(Base):
+    """Serialized HyperLogLog / Count-Min sketch, merged into by every worker on flush"""
+    __tablename__ = "analytics_sketches"
+    
+    id = Column(Integer, primary_key=True)
+    key = Column(String(200), nullable=False, unique=True)  # e.g. post:42:2025-01-31, hashtags:2025-01-31
+    kind = Column(String(10), nullable=False)  # hll, cms
+    day = Column(Date, nullable=True, index=True)  # None for lifetime sketches
+    blob = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<AnalyticsSketch(key={self.key}, kind={self.kind})>"
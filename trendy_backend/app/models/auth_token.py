@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from app.database import Base
+
+class AuthToken(Base):
+    """Single-use email verification / password reset token; only the SHA-256 of the token is stored"""
+    __tablename__ = "auth_tokens"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    purpose = Column(String(20), nullable=False)  # verify_email, password_reset
+    token_hash = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Resend throttle and reissue: WHERE user_id = ? AND purpose = ? ORDER BY created_at DESC
+        Index("ix_auth_tokens_user_purpose_created", "user_id", "purpose", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<AuthToken(id={self.id}, user_id={self.user_id}, purpose={self.purpose})>"
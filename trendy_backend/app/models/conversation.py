@@ -0,0 +1,69 @@
+"""
+Conversation and Inbox Models for TRENDY App
+A conversation is one DM pair or one group; inbox entries hold each
+participant's last-message pointer and unread count.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False)  # direct, group
+
+    # Direct conversations: participants stored ordered (low < high) so a pair maps to one row
+    user_low_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    user_high_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Group conversations
+    group_id = Column(Integer, nullable=True, unique=True)
+
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    inbox_entries = relationship("InboxEntry", back_populates="conversation", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("user_low_id", "user_high_id", name="uq_conversations_direct_pair"),
+    )
+
+    def __repr__(self):
+        return f"<Conversation(id={self.id}, kind={self.kind})>"
+
+
+class InboxEntry(Base):
+    __tablename__ = "inbox_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+
+    # Denormalized last-message pointer so the inbox renders without touching messages
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime, nullable=True)
+    last_sender_id = Column(Integer, nullable=True)
+    last_message_preview = Column(String(255), nullable=True)
+
+    unread_count = Column(Integer, default=0, nullable=False)
+    last_read_message_id = Column(Integer, nullable=True)
+
+    # Relationships
+    conversation = relationship("Conversation", back_populates="inbox_entries")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "conversation_id", name="uq_inbox_entries_user_conversation"),
+        # Inbox page: WHERE user_id = ? ORDER BY last_message_at DESC
+        Index("ix_inbox_entries_user_last_message", "user_id", "last_message_at"),
+        # Message reaper: clears previews WHERE last_message_id IN (expired ids)
+        Index("ix_inbox_entries_last_message_id", "last_message_id"),
+    )
+
+    def __repr__(self):
+        return f"<InboxEntry(user_id={self.user_id}, conversation_id={self.conversation_id}, unread={self.unread_count})>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class OutboundEmail(Base):
+    """Persistent outbound queue; rows are delivered by the email worker"""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    html_body = Column(Text, nullable=False)
+    template = Column(String(100))
+    status = Column(String(20), default="pending", nullable=False)  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        # Worker claim: WHERE status IN ('pending', 'sending') AND next_attempt_at <= now ORDER BY next_attempt_at
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboundEmail(id={self.id}, recipient={self.recipient}, status={self.status})>"
@@ -3,7 +3,7 @@ Enhanced Post Models for TRENDY App
 Handles reels, stories, and enhanced post features
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, JSON, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -26,7 +26,7 @@ class EnhancedPost(Base):
     music_id = Column(String(100))
     movie_id = Column(String(100))
     football_match_id = Column(String(100))
-    story_expires_at = Column(DateTime)
+    story_expires_at = Column(DateTime, index=True)
     is_featured = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -83,13 +83,32 @@ class Story(Base):
     location = Column(String(255))
     music_id = Column(String(100))
     expires_at = Column(DateTime, nullable=False)
+    sequence = Column(Integer, nullable=False)  # per-author story number; indexes the seen bitsets
     views_count = Column(Integer, default=0)
     is_archived = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Active stories of an author / of the people a viewer follows
+        Index("ix_stories_user_expires", "user_id", "expires_at"),
+        UniqueConstraint("user_id", "sequence", name="uq_stories_user_sequence"),
+        # Expiry sweeper: WHERE is_archived = false AND expires_at <= now
+        Index("ix_stories_archived_expires", "is_archived", "expires_at"),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="stories")
 
+class StorySeen(Base):
+    """Which of an author's stories a viewer has seen, as a bitset over Story.sequence"""
+    __tablename__ = "story_seen"
+    
+    viewer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    base_sequence = Column(Integer, nullable=False)  # sequence of bit 0
+    bits = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, nullable=False, index=True)
+
 class Reel(Base):
     __tablename__ = "reels"
     
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+class MediaAsset(Base):
+    """An uploaded file, stored once per content hash, plus its derived renditions"""
+    __tablename__ = "media_assets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    content_type = Column(String(100), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    storage_key = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="processing")  # processing, ready, failed
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    # [{"name": "w640", "key": ..., "width": ..., "height": ..., "content_type": ..., "size_bytes": ...}]
+    renditions = Column(JSON, default=list)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<MediaAsset(id={self.id}, sha256={self.sha256[:12]}, status={self.status})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime
@@ -10,6 +10,7 @@ class Message(Base):
     sender_id = Column(Integer, ForeignKey("users.id"))
     receiver_id = Column(Integer, ForeignKey("users.id"))
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
+    conversation_id = Column(Integer, nullable=True)  # conversations.id (see models/conversation.py)
     content = Column(String, nullable=False)
     media_url = Column(String, nullable=True)
     message_type = Column(String, default="text")  # text, image, video, audio, file
@@ -28,4 +29,11 @@ class Message(Base):
     group = relationship("Group", back_populates="messages")
     replies = relationship("Message", back_populates="parent")
     parent = relationship("Message", back_populates="replies", remote_side=[id])
-    reactions = relationship("MessageReaction", back_populates="message")
\ No newline at end of file
+    reactions = relationship("MessageReaction", back_populates="message")
+    
+    __table_args__ = (
+        # Conversation page: WHERE conversation_id = ? ORDER BY sent_at DESC, id DESC
+        Index("ix_messages_conversation_sent", "conversation_id", "sent_at", "id"),
+        # Reaper: WHERE expires_at <= now ORDER BY expires_at LIMIT n
+        Index("ix_messages_expires_at", "expires_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -14,6 +14,8 @@ class Notification(Base):
     data = Column(JSON, default=dict)
     is_read = Column(Boolean, default=False)
     is_sent = Column(Boolean, default=False)
+    group_key = Column(String(100), nullable=True)  # coalescing key, e.g. like:post:42
+    actor_count = Column(Integer, default=1)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -22,5 +24,13 @@ class Notification(Base):
     # Relationships
     user = relationship("User", back_populates="notifications")
     
+    __table_args__ = (
+        # Feed and unread count: WHERE user_id = ? [AND is_read = ?] ORDER BY created_at DESC
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+        Index("ix_notifications_user_created", "user_id", "created_at"),
+        # Coalescing lookup: WHERE user_id = ? AND group_key = ? AND is_read = false
+        Index("ix_notifications_user_group_key", "user_id", "group_key"),
+    )
+    
     def __repr__(self):
         return f"<Notification(id={self.id}, user_id={self.user_id}, type={self.type})>"
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class PhotoFavorite(Base):
+    __tablename__ = "photo_favorites"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    photo_id = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "photo_id", name="uq_photo_favorites_user_photo"),
+        # Favorites page: WHERE user_id = ? ORDER BY created_at DESC
+        Index("ix_photo_favorites_user_created", "user_id", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<PhotoFavorite(user_id={self.user_id}, photo_id={self.photo_id})>"
+
+class PhotoView(Base):
+    """Viewing history, one row per (user, photo) holding the latest view; capped per user"""
+    __tablename__ = "photo_views"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    photo_id = Column(String(64), nullable=False)
+    viewed_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "photo_id", name="uq_photo_views_user_photo"),
+        # History page and trimming: WHERE user_id = ? ORDER BY viewed_at DESC
+        Index("ix_photo_views_user_viewed", "user_id", "viewed_at"),
+    )
+    
+    def __repr__(self):
+        return f"<PhotoView(user_id={self.user_id}, photo_id={self.photo_id}, viewed_at={self.viewed_at})>"
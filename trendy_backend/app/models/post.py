@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, ForeignKey, Float, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -45,6 +45,21 @@ class Post(Base):
     analytics = relationship("PostAnalytics", back_populates="post", cascade="all, delete-orphan", uselist=False)
     reel = relationship("Reel", back_populates="post", cascade="all, delete-orphan", uselist=False)
     
+    __table_args__ = (
+        # Feeds only read approved posts; pending/rejected rows stay out of this index
+        Index(
+            "ix_posts_approved_created", "created_at",
+            postgresql_where=(moderation_status == "approved"),
+            sqlite_where=(moderation_status == "approved"),
+        ),
+        # Moderation workers pick up pending posts from a small partial index
+        Index(
+            "ix_posts_pending_created", "created_at",
+            postgresql_where=(moderation_status == "pending"),
+            sqlite_where=(moderation_status == "pending"),
+        ),
+    )
+    
     def __repr__(self):
         return f"<Post(id={self.id}, user_id={self.user_id}, content={self.content[:50]}...)>"
 
@@ -88,13 +103,22 @@ class Comment(Base):
         return f"<Comment(id={self.id}, user_id={self.user_id}, post_id={self.post_id}, content={self.content[:50]}...)>"
 
 class Follower(Base):
+    """Canonical follow edge; every follow API reads and writes this table"""
     __tablename__ = "followers"
     
     id = Column(Integer, primary_key=True, index=True)
     follower_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     following_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    is_mutual = Column(Boolean, default=False, nullable=False)  # maintained by the follow graph service
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Forward lookups (following lists, is_following) come from the unique index
+        UniqueConstraint("follower_id", "following_id", name="uq_followers_follower_following"),
+        # Reverse lookups (follower lists)
+        Index("ix_followers_following_follower", "following_id", "follower_id"),
+    )
+    
     # Relationships
     follower_user = relationship("User", foreign_keys=[follower_id], back_populates="following")
     following_user = relationship("User", foreign_keys=[following_id], back_populates="followers")
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class StripeEvent(Base):
+    """Webhook inbox: every verified Stripe event, stored once, processed by the webhook worker"""
+    __tablename__ = "stripe_events"
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(String(255), unique=True, nullable=False)
+    type = Column(String(100), nullable=False)
+    ordering_key = Column(String(255), nullable=True)  # subscription / payment intent the event applies to
+    stripe_created = Column(Integer, nullable=False)  # event.created, seconds since epoch
+    payload = Column(Text, nullable=False)  # raw request body, for replay
+    status = Column(String(20), default="pending", nullable=False)  # pending, processed, ignored, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime)
+
+    __table_args__ = (
+        # Worker claim: WHERE status = 'pending' AND next_attempt_at <= now ORDER BY stripe_created, id
+        Index("ix_stripe_events_status_created", "status", "stripe_created"),
+        # Keys still backing off: WHERE status = 'pending' AND next_attempt_at > now
+        Index("ix_stripe_events_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_stripe_events_ordering_key", "ordering_key"),
+    )
+
+    def __repr__(self):
+        return f"<StripeEvent(event_id={self.event_id}, type={self.type}, status={self.status})>"
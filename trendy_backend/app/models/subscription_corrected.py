@@ -17,6 +17,7 @@ class Subscription(Base):
     cancel_at_period_end = Column(Boolean, default=False)
     canceled_at = Column(DateTime(timezone=True), nullable=True)
     subscription_metadata = Column(JSON, default=dict)
+    stripe_event_at = Column(Integer, nullable=True)  # created time of the last webhook event applied
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -2,19 +2,25 @@
 Updated User Model for TRENDY App with email verification support
 """
 
+import hashlib
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, ForeignKey, Numeric
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.database import Base
 from .user_relationships import UserBlock
 from .enhanced_post import Story
 
+def hash_email(email: str) -> str:
+    """Contact-matching hash: sha256 hex of the trimmed, lower-cased address"""
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()
+
 class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
     firebase_uid = Column(String(255), unique=True, index=True, nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
+    email_hash = Column(String(64), index=True, nullable=True)  # kept in sync by set_email_hash
     username = Column(String(50), unique=True, index=True, nullable=False)
     display_name = Column(String(100), nullable=True)
     bio = Column(Text, nullable=True)
@@ -28,11 +34,14 @@ class User(Base):
     has_social_login = Column(Boolean, default=False)
     primary_social_provider = Column(String(50), nullable=True)
     preferences = Column(JSON, default=dict)
+    
+    # Denormalized counters, maintained by app.services.user_counters
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    posts_count = Column(Integer, nullable=False, default=0, server_default="0")
     user_metadata = Column(JSON, default=dict)
     
-    # Email verification fields
-    verification_token = Column(String(255), nullable=True, index=True)
-    verification_token_expires = Column(DateTime, nullable=True)
+    # Verification and reset tokens live in auth_tokens (app.services.token_store)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -59,5 +68,10 @@ class User(Base):
     stories = relationship("Story", back_populates="user", cascade="all, delete-orphan")
     blocked_by = relationship("UserBlock", foreign_keys="UserBlock.blocked_id", back_populates="blocked", cascade="all, delete-orphan")
     
+    @validates("email")
+    def set_email_hash(self, key, email):
+        self.email_hash = hash_email(email) if email else None
+        return email
+    
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, email={self.email})>"
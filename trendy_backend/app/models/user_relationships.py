@@ -43,8 +43,8 @@ class UserBlock(Base):
     __tablename__ = "user_blocks"
     
     id = Column(Integer, primary_key=True, index=True)
-    blocker_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    blocked_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    blocker_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    blocked_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Block reason and metadata
     reason = Column(String(255), nullable=True)
@@ -66,7 +66,7 @@ class UserMute(Base):
     __tablename__ = "user_mutes"
     
     id = Column(Integer, primary_key=True, index=True)
-    muter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    muter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     muted_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Mute settings
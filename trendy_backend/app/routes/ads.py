@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.auth.middleware import get_current_user
 from app.services.ad_service import ad_service
+from app.services.sketch_service import sketch_analytics
 from app.models.user import User
 from app.models.post import Post
 
@@ -91,6 +92,7 @@ async def track_impression(
             ad_type=request.ad_unit_id.split('_')[-1],  # Extract ad type from unit ID
             revenue=request.revenue or 0.0
         )
+        sketch_analytics.record_ad_impression(request.ad_unit_id.split('_')[-1], current_user.id)
         
         return {"success": success, "message": "Impression tracked"}
         
@@ -139,6 +141,9 @@ async def get_revenue_analytics(
             user_id=current_user.id if current_user else None,
             ad_type=ad_type
         )
+        if isinstance(revenue_data, dict):
+            # Distinct users reached, estimated with HyperLogLog
+            revenue_data["unique_reach"] = sketch_analytics.ad_reach(db, start_date.date(), end_date.date(), ad_type)
         
         return revenue_data
         
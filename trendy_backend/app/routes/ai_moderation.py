@@ -1,7 +1,53 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.post import Post
+from app.models.user import User
+from app.auth.middleware import get_current_admin_user
+from app.ai.moderation import moderate_text, moderation_engine, rescan_posts, rescan_comments
+from app.ai.moderation_queue import moderation_queue
 
-router = APIRouter()
+router = APIRouter(prefix="/moderation", tags=["Moderation"])
+
+class ModerationDecision(BaseModel):
+    post_id: int
+    status: str  # approved, rejected, pending (re-queue)
 
 @router.post("/moderate")
-def moderate_post():
-    return {"message": "Post moderated successfully"}
+def moderate_post(
+    decision: ModerationDecision,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    if decision.status not in ("approved", "rejected", "pending"):
+        raise HTTPException(status_code=400, detail="Invalid moderation status")
+    post = db.query(Post).filter(Post.id == decision.post_id).first()
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    post.moderation_status = decision.status
+    post.is_flagged = decision.status == "rejected"
+    db.commit()
+    if decision.status == "pending":
+        moderation_queue.enqueue(post.id)
+    return {"message": "Post moderated successfully", "post_id": post.id, "status": post.moderation_status}
+
+@router.post("/scan")
+def scan_text(request: dict, admin_user: User = Depends(get_current_admin_user)):
+    return moderate_text(request.get("text") or "")
+
+@router.get("/queue")
+def get_queue_stats(admin_user: User = Depends(get_current_admin_user)):
+    return moderation_queue.stats()
+
+@router.post("/rescan")
+def rescan_content(db: Session = Depends(get_db), admin_user: User = Depends(get_current_admin_user)):
+    """Re-check existing posts and comments against the current term lists, e.g. after editing them"""
+    reloaded = moderation_engine.reload_if_changed()
+    return {
+        "terms_reloaded": reloaded,
+        "term_count": moderation_engine.term_count,
+        "posts": rescan_posts(db),
+        "comments": rescan_comments(db)
+    }
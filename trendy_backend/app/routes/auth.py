@@ -8,15 +8,13 @@ from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, Dict, Any
-import firebase_admin
-from firebase_admin import auth
-import httpx
 
 from app.database import get_db
 from app.models.user import User
 from app.core.config import get_settings
 from app.auth.middleware import get_current_user, verify_firebase_token
-from app.auth.email_verification import send_verification_email
+from app.auth.email_verification import queue_verification_email
+from app.services.email_service import email_service
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
@@ -47,7 +45,6 @@ class PasswordResetConfirmRequest(BaseModel):
 @router.post("/register", response_model=AuthResponse)
 async def register_user(
     request: UserRegisterRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Register a new user with email and password"""
@@ -80,11 +77,9 @@ async def register_user(
         db.commit()
         db.refresh(user)
         
-        # Send verification email in background
-        background_tasks.add_task(send_verification_email, user.id, user.email)
-        
-        # Send welcome email
-        background_tasks.add_task(email_service.send_welcome_email, user.email, user.username)
+        # Queue verification and welcome emails for the delivery worker
+        await queue_verification_email(db, user)
+        await email_service.send_welcome_email(db, user.email, user.username)
         
         # Generate mock token for immediate login
         mock_token = f"mock_token_{user.id}"
@@ -165,6 +160,8 @@ async def request_password_reset(
             return {"message": "If the email exists, a reset link has been sent"}
         
         # Generate password reset link
+        from firebase_admin import auth
+
         reset_link = auth.generate_password_reset_link(request.email)
         
         # Send email in background (implementation needed)
@@ -217,6 +214,8 @@ async def refresh_token(
     refresh_token: str
 ):
     """Refresh access token using refresh token"""
+    import httpx
+
     try:
         # Firebase token refresh implementation
         async with httpx.AsyncClient() as client:
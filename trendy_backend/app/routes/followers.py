@@ -25,7 +25,7 @@ def follow_user(
     # Check if already following
     existing_follow = db.query(Follower).filter(
         Follower.follower_id == current_user_id,
-        Follower.followed_id == user_id
+        Follower.following_id == user_id
     ).first()
 
     if existing_follow:
@@ -34,7 +34,7 @@ def follow_user(
     # Create follow relationship
     follow = Follower(
         follower_id=current_user_id,
-        followed_id=user_id
+        following_id=user_id
     )
     db.add(follow)
     db.commit()
@@ -57,7 +57,7 @@ def unfollow_user(
     """Unfollow a user"""
     follow = db.query(Follower).filter(
         Follower.follower_id == current_user_id,
-        Follower.followed_id == user_id
+        Follower.following_id == user_id
     ).first()
 
     if not follow:
@@ -84,7 +84,7 @@ def get_followers(
 ):
     """Get followers of a user"""
     followers = db.query(User).join(Follower, Follower.follower_id == User.id).filter(
-        Follower.followed_id == user_id
+        Follower.following_id == user_id
     ).all()
 
     return {
@@ -106,7 +106,7 @@ def get_following(
     db: Session = Depends(get_db)
 ):
     """Get users that a user is following"""
-    following = db.query(User).join(Follower, Follower.followed_id == User.id).filter(
+    following = db.query(User).join(Follower, Follower.following_id == User.id).filter(
         Follower.follower_id == user_id
     ).all()
 
@@ -133,7 +133,7 @@ def is_following(
     """Check if current user is following target user"""
     follow = db.query(Follower).filter(
         Follower.follower_id == current_user_id,
-        Follower.followed_id == target_user_id
+        Follower.following_id == target_user_id
     ).first()
 
     return {"is_following": follow is not None}
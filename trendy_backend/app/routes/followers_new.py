@@ -1,12 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import Dict, Iterable, List
 from sqlalchemy.orm import Session
+from app.core.config import get_settings
 from app.database import get_db
 from app.models.user import User
-from app.models.follower import Follower
-from app.auth.middleware import get_current_user_id
+from app.auth.middleware import get_current_user_id, optional_auth
+from app.services.follow_graph import follow_graph
+from app.services.user_counters import user_counters
+from app.services.visibility import visibility_service
+from app.services.notification_service import notification_pipeline
 
 router = APIRouter(prefix="/users", tags=["Followers"])
 
+class BulkFollowRequest(BaseModel):
+    user_ids: List[int]
+
+class ContactImportRequest(BaseModel):
+    email_hashes: List[str]  # sha256 hex of the trimmed, lower-cased address
+    follow: bool = True
+
+def _check_batch_size(size: int):
+    limit = get_settings().bulk_follow_max_items
+    if size > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} items per request")
+
+def _existing_user_ids(db: Session, user_ids: List[int]) -> set:
+    found = set()
+    for start in range(0, len(user_ids), 1000):
+        chunk = user_ids[start:start + 1000]
+        found.update(user_id for (user_id,) in db.query(User.id).filter(User.id.in_(chunk)))
+    return found
+
+def _bulk_follow(db: Session, current_user_id: int, user_ids: List[int]) -> Dict[int, str]:
+    """Resolve, filter and follow a batch of users in one transaction"""
+    user_ids = list(dict.fromkeys(user_ids))
+    existing = _existing_user_ids(db, user_ids)
+    hidden = visibility_service.hidden_authors(db, current_user_id, "blocks")
+    results: Dict[int, str] = {}
+    targets = []
+    for user_id in user_ids:
+        if user_id not in existing:
+            results[user_id] = "not_found"
+        elif user_id in hidden:
+            results[user_id] = "blocked"
+        else:
+            targets.append(user_id)
+    results.update(follow_graph.follow_many(db, current_user_id, targets))
+    for user_id, result in results.items():
+        if result == "followed":
+            notification_pipeline.enqueue(recipient_id=user_id, actor_id=current_user_id, type="follow")
+    return results
+
 @router.post("/{user_id}/follow")
 def follow_user(
     user_id: int,
@@ -22,31 +67,83 @@ def follow_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Check if already following
-    existing_follow = db.query(Follower).filter(
-        Follower.follower_id == current_user_id,
-        Follower.followed_id == user_id
-    ).first()
-    
-    if existing_follow:
+    if not follow_graph.follow(db, current_user_id, user_id):
         raise HTTPException(status_code=400, detail="Already following this user")
     
-    # Create follow relationship
-    follow = Follower(
-        follower_id=current_user_id,
-        followed_id=user_id
-    )
-    db.add(follow)
-    db.commit()
-    
-    # Update follower/following counts
-    user.followers_count += 1
-    follower_user = db.query(User).filter(User.id == current_user_id).first()
-    follower_user.following_count += 1
-    db.commit()
+    notification_pipeline.enqueue(recipient_id=user_id, actor_id=current_user_id, type="follow")
     
     return {"message": "Successfully followed user"}
 
+@router.post("/follow/bulk")
+def bulk_follow(
+    request: BulkFollowRequest,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Follow many users in one request; one result per id"""
+    _check_batch_size(len(request.user_ids))
+    results = _bulk_follow(db, current_user_id, request.user_ids)
+    return {
+        "results": [{"user_id": user_id, "status": result} for user_id, result in results.items()],
+        "followed": sum(1 for result in results.values() if result == "followed")
+    }
+
+@router.post("/unfollow/bulk")
+def bulk_unfollow(
+    request: BulkFollowRequest,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Unfollow many users in one request; one result per id"""
+    _check_batch_size(len(request.user_ids))
+    results = follow_graph.unfollow_many(db, current_user_id, request.user_ids)
+    return {
+        "results": [{"user_id": user_id, "status": result} for user_id, result in results.items()],
+        "unfollowed": sum(1 for result in results.values() if result == "unfollowed")
+    }
+
+@router.post("/contacts/import")
+def import_contacts(
+    request: ContactImportRequest,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Match hashed contact emails to users and optionally follow the matches"""
+    _check_batch_size(len(request.email_hashes))
+    hashes = list(dict.fromkeys(email_hash.lower() for email_hash in request.email_hashes))
+    matches: Dict[str, User] = {}
+    for start in range(0, len(hashes), 1000):
+        for user in db.query(User).filter(User.email_hash.in_(hashes[start:start + 1000])):
+            matches[user.email_hash] = user
+    hidden = visibility_service.hidden_authors(db, current_user_id, "search")
+    matches = {email_hash: user for email_hash, user in matches.items() if user.id not in hidden}
+
+    statuses: Dict[int, str] = {}
+    if request.follow and matches:
+        statuses = _bulk_follow(db, current_user_id, [user.id for user in matches.values()])
+    elif matches:
+        following = follow_graph.following(db, current_user_id)
+        statuses = {user.id: "already_following" if user.id in following else "matched" for user in matches.values()}
+
+    results = []
+    for email_hash in hashes:
+        user = matches.get(email_hash)
+        if user is None:
+            results.append({"email_hash": email_hash, "status": "no_match"})
+            continue
+        results.append({
+            "email_hash": email_hash,
+            "status": statuses.get(user.id, "matched"),
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "full_name": user.display_name,
+                "avatar_url": user.avatar_url,
+                "followers_count": user.followers_count
+            }
+        })
+    return {"results": results, "matched": len(matches)}
+
 @router.delete("/{user_id}/unfollow")
 def unfollow_user(
     user_id: int,
@@ -54,70 +151,53 @@ def unfollow_user(
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Unfollow a user"""
-    follow = db.query(Follower).filter(
-        Follower.follower_id == current_user_id,
-        Follower.followed_id == user_id
-    ).first()
-    
-    if not follow:
+    if not follow_graph.unfollow(db, current_user_id, user_id):
         raise HTTPException(status_code=400, detail="Not following this user")
     
-    db.delete(follow)
-    db.commit()
-    
-    # Update follower/following counts
-    user = db.query(User).filter(User.id == user_id).first()
-    user.followers_count -= 1
-    follower_user = db.query(User).filter(User.id == current_user_id).first()
-    follower_user.following_count -= 1
-    db.commit()
-    
     return {"message": "Successfully unfollowed user"}
 
+def _user_summaries(db: Session, user_ids: Iterable[int]) -> List[dict]:
+    """Load users by id in one query, keeping the order of user_ids"""
+    user_ids = list(user_ids)
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids))} if user_ids else {}
+    return [
+        {
+            "id": user.id,
+            "username": user.username,
+            "full_name": user.display_name,
+            "avatar_url": user.avatar_url,
+            "followers_count": user.followers_count
+        }
+        for user in (users.get(user_id) for user_id in user_ids)
+        if user is not None
+    ]
+
 @router.get("/{user_id}/followers")
 def get_followers(
     user_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db)
 ):
     """Get followers of a user"""
-    followers = db.query(User).join(Follower, Follower.follower_id == User.id).filter(
-        Follower.followed_id == user_id
-    ).all()
-    
+    follower_ids = follow_graph.followers(db, user_id)
     return {
-        "followers": [
-            {
-                "id": user.id,
-                "username": user.username,
-                "full_name": user.full_name,
-                "avatar_url": user.avatar_url
-            }
-            for user in followers
-        ],
-        "count": len(followers)
+        "followers": _user_summaries(db, follower_ids[skip:skip + limit]),
+        "count": len(follower_ids)
     }
 
 @router.get("/{user_id}/following")
 def get_following(
     user_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db)
 ):
     """Get users that a user is following"""
-    following = db.query(User).join(Follower, Follower.followed_id == User.id).filter(
-        Follower.follower_id == user_id
-    ).all()
-    
+    following_ids = sorted(follow_graph.following(db, user_id))
     return {
-        "following": [
-            {
-                "id": user.id,
-                "username": user.username,
-                "full_name": user.full_name,
-                "avatar_url": user.avatar_url
-            }
-            for user in following
-        ],
-        "count": len(following)
+        "following": _user_summaries(db, following_ids[skip:skip + limit]),
+        "count": len(following_ids)
     }
 
 @router.get("/{user_id}/is_following/{target_user_id}")
@@ -128,12 +208,39 @@ def is_following(
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Check if current user is following target user"""
-    follow = db.query(Follower).filter(
-        Follower.follower_id == current_user_id,
-        Follower.followed_id == target_user_id
-    ).first()
-    
-    return {"is_following": follow is not None}
+    return {"is_following": follow_graph.is_following(db, current_user_id, target_user_id)}
+
+@router.get("/{user_id}/mutual")
+def get_mutual_connections(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Users the current user follows who also follow user_id"""
+    mutual_ids = follow_graph.mutual_connections(db, current_user_id, user_id)
+    return {
+        "mutual": _user_summaries(db, mutual_ids[:limit]),
+        "count": len(mutual_ids)
+    }
+
+@router.get("/me/suggestions")
+def get_follow_suggestions(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """People you may know: followed by the people you follow"""
+    ranked = follow_graph.suggestions(db, [current_user_id], limit)[current_user_id]
+    visible = visibility_service.filter_visible(db, current_user_id, [item["user_id"] for item in ranked], "search")
+    ranked = [item for item, keep in zip(ranked, visible) if keep]
+    users = {user["id"]: user for user in _user_summaries(db, [item["user_id"] for item in ranked])}
+    return {
+        "suggestions": [
+            {**users[item["user_id"]], "mutual_count": item["mutual_count"]}
+            for item in ranked if item["user_id"] in users
+        ]
+    }
 
 @router.get("/{user_id}/stats")
 def get_user_stats(
@@ -141,33 +248,35 @@ def get_user_stats(
     db: Session = Depends(get_db)
 ):
     """Get user statistics"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    counters = user_counters.get(db, user_id)
+    if counters is None:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return {
-        "followers_count": user.followers_count,
-        "following_count": user.following_count,
-        "posts_count": user.posts_count
-    }
+    return counters
 
 @router.get("/search")
 def search_users(
     query: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: User = Depends(optional_auth)
 ):
     """Search users by username or email"""
-    users = db.query(User).filter(
+    search = db.query(User).filter(
         (User.username.ilike(f"%{query}%")) | (User.email.ilike(f"%{query}%"))
-    ).limit(20).all()
+    )
+    hidden = visibility_service.exclude_clause(db, current_user.id if current_user else None, User.id, "search")
+    if hidden is not None:
+        search = search.filter(hidden)
+    users = search.limit(20).all()
     
     return {
         "users": [
             {
                 "id": user.id,
                 "username": user.username,
-                "full_name": user.full_name,
-                "avatar_url": user.avatar_url
+                "full_name": user.display_name,
+                "avatar_url": user.avatar_url,
+                "followers_count": user.followers_count
             }
             for user in users
         ],
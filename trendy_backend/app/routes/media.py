@@ -0,0 +1,73 @@
+import time
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.database import get_db, SessionLocal
+from app.models.media_asset import MediaAsset
+from app.auth.middleware import get_current_user_id
+from app.services.media_service import media_service, UnsupportedMediaType, UploadTooLarge
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+async def _ingest(db: Session, chunks, content_type: str, current_user_id: int):
+    try:
+        asset, created = await media_service.ingest(db, chunks, content_type, current_user_id, SessionLocal)
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return {**media_service.describe(asset), "deduplicated": not created}
+
+@router.post("/upload")
+async def upload_media(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Multipart upload; the file is read in fixed-size chunks"""
+    try:
+        return await _ingest(db, media_service.chunks_from_upload(file), file.content_type, current_user_id)
+    finally:
+        await file.close()
+
+@router.put("/upload/raw")
+async def upload_media_raw(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Raw request body upload, streamed straight from the socket without spooling"""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > media_service.max_upload_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {media_service.max_upload_bytes} bytes")
+    return await _ingest(db, request.stream(), request.headers.get("content-type"), current_user_id)
+
+@router.get("/files/{key:path}")
+async def get_media_file(
+    key: str,
+    exp: int = Query(...),
+    sig: str = Query(...)
+):
+    """Serve a stored object behind a signed URL"""
+    if not media_service.verify(key, exp, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    try:
+        path = media_service.storage.local_path(key)
+    except ValueError:
+        path = None
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    # Keys are content-addressed, so the bytes behind a URL never change
+    max_age = max(0, exp - int(time.time()))
+    return FileResponse(path, headers={
+        "Cache-Control": f"public, max-age={max_age}, immutable",
+        "ETag": f'"{key.rsplit("/", 1)[-1]}"'
+    })
+
+@router.get("/{asset_id}")
+async def get_media(asset_id: int, db: Session = Depends(get_db)):
+    """Asset metadata with signed URLs for the original and its renditions"""
+    asset = db.query(MediaAsset).filter(MediaAsset.id == asset_id).first()
+    if not asset:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return media_service.describe(asset)
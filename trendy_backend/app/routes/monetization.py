@@ -4,13 +4,16 @@ Handles Stripe payments, subscriptions, and revenue tracking
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Request, status
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from datetime import datetime
 from typing import List, Optional
-import stripe
 
 from app.database import get_db
-from app.auth.middleware import get_current_user
+from app.auth.middleware import get_current_user, get_current_admin_user
 from app.services.stripe_service import stripe_service
+from app.services.stripe_webhooks import stripe_webhooks
+from app.services.entitlements import entitlement_service
 from app.models.user import User
 from app.models.subscription_corrected import Subscription, Payment
 from app.schemas.subscription import SubscriptionResponse, SubscriptionCreate
@@ -18,6 +21,11 @@ from app.schemas.ads import AdImpressionCreate, AdImpressionResponse
 
 router = APIRouter(prefix="/monetization", tags=["monetization"])
 
+class WebhookReplayRequest(BaseModel):
+    event_ids: Optional[List[str]] = None
+    since: Optional[datetime] = None
+    types: Optional[List[str]] = None
+
 @router.get("/plans")
 async def get_subscription_plans():
     """Get available subscription plans"""
@@ -42,11 +50,7 @@ async def create_checkout_session(
 ):
     """Create a Stripe checkout session for subscription"""
     try:
-        session_data = await stripe_service.create_checkout_session(
-            current_user, price_id, success_url, cancel_url
-        )
-        
-        # Create subscription record in database
+        # Create subscription record in database; the webhook worker links it through client_reference_id
         subscription = Subscription(
             user_id=current_user.id,
             stripe_subscription_id=None,  # Will be updated via webhook
@@ -54,6 +58,11 @@ async def create_checkout_session(
             status="pending"
         )
         db.add(subscription)
+        db.flush()
+        
+        session_data = await stripe_service.create_checkout_session(
+            current_user, price_id, success_url, cancel_url, client_reference_id=str(subscription.id)
+        )
         db.commit()
         db.refresh(subscription)
         
@@ -169,21 +178,28 @@ async def handle_stripe_webhook(
     request: Request,
     db: Session = Depends(get_db)
 ):
-    """Handle Stripe webhook events"""
+    """Verify and store a Stripe event; the webhook worker applies it"""
+    payload = await request.body()
+    sig_header = request.headers.get("stripe-signature")
+    stripe = stripe_service.client()
     try:
-        payload = await request.body()
-        sig_header = request.headers.get("stripe-signature")
-        
-        result = await stripe_service.handle_webhook_event(payload, sig_header)
-        return result
-        
-    except HTTPException as e:
-        raise e
-    except Exception as e:
+        created = stripe_webhooks.ingest(db, payload, sig_header)
+    except (ValueError, stripe.error.SignatureVerificationError):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Webhook processing failed: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook payload or signature"
         )
+    return {"status": "received" if created else "duplicate"}
+
+@router.post("/webhook/replay")
+async def replay_stripe_webhooks(
+    request: WebhookReplayRequest,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Queue stored Stripe events for processing again"""
+    count = stripe_webhooks.replay(db, request.event_ids, request.since, request.types)
+    return {"replayed": count}
 
 @router.post("/cancel-subscription/{subscription_id}")
 async def cancel_subscription(
@@ -204,6 +220,7 @@ async def cancel_subscription(
         )
     
     if subscription.stripe_subscription_id:
+        stripe = stripe_service.client()
         try:
             # Cancel subscription in Stripe
             stripe.Subscription.delete(subscription.stripe_subscription_id)
@@ -216,6 +233,7 @@ async def cancel_subscription(
     # Update subscription status in database
     subscription.status = "canceled"
     db.commit()
+    entitlement_service.invalidate(current_user.id)
     
     return {"message": "Subscription canceled successfully"}
 
@@ -225,14 +243,13 @@ async def get_subscription_status(
     db: Session = Depends(get_db)
 ):
     """Get current user's subscription status"""
-    active_subscription = db.query(Subscription).filter(
-        Subscription.user_id == current_user.id,
-        Subscription.status == "active"
-    ).first()
+    entitlement = entitlement_service.get(db, current_user.id)
     
     return {
-        "has_active_subscription": active_subscription is not None,
-        "subscription_tier": current_user.subscription_tier,
-        "is_premium": current_user.is_premium,
-        "subscription": active_subscription.dict() if active_subscription else None
+        "has_active_subscription": entitlement.subscription_id is not None,
+        "subscription_tier": entitlement.tier,
+        "is_premium": entitlement.is_premium,
+        "features": sorted(entitlement.features),
+        "expires_at": entitlement.expires_at,
+        "subscription_id": entitlement.subscription_id
     }
@@ -1,15 +1,84 @@
-from fastapi import APIRouter
-from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import BaseModel
+from app.database import get_db
+from app.models.notification_clean import Notification
+from app.auth.middleware import get_current_user_id
 
-router = APIRouter()
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+class MarkReadRequest(BaseModel):
+    notification_ids: Optional[List[int]] = None  # None marks everything read
+
+def _unread_count(db: Session, user_id: int) -> int:
+    # Index-only range on (user_id, is_read, created_at)
+    return db.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    ).scalar() or 0
+
+@router.get("")
+def get_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    before_id: Optional[int] = Query(None, description="id of the last notification on the previous page"),
+    unread_only: bool = False,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+    if before_id is not None:
+        cursor = db.query(Notification.created_at).filter(
+            Notification.id == before_id,
+            Notification.user_id == user_id
+        ).scalar()
+        if cursor is not None:
+            query = query.filter(
+                (Notification.created_at < cursor) |
+                ((Notification.created_at == cursor) & (Notification.id < before_id))
+            )
+    notifications = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit).all()
 
-@router.get("/notifications")
-def get_notifications():
-    now = datetime.utcnow().isoformat()
     return {
         "notifications": [
-            {"id": 1, "type": "like", "title": "New like", "message": "Alice liked your post", "created_at": now, "is_read": False},
-            {"id": 2, "type": "comment", "title": "New comment", "message": "Bob commented: Nice!", "created_at": now, "is_read": False},
-            {"id": 3, "type": "follow", "title": "New follower", "message": "Charlie started following you", "created_at": now, "is_read": True},
-        ]
+            {
+                "id": n.id,
+                "type": n.type,
+                "title": n.title,
+                "message": n.message,
+                "data": n.data or {},
+                "actor_count": n.actor_count or 1,
+                "created_at": n.created_at.isoformat() if n.created_at else None,
+                "is_read": n.is_read,
+            }
+            for n in notifications
+        ],
+        "unread_count": _unread_count(db, user_id),
+        "next_before_id": notifications[-1].id if len(notifications) == limit else None,
     }
+
+@router.get("/unread-count")
+def get_unread_count(
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    return {"unread_count": _unread_count(db, user_id)}
+
+@router.post("/read")
+def mark_notifications_read(
+    request: MarkReadRequest,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    query = db.query(Notification).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    )
+    if request.notification_ids is not None:
+        query = query.filter(Notification.id.in_(request.notification_ids))
+    updated = query.update({Notification.is_read: True}, synchronize_session=False)
+    db.commit()
+    return {"updated": updated, "unread_count": _unread_count(db, user_id)}
@@ -1,57 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
-from app.models.post import Post
-from app.models.comment import Comment
+from app.models.post import Post, Comment
 from app.models.user import User
 from app.schemas.post import PostCreate, PostResponse
-from app.ai.moderation import detect_offensive_content
+from app.ai.moderation_queue import moderation_queue
+from app.auth.middleware import get_current_user, optional_auth, require_feature
+from app.services.notification_service import notification_pipeline
+from app.services.sketch_service import extract_hashtags, sketch_analytics
+from app.services.user_counters import user_counters
+from app.services.visibility import visibility_service
+from app.services.entitlements import entitlement_service
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
 @router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
-def create_post(post: PostCreate, db: Session = Depends(get_db)):
-    # AI moderation
-    if detect_offensive_content(post.content):
-        raise HTTPException(status_code=400, detail="Content flagged as inappropriate by AI.")
-    # Ensure a valid user exists
-    user = db.query(User).first()
-    if not user:
-        user = User(email="demo@trendy.app", username="demo", password="demo")
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
+def create_post(post: PostCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    # AI moderation runs asynchronously; the post stays out of feeds until approved
     new_post = Post(
         user_id=user.id,
         content=post.content,
-        image_url=post.image_url
+        media_urls=post.media_urls,
+        media_type=post.media_type,
+        location=post.location,
+        tags=post.tags,
+        mentions=post.mentions,
+        hashtags=post.hashtags,
+        moderation_status="pending"
     )
     db.add(new_post)
+    user_counters.adjust(db, [user.id], "posts_count", 1)
     db.commit()
     db.refresh(new_post)
+    moderation_queue.enqueue(new_post.id)
+    sketch_analytics.record_hashtags(extract_hashtags(new_post.content))
     return new_post
 
+def _visible_posts(db: Session, current_user: Optional[User]):
+    query = db.query(Post).filter(Post.moderation_status == "approved")
+    hidden = visibility_service.exclude_clause(db, current_user.id if current_user else None, Post.user_id)
+    if hidden is not None:
+        query = query.filter(hidden)
+    return query.order_by(Post.created_at.desc())
+
 @router.get("/", response_model=list[dict])
-def list_posts(db: Session = Depends(get_db)):
-    posts = db.query(Post).order_by(Post.created_at.desc()).all()
+def list_posts(skip: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db),
+               current_user: User = Depends(optional_auth)):
+    posts = _visible_posts(db, current_user).options(joinedload(Post.user)).offset(skip).limit(limit).all()
+    premium_authors = entitlement_service.premium_authors(db, [p.user_id for p in posts], "premium_badge")
     result = []
     for p in posts:
         result.append({
             "id": p.id,
             "content": p.content,
-            "imageUrl": p.image_url,
+            "imageUrl": p.media_urls[0] if p.media_urls else None,
             "createdAt": p.created_at.isoformat() if p.created_at else None,
             "likes": p.likes_count or 0,
-            "comments": len(p.comments) if p.comments is not None else 0,
+            "comments": p.comments_count or 0,
             "username": p.user.username if p.user else "unknown",
             "userPhoto": p.user.avatar_url if p.user and hasattr(p.user, "avatar_url") else None,
+            "isPremiumAuthor": p.user_id in premium_authors,
         })
     return result
 
 @router.get("/all", response_model=list[PostResponse])
-def get_all_posts(db: Session = Depends(get_db)):
-    return db.query(Post).order_by(Post.created_at.desc()).all()
+def get_all_posts(db: Session = Depends(get_db), current_user: User = Depends(optional_auth)):
+    return _visible_posts(db, current_user).all()
+
+@router.get("/hashtags/trending")
+def get_trending_hashtags(days: int = Query(1, ge=1, le=30), limit: int = Query(10, ge=1, le=100),
+                          db: Session = Depends(get_db)):
+    # Count-Min heavy hitters; counts are upper bounds within max_overcount
+    return sketch_analytics.top_items(db, "hashtags", days, limit)
 
 @router.get("/me", response_model=list[PostResponse])
 def get_my_posts(db: Session = Depends(get_db), user_id: int = 1):
@@ -64,18 +85,42 @@ def delete_post(post_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Post not found")
 
     db.delete(post)
+    user_counters.adjust(db, [post.user_id], "posts_count", -1)
     db.commit()
     return {"msg": "Post deleted"}
 
 @router.post("/{post_id}/like")
-def like_post(post_id: int, db: Session = Depends(get_db)):
+def like_post(post_id: int, db: Session = Depends(get_db), current_user: User = Depends(optional_auth)):
     post = db.query(Post).filter(Post.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     post.likes_count = (post.likes_count or 0) + 1
     db.commit()
+    if current_user:
+        notification_pipeline.enqueue(
+            recipient_id=post.user_id, actor_id=current_user.id, type="like", target_type="post", target_id=post.id
+        )
     return {"message": "Post liked"}
 
+@router.post("/{post_id}/view")
+def view_post(post_id: int, db: Session = Depends(get_db), current_user: User = Depends(optional_auth)):
+    creator_id = db.query(Post.user_id).filter(Post.id == post_id).scalar()
+    if creator_id is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    sketch_analytics.record_view(post_id, creator_id, current_user.id if current_user else None)
+    return {"message": "View recorded"}
+
+@router.get("/{post_id}/analytics")
+def get_post_analytics(post_id: int, days: Optional[int] = Query(None, ge=1, le=365), db: Session = Depends(get_db),
+                       current_user: User = Depends(require_feature("advanced_analytics"))):
+    # Premium creators, own posts only; HyperLogLog estimates, relative_error is one standard error
+    creator_id = db.query(Post.user_id).filter(Post.id == post_id).scalar()
+    if creator_id is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    if creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Analytics are only available for your own posts")
+    return sketch_analytics.post_stats(db, post_id, days)
+
 @router.delete("/{post_id}/unlike")
 def unlike_post(post_id: int, db: Session = Depends(get_db)):
     post = db.query(Post).filter(Post.id == post_id).first()
@@ -86,21 +131,18 @@ def unlike_post(post_id: int, db: Session = Depends(get_db)):
     return {"message": "Post unliked"}
 
 @router.post("/{post_id}/comments", status_code=status.HTTP_201_CREATED)
-def add_comment(post_id: int, request: dict, db: Session = Depends(get_db)):
+def add_comment(post_id: int, request: dict, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     post = db.query(Post).filter(Post.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     content = request.get("content") or request.get("text")
     if not content:
         raise HTTPException(status_code=400, detail="Missing comment content")
-    # Ensure an owner user exists
-    user = db.query(User).first()
-    if not user:
-        user = User(email="demo@trendy.app", username="demo", password="demo")
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    comment = Comment(text=content, post_id=post.id, owner_id=user.id)
+    comment = Comment(content=content, post_id=post.id, user_id=user.id)
     db.add(comment)
+    post.comments_count = (post.comments_count or 0) + 1
     db.commit()
-    return {"id": comment.id, "content": comment.text}
+    notification_pipeline.enqueue(
+        recipient_id=post.user_id, actor_id=user.id, type="comment", target_type="post", target_id=post.id
+    )
+    return {"id": comment.id, "content": comment.content}
@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.auth.middleware import get_current_user, get_current_admin_user
 from app.services.revenue_service import revenue_service
+from app.services.sketch_service import sketch_analytics
 from app.models.user import User
 
 router = APIRouter(prefix="/revenue", tags=["revenue-analytics"])
@@ -156,6 +157,8 @@ async def get_revenue_trends(
         # For now, return mock data
         daily_trends = []
         current_date = start_date
+        # One query for every day's site uniques and their HyperLogLog union over the period
+        daily_uniques, unique_viewers = sketch_analytics.site_uniques_by_day(db, start_date.date(), end_date.date())
         
         while current_date <= end_date:
             daily_trends.append({
@@ -163,7 +166,7 @@ async def get_revenue_trends(
                 "total_revenue": 250.75 + (current_date.day * 12.5),
                 "ad_revenue": 150.25 + (current_date.day * 8.2),
                 "subscription_revenue": 100.50 + (current_date.day * 4.3),
-                "active_users": 1250 + (current_date.day * 50),
+                "active_users": daily_uniques.get(current_date.date(), 0),
                 "new_subscriptions": 15 + (current_date.day % 7)
             })
             current_date += timedelta(days=1)
@@ -174,7 +177,10 @@ async def get_revenue_trends(
                 "end_date": end_date,
                 "days": period_days
             },
-            "daily_trends": daily_trends
+            "daily_trends": daily_trends,
+            # HyperLogLog union over the period, not a sum of daily uniques
+            "unique_viewers": unique_viewers,
+            "ad_reach": sketch_analytics.ad_reach(db, start_date.date(), end_date.date())
         }
         
     except Exception as e:
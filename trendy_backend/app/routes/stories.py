@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.enhanced_post import Story
+from app.auth.middleware import get_current_user_id
+from app.services.story_service import story_service
+from app.services.visibility import visibility_service
+
+router = APIRouter(prefix="/stories", tags=["Stories"])
+
+class StoryCreate(BaseModel):
+    content_url: str
+    content_type: str = "image"
+    caption: Optional[str] = None
+    hashtags: List[str] = []
+    mentions: List[str] = []
+    location: Optional[str] = None
+    music_id: Optional[str] = None
+
+def _story_response(story: Story, seen: Optional[bool] = None) -> dict:
+    response = {
+        "id": story.id,
+        "user_id": story.user_id,
+        "content_url": story.content_url,
+        "content_type": story.content_type,
+        "caption": story.caption,
+        "hashtags": story.hashtags,
+        "mentions": story.mentions,
+        "location": story.location,
+        "music_id": story.music_id,
+        "views_count": story.views_count,
+        "expires_at": story.expires_at,
+        "created_at": story.created_at
+    }
+    if seen is not None:
+        response["seen"] = seen
+    return response
+
+@router.post("")
+async def create_story(
+    request: StoryCreate,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    story = story_service.create(db, current_user_id, **request.dict())
+    return _story_response(story)
+
+@router.get("/tray")
+async def get_story_tray(
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Followed users with active stories, unseen first"""
+    return {"tray": story_service.tray(db, current_user_id, limit)}
+
+@router.get("/user/{user_id}")
+async def get_user_stories(
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    if user_id in visibility_service.hidden_authors(db, current_user_id, "blocks"):
+        raise HTTPException(status_code=404, detail="User not found")
+    stories = story_service.active_for_user(db, user_id)
+    seen = story_service.seen_bitsets(db, current_user_id, [user_id]).get(user_id)
+    return {"stories": [_story_response(story, story_service.is_seen(seen, story)) for story in stories]}
+
+@router.post("/{story_id}/seen")
+async def mark_story_seen(
+    story_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    story = db.query(Story).filter(Story.id == story_id).first()
+    if not story or story.is_archived:
+        raise HTTPException(status_code=404, detail="Story not found")
+    if visibility_service.is_blocked_between(db, current_user_id, story.user_id):
+        raise HTTPException(status_code=404, detail="Story not found")
+    first_view = story_service.mark_seen(db, current_user_id, story)
+    return {"story_id": story_id, "first_view": first_view}
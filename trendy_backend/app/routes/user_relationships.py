@@ -12,6 +12,9 @@ from app.database import get_db
 from app.models.user_relationships import UserRelationship, UserBlock, UserMute, RelationshipType
 from app.models.user import User
 from app.auth.middleware import get_current_user
+from app.services.follow_graph import follow_graph
+from app.services.notification_service import notification_pipeline
+from app.services.visibility import visibility_service
 
 router = APIRouter(prefix="/users", tags=["user-relationships"])
 
@@ -73,6 +76,17 @@ async def follow_user(
         db.add(relationship)
         db.commit()
         
+        if request.relationship_type == RelationshipType.FOLLOWING and request.following_id != current_user.id:
+            # The followers table is the canonical edge store for feeds and graph queries
+            follow_graph.follow(db, current_user.id, request.following_id)
+        
+        if request.relationship_type == RelationshipType.FOLLOWING and request.notification_enabled:
+            notification_pipeline.enqueue(
+                recipient_id=request.following_id,
+                actor_id=current_user.id,
+                type="follow"
+            )
+        
         return {"message": "Successfully followed user", "relationship_id": relationship.id}
         
     except HTTPException:
@@ -106,6 +120,7 @@ async def unfollow_user(
         
         db.delete(relationship)
         db.commit()
+        follow_graph.unfollow(db, current_user.id, user_id)
         
         return {"message": "Successfully unfollowed user"}
         
@@ -157,6 +172,7 @@ async def block_user(
         
         db.add(block)
         db.commit()
+        visibility_service.invalidate(current_user.id, request.blocked_id)
         
         return {"message": "Successfully blocked user", "block_id": block.id}
         
@@ -210,6 +226,7 @@ async def mute_user(
         
         db.add(mute)
         db.commit()
+        visibility_service.invalidate(current_user.id)
         
         return {"message": "Successfully muted user", "mute_id": mute.id}
         
@@ -221,6 +238,74 @@ async def mute_user(
             detail=f"Failed to mute user: {str(e)}"
         )
 
+@router.delete("/block/{user_id}", summary="Unblock a user")
+async def unblock_user(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Unblock a user
+    """
+    try:
+        deleted = db.query(UserBlock).filter(
+            UserBlock.blocker_id == current_user.id,
+            UserBlock.blocked_id == user_id
+        ).delete(synchronize_session=False)
+        
+        if not deleted:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Not blocking this user"
+            )
+        
+        db.commit()
+        visibility_service.invalidate(current_user.id, user_id)
+        
+        return {"message": "Successfully unblocked user"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to unblock user: {str(e)}"
+        )
+
+@router.delete("/mute/{user_id}", summary="Unmute a user")
+async def unmute_user(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Unmute a user
+    """
+    try:
+        deleted = db.query(UserMute).filter(
+            UserMute.muter_id == current_user.id,
+            UserMute.muted_id == user_id
+        ).delete(synchronize_session=False)
+        
+        if not deleted:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Not muting this user"
+            )
+        
+        db.commit()
+        visibility_service.invalidate(current_user.id)
+        
+        return {"message": "Successfully unmuted user"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to unmute user: {str(e)}"
+        )
+
 @router.get("/{user_id}/followers", summary="Get user's followers")
 async def get_followers(
     user_id: int,
@@ -7,29 +7,25 @@ import os
 import time
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from functools import lru_cache
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-# Try to import Google Ad Manager, but handle gracefully if not available
-try:
-    import google.auth
-    from google.ads.admanager import AdManagerClient
-    from google.ads.admanager.types import (
-        AdUnitTargeting,
-        LineItemType,
-        Targeting,
-        TechnologyTargeting,
-        UserDomainTargeting,
-    )
-    GOOGLE_ADS_AVAILABLE = True
-except ImportError:
-    GOOGLE_ADS_AVAILABLE = False
-    print("Google Ads library not available. Using mock ad service.")
-
 from app.models.user import User
 from app.models.post import Post
 from app.core.config import get_settings
 
+@lru_cache()
+def google_ads_available() -> bool:
+    """Import the Google Ad Manager SDK on first use; it is optional and slow to import"""
+    try:
+        import google.auth  # noqa: F401
+        from google.ads import admanager  # noqa: F401
+        return True
+    except ImportError:
+        print("Google Ads library not available. Using mock ad service.")
+        return False
+
 class AdService:
     def __init__(self):
         # Initialize AdMob client (placeholder - would use actual AdMob SDK)
@@ -0,0 +1,173 @@
+"""
+Conversation Service for TRENDY App
+Maps messages to conversations and maintains per-user inbox entries so the
+inbox and a conversation page are each a single indexed range scan.
+"""
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.conversation import Conversation, InboxEntry
+from app.models.message import Message
+from app.models.group_member import GroupMember
+
+PREVIEW_LENGTH = 140
+
+
+class ConversationService:
+    def get_or_create_direct(self, db: Session, user_a: int, user_b: int) -> Conversation:
+        """Return the DM conversation for a user pair, creating it on first use"""
+        low, high = sorted((user_a, user_b))
+        pair = db.query(Conversation).filter(
+            Conversation.user_low_id == low,
+            Conversation.user_high_id == high
+        )
+        conversation = pair.first()
+        if conversation:
+            return conversation
+
+        try:
+            with db.begin_nested():
+                conversation = Conversation(kind="direct", user_low_id=low, user_high_id=high)
+                db.add(conversation)
+                db.flush()
+                db.add_all([
+                    InboxEntry(user_id=user_id, conversation_id=conversation.id, unread_count=0)
+                    for user_id in {low, high}
+                ])
+                db.flush()
+        except IntegrityError:
+            # A concurrent first message created the pair; use that row
+            return pair.one()
+        return conversation
+
+    def get_or_create_group(self, db: Session, group_id: int) -> Conversation:
+        """Return the conversation for a group, creating it on first use"""
+        conversation = db.query(Conversation).filter(Conversation.group_id == group_id).first()
+        if conversation:
+            return conversation
+
+        conversation = Conversation(kind="group", group_id=group_id)
+        db.add(conversation)
+        db.flush()
+        return conversation
+
+    def _ensure_group_entries(self, db: Session, conversation: Conversation):
+        """Create inbox entries for group members who joined since the last message"""
+        member_ids = {
+            user_id for (user_id,) in db.query(GroupMember.user_id).filter(
+                GroupMember.group_id == conversation.group_id,
+                GroupMember.is_banned == False
+            )
+        }
+        existing_ids = {
+            user_id for (user_id,) in db.query(InboxEntry.user_id).filter(
+                InboxEntry.conversation_id == conversation.id
+            )
+        }
+        missing = member_ids - existing_ids
+        if missing:
+            db.bulk_insert_mappings(InboxEntry, [
+                {"user_id": user_id, "conversation_id": conversation.id, "unread_count": 0}
+                for user_id in missing
+            ])
+
+    def conversation_for_message(self, db: Session, sender_id: int,
+                                 receiver_id: Optional[int], group_id: Optional[int]) -> Conversation:
+        if group_id:
+            return self.get_or_create_group(db, group_id)
+        return self.get_or_create_direct(db, sender_id, receiver_id)
+
+    def record_message(self, db: Session, conversation: Conversation, message: Message,
+                       count_unread: bool = True):
+        """Advance last-message pointers and unread counts for a new message (caller commits)"""
+        if conversation.kind == "group":
+            self._ensure_group_entries(db, conversation)
+
+        conversation.last_message_id = message.id
+        conversation.last_message_at = message.sent_at
+
+        pointer = {
+            InboxEntry.last_message_id: message.id,
+            InboxEntry.last_message_at: message.sent_at,
+            InboxEntry.last_sender_id: message.sender_id,
+            InboxEntry.last_message_preview: (message.content or "")[:PREVIEW_LENGTH],
+        }
+        # One UPDATE for everyone else (unread + 1) and one for the sender
+        recipients = dict(pointer)
+        if count_unread:
+            recipients[InboxEntry.unread_count] = InboxEntry.unread_count + 1
+        db.query(InboxEntry).filter(
+            InboxEntry.conversation_id == conversation.id,
+            InboxEntry.user_id != message.sender_id
+        ).update(recipients, synchronize_session=False)
+        db.query(InboxEntry).filter(
+            InboxEntry.conversation_id == conversation.id,
+            InboxEntry.user_id == message.sender_id
+        ).update({**pointer, InboxEntry.last_read_message_id: message.id}, synchronize_session=False)
+
+    def get_inbox(self, db: Session, user_id: int, limit: int = 20,
+                  before: Optional[datetime] = None) -> List[InboxEntry]:
+        """Inbox page ordered by most recent activity (range scan on user_id, last_message_at)"""
+        query = db.query(InboxEntry).filter(
+            InboxEntry.user_id == user_id,
+            InboxEntry.last_message_at.isnot(None)
+        )
+        if before is not None:
+            query = query.filter(InboxEntry.last_message_at < before)
+        return query.order_by(InboxEntry.last_message_at.desc()).limit(limit).all()
+
+    def get_inbox_entry(self, db: Session, user_id: int, conversation_id: int) -> Optional[InboxEntry]:
+        return db.query(InboxEntry).filter(
+            InboxEntry.user_id == user_id,
+            InboxEntry.conversation_id == conversation_id
+        ).first()
+
+    def get_page(self, db: Session, conversation_id: int, limit: int = 50,
+                 cursor: Optional[Tuple[datetime, int]] = None) -> List[Message]:
+        """Messages newest-first using a (sent_at, id) keyset cursor"""
+        query = db.query(Message).filter(
+            Message.conversation_id == conversation_id,
+            Message.is_deleted == False,
+            # Expired rows the reaper has not reached yet
+            or_(Message.expires_at.is_(None), Message.expires_at > datetime.utcnow())
+        )
+        if cursor is not None:
+            sent_at, message_id = cursor
+            query = query.filter(or_(
+                Message.sent_at < sent_at,
+                and_(Message.sent_at == sent_at, Message.id < message_id)
+            ))
+        return query.order_by(Message.sent_at.desc(), Message.id.desc()).limit(limit).all()
+
+    def mark_read(self, db: Session, entry: InboxEntry, up_to_message_id: Optional[int] = None):
+        """Reset the unread counter for a participant (caller commits)"""
+        entry.unread_count = 0
+        entry.last_read_message_id = up_to_message_id or entry.last_message_id
+
+    def backfill(self, db: Session, batch_size: int = 1000) -> int:
+        """Assign conversations to legacy messages that predate conversation ids"""
+        updated = 0
+        while True:
+            messages = db.query(Message).filter(
+                Message.conversation_id.is_(None),
+                or_(Message.receiver_id.isnot(None), Message.group_id.isnot(None))
+            ).order_by(Message.id).limit(batch_size).all()
+            if not messages:
+                return updated
+            for message in messages:
+                conversation = self.conversation_for_message(
+                    db, message.sender_id, message.receiver_id, message.group_id
+                )
+                message.conversation_id = conversation.id
+                if conversation.last_message_at is None or message.sent_at >= conversation.last_message_at:
+                    self.record_message(db, conversation, message, count_unread=False)
+            db.commit()
+            updated += len(messages)
+
+
+# Create global instance
+conversation_service = ConversationService()
@@ -1,127 +1,316 @@
 """
 Email Service for TRENDY App
-Handles sending verification emails and other email-related functionalities
+Handles sending verification emails and other email-related functionalities.
+Templates are compiled once at startup into literal/placeholder segments.
+Sending only renders and inserts a row into the email_outbox table; a
+background worker leases due rows in batches, delivers them over one reused
+SMTP connection at a bounded rate, commits each outcome right after the send
+and reschedules failures with exponential backoff. Delivery is at-least-once:
+a crash between a send and its commit resends that one email once the lease
+expires.
 """
 
+import asyncio
+import html
+import logging
 import os
-from fastapi import HTTPException
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from pydantic import EmailStr
-from typing import Dict, Any
-import secrets
+import random
+import re
+import smtplib
+import time
 from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.email_outbox import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+PLACEHOLDER = re.compile(r"{{\s*(\w+)\s*}}")
+
+# name -> (template file, subject)
+EMAILS = {
+    "email_verification": ("email_verification.html", "Email Verification - TRENDY App"),
+    "password_reset": ("password_reset.html", "Password Reset - TRENDY App"),
+    "welcome": ("welcome.html", "Welcome to TRENDY App!"),
+}
+
+
+class CompiledTemplate:
+    """A template split once into literal text and placeholder names"""
+
+    def __init__(self, source: str):
+        parts = PLACEHOLDER.split(source)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, context: Dict[str, Any]) -> str:
+        out = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            if field not in context:
+                raise KeyError(f"Missing template value: {field}")
+            out.append(html.escape(str(context[field])))
+            out.append(literal)
+        return "".join(out)
+
+
+class TemplateCache:
+    def __init__(self, directory: str = TEMPLATE_DIR):
+        self.templates: Dict[str, CompiledTemplate] = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".html"):
+                with open(os.path.join(directory, name), "r") as file:
+                    self.templates[name] = CompiledTemplate(file.read())
+
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        template = self.templates.get(name)
+        if template is None:
+            raise FileNotFoundError(f"Template {name} not found")
+        return template.render(context)
+
+
+class EmailTransport:
+    """Delivery interface; send raises on failure"""
+
+    def send(self, message: EmailMessage):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SMTPTransport(EmailTransport):
+    """Keeps one SMTP session open across messages and reconnects when the server drops it"""
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+                 starttls: bool = True, ssl_tls: bool = False, timeout: float = 30.0,
+                 idle_seconds: float = 60.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.ssl_tls = ssl_tls
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.ssl_tls:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password or "")
+        self.connections_opened += 1
+        return smtp
+
+    def send(self, message: EmailMessage):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_seconds:
+            self.close()
+        for attempt in range(2):
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.send_message(message)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """5xx replies and refused recipients will not succeed on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
 
 class EmailService:
-    def __init__(self):
-        # Configure SMTP settings
-        self.conf = ConnectionConfig(
-            MAIL_USERNAME=os.getenv("MAIL_USERNAME", "test@example.com"),
-            MAIL_PASSWORD=os.getenv("MAIL_PASSWORD", "password"),
-            MAIL_FROM=os.getenv("MAIL_FROM", "test@example.com"),
-            MAIL_PORT=int(os.getenv("MAIL_PORT", 587)),
-            MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.gmail.com"),
-            MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "TRENDY App"),
-            MAIL_STARTTLS=os.getenv("MAIL_STARTTLS", "True").lower() == "true",
-            MAIL_SSL_TLS=os.getenv("MAIL_SSL_TLS", "False").lower() == "true",
-            USE_CREDENTIALS=True,
-            VALIDATE_CERTS=True
+    def __init__(self, transport: EmailTransport, templates: TemplateCache, sender: str, sender_name: str,
+                 verification_url: str, password_reset_url: str, batch_size: int = 50,
+                 max_per_second: float = 10.0, max_attempts: int = 6, retry_base_seconds: float = 30.0,
+                 retry_max_seconds: float = 3600.0, lease_seconds: float = 300.0):
+        self.transport = transport
+        self.templates = templates
+        self.sender = sender
+        self.sender_name = sender_name
+        self.verification_url = verification_url
+        self.password_reset_url = password_reset_url
+        self.batch_size = batch_size
+        self.min_interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self._next_send = 0.0
+
+    # Enqueue (request path)
+
+    def enqueue(self, db: Session, recipient: str, email: str, context: Dict[str, Any]) -> OutboundEmail:
+        template, subject = EMAILS[email]
+        row = OutboundEmail(
+            recipient=recipient,
+            subject=subject,
+            html_body=self.templates.render(template, context),
+            template=email,
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
         )
-    
-    def _render_template(self, template_name: str, context: Dict[str, Any]) -> str:
-        """
-        Render HTML template with context
-        """
-        template_path = f"app/templates/{template_name}"
-        if not os.path.exists(template_path):
-            raise FileNotFoundError(f"Template {template_name} not found")
-        
-        with open(template_path, "r") as file:
-            template = file.read()
-        
-        # Simple template rendering
-        for key, value in context.items():
-            template = template.replace(f"{{{{{key}}}}}", str(value))
-        
-        return template
-    
-    async def send_verification_email(self, email: EmailStr, username: str, token: str):
+        db.add(row)
+        db.commit()
+        return row
+
+    async def send_verification_email(self, db: Session, email: str, username: str, token: str):
         """
-        Send verification email to the user
+        Queue verification email to the user
         """
-        try:
-            verification_link = f"http://localhost:8000/api/v1/auth/email/verify?token={token}"
-            html_content = self._render_template("email_verification.html", {
-                "username": username,
-                "verification_link": verification_link
-            })
-            
-            message = MessageSchema(
-                subject="Email Verification - TRENDY App",
-                recipients=[email],
-                body=html_content,
-                subtype="html"
-            )
-            fm = FastMail(self.conf)
-            await fm.send_message(message)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to send verification email: {str(e)}"
-            )
-    
-    async def send_password_reset_email(self, email: EmailStr, username: str, token: str):
+        self.enqueue(db, email, "email_verification", {
+            "username": username,
+            "verification_link": f"{self.verification_url}?token={token}"
+        })
+
+    async def send_password_reset_email(self, db: Session, email: str, username: str, token: str):
         """
-        Send password reset email to the user
+        Queue password reset email to the user
         """
-        try:
-            reset_link = f"http://localhost:3000/reset-password?token={token}"
-            html_content = self._render_template("password_reset.html", {
-                "username": username,
-                "reset_link": reset_link
-            })
-            
-            message = MessageSchema(
-                subject="Password Reset - TRENDY App",
-                recipients=[email],
-                body=html_content,
-                subtype="html"
-            )
-            fm = FastMail(self.conf)
-            await fm.send_message(message)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to send password reset email: {str(e)}"
-            )
-    
-    async def send_welcome_email(self, email: EmailStr, username: str):
+        self.enqueue(db, email, "password_reset", {
+            "username": username,
+            "reset_link": f"{self.password_reset_url}?token={token}"
+        })
+
+    async def send_welcome_email(self, db: Session, email: str, username: str):
         """
-        Send welcome email to the user
+        Queue welcome email to the user
         """
-        try:
-            html_content = f"""
-            <html>
-            <body>
-                <h1>Welcome to TRENDY App, {username}!</h1>
-                <p>Thank you for joining our community. We're excited to have you on board!</p>
-                <p>Start exploring and connecting with others today.</p>
-                <p>Best regards,<br>The TRENDY Team</p>
-            </body>
-            </html>
-            """
-            
-            message = MessageSchema(
-                subject="Welcome to TRENDY App!",
-                recipients=[email],
-                body=html_content,
-                subtype="html"
-            )
-            fm = FastMail(self.conf)
-            await fm.send_message(message)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to send welcome email: {str(e)}"
-            )
-
-email_service = EmailService()
+        self.enqueue(db, email, "welcome", {"username": username})
+
+    # Delivery (worker)
+
+    def _message(self, row: OutboundEmail) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = row.subject
+        message["From"] = formataddr((self.sender_name, self.sender))
+        message["To"] = row.recipient
+        message.set_content(row.html_body, subtype="html")
+        return message
+
+    def _throttle(self):
+        """Space sends at least min_interval apart"""
+        now = time.monotonic()
+        if self._next_send > now:
+            time.sleep(self._next_send - now)
+        self._next_send = max(now, self._next_send) + self.min_interval
+
+    def _backoff(self, attempts: int) -> timedelta:
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    def _claim(self, db: Session) -> List[OutboundEmail]:
+        """Lease a batch of due rows as "sending" and commit before any SMTP traffic"""
+        now = datetime.utcnow()
+        rows: List[OutboundEmail] = db.query(OutboundEmail).filter(
+            OutboundEmail.status.in_(("pending", "sending")),
+            OutboundEmail.next_attempt_at <= now
+        ).order_by(OutboundEmail.next_attempt_at).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        # A "sending" row whose lease expired belonged to a worker that died mid-batch
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        for row in rows:
+            row.status = "sending"
+            row.next_attempt_at = lease_until
+            row.attempts += 1
+        db.commit()
+        return rows
+
+    def deliver_batch(self, db: Session) -> Dict[str, int]:
+        """Send one batch of due emails and commit the outcome of each as soon as it is known"""
+        stats = {"sent": 0, "retrying": 0, "failed": 0}
+        for row in self._claim(db):
+            self._throttle()
+            try:
+                self.transport.send(self._message(row))
+            except Exception as e:
+                row.last_error = str(e)[:1000]
+                if is_permanent_failure(e) or row.attempts >= self.max_attempts:
+                    row.status = "failed"
+                    stats["failed"] += 1
+                    logger.error(f"Email {row.id} to {row.recipient} failed after {row.attempts} attempts: {str(e)}")
+                else:
+                    row.status = "pending"
+                    row.next_attempt_at = datetime.utcnow() + self._backoff(row.attempts)
+                    stats["retrying"] += 1
+            else:
+                row.status = "sent"
+                row.sent_at = datetime.utcnow()
+                row.last_error = None
+                stats["sent"] += 1
+            db.commit()
+        return stats
+
+    async def run_forever(self, session_factory, interval_seconds: float = 2.0):
+        """Background loop; drains full batches back to back, then waits for the interval"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.deliver_batch(db)
+            finally:
+                db.close()
+
+        while True:
+            handled = 0
+            try:
+                handled = sum((await loop.run_in_executor(None, tick)).values())
+            except Exception as e:
+                logger.error(f"Email delivery failed: {str(e)}")
+            if handled < self.batch_size:
+                await asyncio.sleep(interval_seconds)
+
+    def shutdown(self):
+        self.transport.close()
+
+
+# Create global instance
+settings = get_settings()
+email_service = EmailService(
+    transport=SMTPTransport(
+        host=settings.mail_server,
+        port=settings.mail_port,
+        username=settings.mail_username,
+        password=settings.mail_password,
+        starttls=settings.mail_starttls,
+        ssl_tls=settings.mail_ssl_tls
+    ),
+    templates=TemplateCache(),
+    sender=settings.mail_from,
+    sender_name=settings.mail_from_name,
+    verification_url=settings.email_verification_url,
+    password_reset_url=settings.password_reset_url,
+    batch_size=settings.email_batch_size,
+    max_per_second=settings.email_rate_per_second,
+    max_attempts=settings.email_max_attempts,
+    retry_base_seconds=settings.email_retry_base_seconds,
+    retry_max_seconds=settings.email_retry_max_seconds,
+    lease_seconds=settings.email_lease_seconds
+)
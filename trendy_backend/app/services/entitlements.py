@@ -0,0 +1,171 @@
+"""
+Entitlement Service for TRENDY App
+Resolves what a user's plan unlocks from User.subscription_tier /
+subscription_expires_at (manual and store grants) and their active Stripe
+subscriptions, whichever ranks highest. Results are cached per user until the
+earliest period end or grant expiry among their sources, capped by a TTL so
+other workers' writes show up. The webhook worker and cancellations
+invalidate affected users, and lists of authors are resolved with one pair of
+IN queries for every cache miss.
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.user import User
+from app.models.subscription_corrected import Subscription
+from app.services.follow_graph import AdjacencyCache
+
+TIER_RANK = {"free": 0, "basic": 1, "premium": 2}
+
+TIER_FEATURES = {
+    "free": frozenset(),
+    "basic": frozenset({"ad_free", "hd_uploads"}),
+    "premium": frozenset({"ad_free", "hd_uploads", "premium_badge", "exclusive_content", "advanced_analytics"}),
+}
+
+# past_due keeps access while Stripe retries the payment
+ACTIVE_STATUSES = ("active", "trialing", "past_due")
+
+
+class Entitlement(NamedTuple):
+    tier: str
+    features: frozenset
+    expires_at: Optional[datetime]  # end of the period or grant that provides the tier; None if open-ended
+    subscription_id: Optional[int]  # local Subscription row providing the tier, if any
+    valid_until: float  # monotonic time after which the entry must be resolved again
+
+    @property
+    def is_premium(self) -> bool:
+        return self.tier != "free"
+
+    def allows(self, feature: str) -> bool:
+        return feature in self.features
+
+
+def parse_price_tiers(value: str) -> Dict[str, str]:
+    """'price_abc=premium,price_def=basic' -> {'price_abc': 'premium', 'price_def': 'basic'}"""
+    tiers = {}
+    for item in value.split(","):
+        price_id, _, tier = item.strip().partition("=")
+        if price_id and tier.strip() in TIER_RANK:
+            tiers[price_id] = tier.strip()
+    return tiers
+
+
+class EntitlementService:
+    def __init__(self, price_tiers: Optional[Dict[str, str]] = None, max_cached_users: int = 100000,
+                 ttl_seconds: float = 300.0):
+        self.price_tiers = price_tiers or {}
+        self.cache = AdjacencyCache(max_cached_users, ttl_seconds)
+
+    def tier_for_plan(self, plan_id: Optional[str]) -> str:
+        """Tier a Stripe price (or a plain tier name stored as plan_id) grants"""
+        if plan_id in TIER_RANK:
+            return plan_id
+        return self.price_tiers.get(plan_id, "free")
+
+    @staticmethod
+    def _naive(value: Optional[datetime]) -> Optional[datetime]:
+        return value.replace(tzinfo=None) if value is not None and value.tzinfo else value
+
+    def _resolve(self, grant, subscriptions: List, now: datetime) -> Entitlement:
+        tier, expires_at, subscription_id = "free", None, None
+        expiries = []
+
+        for sub_id, plan_id, period_end in subscriptions:
+            period_end = self._naive(period_end)
+            if period_end is not None and period_end <= now:
+                continue  # the period-end webhook has not landed yet
+            if period_end is not None:
+                expiries.append(period_end)
+            sub_tier = self.tier_for_plan(plan_id)
+            if subscription_id is None or TIER_RANK[sub_tier] > TIER_RANK[tier]:
+                tier, expires_at, subscription_id = sub_tier, period_end, sub_id
+
+        # A grant only wins when it ranks above every subscription
+        if grant is not None:
+            grant_tier, grant_expires = grant[0] or "free", self._naive(grant[1])
+            if grant_tier in TIER_RANK and (grant_expires is None or grant_expires > now):
+                if grant_expires is not None:
+                    expiries.append(grant_expires)
+                if TIER_RANK[grant_tier] > TIER_RANK[tier]:
+                    tier, expires_at = grant_tier, grant_expires
+
+        valid_until = float("inf")
+        if expiries:
+            valid_until = time.monotonic() + (min(expiries) - now).total_seconds()
+        return Entitlement(tier, TIER_FEATURES[tier], expires_at, subscription_id, valid_until)
+
+    def _load(self, db: Session, user_ids: List[int]) -> Dict[int, Entitlement]:
+        now = datetime.utcnow()
+        result = {}
+        for start in range(0, len(user_ids), 1000):
+            chunk = user_ids[start:start + 1000]
+            grants = {
+                user_id: (tier, expires_at)
+                for user_id, tier, expires_at in db.query(
+                    User.id, User.subscription_tier, User.subscription_expires_at
+                ).filter(User.id.in_(chunk))
+            }
+            subscriptions: Dict[int, List] = {user_id: [] for user_id in chunk}
+            for user_id, sub_id, plan_id, period_end in db.query(
+                Subscription.user_id, Subscription.id, Subscription.plan_id, Subscription.current_period_end
+            ).filter(
+                Subscription.user_id.in_(chunk),
+                Subscription.status.in_(ACTIVE_STATUSES)
+            ):
+                subscriptions[user_id].append((sub_id, plan_id, period_end))
+            for user_id in chunk:
+                result[user_id] = self._resolve(grants.get(user_id), subscriptions[user_id], now)
+        return result
+
+    # Read paths
+
+    def get_many(self, db: Session, user_ids: Iterable[int]) -> Dict[int, Entitlement]:
+        """Entitlements for every user id, e.g. all authors on a feed page"""
+        result, missing = {}, []
+        now = time.monotonic()
+        for user_id in set(user_ids):
+            cached = self.cache.get(user_id)
+            if cached is None or now >= cached.valid_until:
+                missing.append(user_id)
+            else:
+                result[user_id] = cached
+        if missing:
+            loaded = self._load(db, missing)
+            for user_id, entitlement in loaded.items():
+                self.cache.put(user_id, entitlement)
+            result.update(loaded)
+        return result
+
+    def get(self, db: Session, user_id: int) -> Entitlement:
+        return self.get_many(db, [user_id])[user_id]
+
+    def has_feature(self, db: Session, user_id: int, feature: str) -> bool:
+        return self.get(db, user_id).allows(feature)
+
+    def premium_authors(self, db: Session, author_ids: Iterable[int], feature: Optional[str] = None) -> frozenset:
+        """Author ids with a paid tier (or with feature, if given), from one batched lookup"""
+        return frozenset(
+            user_id for user_id, entitlement in self.get_many(db, author_ids).items()
+            if (entitlement.allows(feature) if feature else entitlement.is_premium)
+        )
+
+    # Invalidation
+
+    def invalidate(self, *user_ids: int):
+        """Call after any subscription or tier change for these users"""
+        self.cache.invalidate(*user_ids)
+
+
+# Create global instance
+settings = get_settings()
+entitlement_service = EntitlementService(
+    price_tiers=parse_price_tiers(settings.stripe_price_tiers),
+    max_cached_users=settings.entitlement_cache_users,
+    ttl_seconds=settings.entitlement_cache_ttl_seconds
+)
@@ -0,0 +1,364 @@
+"""
+Follow Graph Service for TRENDY App
+All follow edges live in the canonical followers table (follower_id,
+following_id) with a unique forward index and a reverse index. Adjacency is
+cached per worker: a frozenset of followees for O(1) is_following checks and
+a compact sorted int array of followers, both expiring after a short TTL.
+"""
+
+import logging
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.post import Follower
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Rows per IN list / multi-row INSERT
+BATCH_SIZE = 1000
+
+
+class AdjacencyCache:
+    """Bounded LRU of per-user adjacency with a TTL so other workers' writes show up"""
+
+    def __init__(self, max_users: int = 50000, ttl_seconds: float = 60.0):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id: int, value):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids: int):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FollowGraphService:
+    def __init__(self, max_cached_users: int = 50000, ttl_seconds: float = 60.0, max_fanout: int = 500):
+        self.following_cache = AdjacencyCache(max_cached_users, ttl_seconds)
+        self.followers_cache = AdjacencyCache(max_cached_users, ttl_seconds)
+        # Cap on first-hop edges expanded per user when computing suggestions
+        self.max_fanout = max_fanout
+
+    # Adjacency loading
+
+    def _load_following(self, db: Session, user_ids: Iterable[int]) -> Dict[int, frozenset]:
+        """Followee sets for user_ids, one IN query for every cache miss"""
+        result, missing = {}, []
+        for user_id in set(user_ids):
+            cached = self.following_cache.get(user_id)
+            if cached is None:
+                missing.append(user_id)
+            else:
+                result[user_id] = cached
+        for start in range(0, len(missing), 1000):
+            chunk = missing[start:start + 1000]
+            edges: Dict[int, List[int]] = {user_id: [] for user_id in chunk}
+            for follower_id, following_id in db.query(Follower.follower_id, Follower.following_id).filter(
+                Follower.follower_id.in_(chunk)
+            ):
+                edges[follower_id].append(following_id)
+            for user_id, followees in edges.items():
+                result[user_id] = frozenset(followees)
+                self.following_cache.put(user_id, result[user_id])
+        return result
+
+    def following(self, db: Session, user_id: int) -> frozenset:
+        return self._load_following(db, [user_id])[user_id]
+
+    def followers(self, db: Session, user_id: int) -> array:
+        """Sorted follower ids (8 bytes per edge), served by the reverse index"""
+        cached = self.followers_cache.get(user_id)
+        if cached is None:
+            cached = array("q", sorted(
+                follower_id for (follower_id,) in db.query(Follower.follower_id).filter(
+                    Follower.following_id == user_id
+                )
+            ))
+            self.followers_cache.put(user_id, cached)
+        return cached
+
+    # Queries
+
+    def is_following(self, db: Session, follower_id: int, following_id: int) -> bool:
+        return following_id in self.following(db, follower_id)
+
+    def is_following_many(self, db: Session, follower_id: int, user_ids: Iterable[int]) -> Dict[int, bool]:
+        followees = self.following(db, follower_id)
+        return {user_id: user_id in followees for user_id in user_ids}
+
+    def mutual_connections(self, db: Session, viewer_id: int, user_id: int) -> List[int]:
+        """Users the viewer follows who also follow user_id ("followed by A and B")"""
+        followees = self.following(db, viewer_id)
+        return [follower_id for follower_id in self.followers(db, user_id) if follower_id in followees]
+
+    def friends(self, db: Session, user_id: int) -> List[int]:
+        """Mutual follows, read from the maintained is_mutual flag"""
+        return [following_id for (following_id,) in db.query(Follower.following_id).filter(
+            Follower.follower_id == user_id,
+            Follower.is_mutual == True
+        )]
+
+    def suggestions(self, db: Session, user_ids: Iterable[int], limit: int = 20) -> Dict[int, List[Dict[str, int]]]:
+        """Batch "people you may know": rank 2-hop followees by how many of your followees follow them"""
+        user_ids = list(set(user_ids))
+        first_hop = self._load_following(db, user_ids)
+        expanded = {user_id: sorted(first_hop[user_id])[:self.max_fanout] for user_id in user_ids}
+        second_hop = self._load_following(db, {f for followees in expanded.values() for f in followees})
+
+        results = {}
+        for user_id in user_ids:
+            already = first_hop[user_id]
+            scores = Counter()
+            for followee in expanded[user_id]:
+                scores.update(second_hop.get(followee, ()))
+            for candidate in list(scores):
+                if candidate == user_id or candidate in already:
+                    del scores[candidate]
+            results[user_id] = [
+                {"user_id": candidate, "mutual_count": count}
+                for candidate, count in scores.most_common(limit)
+            ]
+        return results
+
+    # Writes
+
+    def _set_mutual(self, db: Session, a: int, b: int, value: bool):
+        from app.models.user_relationships import UserRelationship
+
+        pair = or_(
+            and_(Follower.follower_id == a, Follower.following_id == b),
+            and_(Follower.follower_id == b, Follower.following_id == a),
+        )
+        db.query(Follower).filter(pair).update({Follower.is_mutual: value}, synchronize_session=False)
+        db.query(UserRelationship).filter(or_(
+            and_(UserRelationship.follower_id == a, UserRelationship.following_id == b),
+            and_(UserRelationship.follower_id == b, UserRelationship.following_id == a),
+        )).update({UserRelationship.is_mutual: value}, synchronize_session=False)
+
+    @staticmethod
+    def _adjust_counters(db: Session, follower_id: int, following_ids: List[int], delta: int):
+        """Counter updates in the same transaction as the edge change"""
+        from app.services.user_counters import user_counters
+
+        user_counters.adjust(db, following_ids, "followers_count", delta)
+        user_counters.adjust(db, [follower_id], "following_count", delta * len(following_ids))
+
+    def follow(self, db: Session, follower_id: int, following_id: int) -> bool:
+        """Insert the edge and maintain is_mutual and counters; False if it already existed"""
+        if follower_id == following_id:
+            raise ValueError("Cannot follow yourself")
+        try:
+            with db.begin_nested():
+                db.add(Follower(follower_id=follower_id, following_id=following_id, is_mutual=False))
+        except IntegrityError:
+            return False
+
+        reverse = db.query(Follower.id).filter(
+            Follower.follower_id == following_id,
+            Follower.following_id == follower_id
+        ).first()
+        if reverse:
+            self._set_mutual(db, follower_id, following_id, True)
+        self._adjust_counters(db, follower_id, [following_id], 1)
+        db.commit()
+        self.following_cache.invalidate(follower_id)
+        self.followers_cache.invalidate(following_id)
+        return True
+
+    def unfollow(self, db: Session, follower_id: int, following_id: int) -> bool:
+        deleted = db.query(Follower).filter(
+            Follower.follower_id == follower_id,
+            Follower.following_id == following_id
+        ).delete(synchronize_session=False)
+        if not deleted:
+            return False
+        self._set_mutual(db, follower_id, following_id, False)
+        self._adjust_counters(db, follower_id, [following_id], -1)
+        db.commit()
+        self.following_cache.invalidate(follower_id)
+        self.followers_cache.invalidate(following_id)
+        return True
+
+    # Batch writes
+
+    @staticmethod
+    def _insert_ignoring_duplicates(db: Session, rows: List[Dict[str, object]]) -> List[int]:
+        """INSERT ... ON CONFLICT DO NOTHING on the unique edge index; following ids actually inserted"""
+        dialect = db.bind.dialect.name
+        inserted: List[int] = []
+        for start in range(0, len(rows), BATCH_SIZE):
+            chunk = rows[start:start + BATCH_SIZE]
+            if dialect == "postgresql":
+                # One multi-row statement; RETURNING names the rows that did not conflict
+                inserted.extend(db.execute(postgresql.insert(Follower).values(chunk).on_conflict_do_nothing(
+                    index_elements=["follower_id", "following_id"]
+                ).returning(Follower.following_id)).scalars())
+                continue
+            if dialect == "sqlite":
+                # No RETURNING on SQLite here; the per-row rowcount tells which rows went in
+                statement = sqlite.insert(Follower).on_conflict_do_nothing(
+                    index_elements=["follower_id", "following_id"]
+                )
+                for row in chunk:
+                    if db.execute(statement.values(**row)).rowcount:
+                        inserted.append(row["following_id"])
+                continue
+            # Other backends: insert row by row, skipping rows another request inserted first
+            for row in chunk:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(Follower).values(**row))
+                    inserted.append(row["following_id"])
+                except IntegrityError:
+                    pass
+        return inserted
+
+    @staticmethod
+    def _delete_edges(db: Session, follower_id: int, following_ids: List[int]) -> List[int]:
+        """Delete the edges; following ids actually deleted"""
+        dialect = db.bind.dialect.name
+        deleted: List[int] = []
+        for start in range(0, len(following_ids), BATCH_SIZE):
+            chunk = following_ids[start:start + BATCH_SIZE]
+            if dialect == "postgresql":
+                deleted.extend(db.execute(Follower.__table__.delete().where(
+                    Follower.follower_id == follower_id,
+                    Follower.following_id.in_(chunk)
+                ).returning(Follower.following_id)).scalars())
+                continue
+            for following_id in chunk:
+                if db.query(Follower).filter(
+                    Follower.follower_id == follower_id,
+                    Follower.following_id == following_id
+                ).delete(synchronize_session=False):
+                    deleted.append(following_id)
+        return deleted
+
+    def _set_mutual_many(self, db: Session, user_id: int, other_ids: List[int], value: bool):
+        from app.models.user_relationships import UserRelationship
+
+        for start in range(0, len(other_ids), BATCH_SIZE):
+            chunk = other_ids[start:start + BATCH_SIZE]
+            pairs = or_(
+                and_(Follower.follower_id == user_id, Follower.following_id.in_(chunk)),
+                and_(Follower.following_id == user_id, Follower.follower_id.in_(chunk)),
+            )
+            db.query(Follower).filter(pairs).update({Follower.is_mutual: value}, synchronize_session=False)
+            db.query(UserRelationship).filter(or_(
+                and_(UserRelationship.follower_id == user_id, UserRelationship.following_id.in_(chunk)),
+                and_(UserRelationship.following_id == user_id, UserRelationship.follower_id.in_(chunk)),
+            )).update({UserRelationship.is_mutual: value}, synchronize_session=False)
+
+    def _followers_among(self, db: Session, user_id: int, candidate_ids: List[int]) -> set:
+        """Which of candidate_ids follow user_id, via the reverse index"""
+        result = set()
+        for start in range(0, len(candidate_ids), BATCH_SIZE):
+            chunk = candidate_ids[start:start + BATCH_SIZE]
+            result.update(follower_id for (follower_id,) in db.query(Follower.follower_id).filter(
+                Follower.following_id == user_id,
+                Follower.follower_id.in_(chunk)
+            ))
+        return result
+
+    def follow_many(self, db: Session, follower_id: int, target_ids: Iterable[int]) -> Dict[int, str]:
+        """Follow every target in one transaction; status per target id.
+
+        Statuses: followed, already_following, self. Callers resolve unknown ids first.
+        """
+        results: Dict[int, str] = {}
+        self.following_cache.invalidate(follower_id)
+        current = self.following(db, follower_id)
+        new_ids = []
+        for target_id in dict.fromkeys(target_ids):
+            if target_id == follower_id:
+                results[target_id] = "self"
+            elif target_id in current:
+                results[target_id] = "already_following"
+            else:
+                results[target_id] = "followed"
+                new_ids.append(target_id)
+        if not new_ids:
+            return results
+
+        inserted = self._insert_ignoring_duplicates(db, [
+            {"follower_id": follower_id, "following_id": target_id, "is_mutual": False} for target_id in new_ids
+        ])
+        # Edges a concurrent request inserted first were already followed; only ours move the counters
+        for target_id in set(new_ids).difference(inserted):
+            results[target_id] = "already_following"
+        if inserted:
+            mutual = sorted(self._followers_among(db, follower_id, inserted))
+            if mutual:
+                self._set_mutual_many(db, follower_id, mutual, True)
+            # One UPDATE per counter for the whole batch
+            self._adjust_counters(db, follower_id, inserted, 1)
+        db.commit()
+        self.following_cache.invalidate(follower_id)
+        self.followers_cache.invalidate(*new_ids)
+        return results
+
+    def unfollow_many(self, db: Session, follower_id: int, target_ids: Iterable[int]) -> Dict[int, str]:
+        """Unfollow every target in one transaction; status per target id (unfollowed, not_following)"""
+        self.following_cache.invalidate(follower_id)
+        current = self.following(db, follower_id)
+        results = {}
+        removed = []
+        for target_id in dict.fromkeys(target_ids):
+            if target_id in current:
+                results[target_id] = "unfollowed"
+                removed.append(target_id)
+            else:
+                results[target_id] = "not_following"
+        if not removed:
+            return results
+
+        deleted = self._delete_edges(db, follower_id, removed)
+        # Edges a concurrent request removed first were no longer followed; only ours move the counters
+        for target_id in set(removed).difference(deleted):
+            results[target_id] = "not_following"
+        if deleted:
+            self._set_mutual_many(db, follower_id, deleted, False)
+            self._adjust_counters(db, follower_id, deleted, -1)
+        db.commit()
+        self.following_cache.invalidate(follower_id)
+        self.followers_cache.invalidate(*removed)
+        return results
+
+
+# Create global instance
+settings = get_settings()
+follow_graph = FollowGraphService(
+    max_cached_users=settings.follow_graph_cache_users,
+    ttl_seconds=settings.follow_graph_cache_ttl_seconds
+)
@@ -0,0 +1,276 @@
+"""
+Media Upload Service for TRENDY App
+Uploads are streamed chunk by chunk into a staging file while being hashed,
+so memory per upload is one chunk regardless of file size. The SHA-256 is the
+dedup key: a second upload of the same bytes returns the existing asset.
+Image renditions (a square thumbnail and width-bounded WebP versions) are
+produced with Pillow in a process pool, off the event loop and the GIL.
+Files are served through HMAC-signed URLs whose expiry is aligned to a fixed
+window, so the same object keeps the same URL (and cache entry) per window.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.media_asset import MediaAsset
+from app.services.media_storage import MediaStorage, create_storage
+
+logger = logging.getLogger(__name__)
+
+# Pillow is only imported by render_image, inside the worker processes
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+if not PIL_AVAILABLE:
+    logger.warning("Pillow not available, uploaded images will be stored without renditions")
+
+IMAGE_TYPES = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+VIDEO_TYPES = {"video/mp4": ".mp4", "video/quicktime": ".mov", "video/webm": ".webm"}
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def content_key(sha256: str, suffix: str, prefix: str = "originals") -> str:
+    """Content-addressed storage key, fanned out over two directory levels"""
+    return f"{prefix}/{sha256[:2]}/{sha256[2:4]}/{sha256}{suffix}"
+
+
+def render_image(source_path: str, output_dir: str, widths: List[int], thumbnail_size: int) -> Dict[str, object]:
+    """Runs in a worker process: write renditions of source_path into output_dir"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder downscale while decoding when only smaller outputs are needed
+        image.draft("RGB", (max(widths + [thumbnail_size]),) * 2)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        width, height = image.size
+        renditions = []
+
+        thumbnail = ImageOps.fit(image, (thumbnail_size, thumbnail_size))
+        path = os.path.join(output_dir, "thumb.webp")
+        thumbnail.save(path, "WEBP", quality=80)
+        renditions.append({"name": "thumb", "path": path, "width": thumbnail_size, "height": thumbnail_size})
+
+        for target in sorted(set(widths)):
+            if target >= width:
+                break  # never upscale
+            resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+            path = os.path.join(output_dir, f"w{target}.webp")
+            resized.save(path, "WEBP", quality=80)
+            renditions.append({"name": f"w{target}", "path": path, "width": resized.width, "height": resized.height})
+    return {"width": width, "height": height, "renditions": renditions}
+
+
+class MediaService:
+    def __init__(self, storage: MediaStorage, max_upload_bytes: int, chunk_size: int, widths: List[int],
+                 thumbnail_size: int, workers: int, signing_key: str, url_ttl_seconds: int, public_url: str):
+        self.storage = storage
+        self.max_upload_bytes = max_upload_bytes
+        self.chunk_size = chunk_size
+        self.widths = widths
+        self.thumbnail_size = thumbnail_size
+        self.workers = workers
+        self._signing_key = signing_key.encode("utf-8")
+        self.url_ttl_seconds = url_ttl_seconds
+        self.public_url = public_url.rstrip("/")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks = set()
+
+    # Ingest
+
+    async def chunks_from_upload(self, upload) -> AsyncIterator[bytes]:
+        """Read an UploadFile (already spooled to disk by the multipart parser) one chunk at a time"""
+        while True:
+            chunk = await upload.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    async def _stage(self, chunks: AsyncIterator[bytes]) -> Tuple[str, str, int]:
+        """Stream chunks to a staging file, hashing as we go; (path, sha256, size)"""
+        hasher = hashlib.sha256()
+        size = 0
+        staging = self.storage.staging_file()
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > self.max_upload_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {self.max_upload_bytes} bytes")
+                hasher.update(chunk)
+                staging.write(chunk)
+            staging.close()
+        except BaseException:
+            staging.close()
+            os.remove(staging.name)
+            raise
+        return staging.name, hasher.hexdigest(), size
+
+    async def ingest(self, db: Session, chunks: AsyncIterator[bytes], content_type: str,
+                     owner_id: Optional[int], session_factory) -> Tuple[MediaAsset, bool]:
+        """Store an upload once per content hash; (asset, created)"""
+        content_type = (content_type or "").split(";")[0].strip().lower()
+        extension = IMAGE_TYPES.get(content_type) or VIDEO_TYPES.get(content_type)
+        if extension is None:
+            raise UnsupportedMediaType(f"Unsupported media type: {content_type or 'unknown'}")
+
+        path, sha256, size = await self._stage(chunks)
+        existing = db.query(MediaAsset).filter(MediaAsset.sha256 == sha256).first()
+        if existing:
+            os.remove(path)
+            return existing, False
+
+        key = content_key(sha256, extension)
+        self.storage.put_file(path, key)
+        is_image = content_type in IMAGE_TYPES
+        asset = MediaAsset(
+            sha256=sha256,
+            owner_id=owner_id,
+            content_type=content_type,
+            size_bytes=size,
+            storage_key=key,
+            status="processing" if is_image else "ready",
+            renditions=[]
+        )
+        try:
+            with db.begin_nested():
+                db.add(asset)
+            db.commit()
+        except IntegrityError:
+            # The same bytes were uploaded concurrently; both share the stored object
+            return db.query(MediaAsset).filter(MediaAsset.sha256 == sha256).first(), False
+        if is_image:
+            self.schedule_renditions(asset.id, session_factory)
+        return asset, True
+
+    # Renditions
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def schedule_renditions(self, asset_id: int, session_factory):
+        task = asyncio.get_event_loop().create_task(self._process(asset_id, session_factory))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, asset_id: int, session_factory):
+        loop = asyncio.get_event_loop()
+        output_dir = tempfile.mkdtemp(prefix="renditions-")
+        db = session_factory()
+        try:
+            asset = db.query(MediaAsset).filter(MediaAsset.id == asset_id).first()
+            if asset is None or asset.status != "processing":
+                return
+            if not PIL_AVAILABLE:
+                asset.status = "ready"
+                db.commit()
+                return
+            with self.storage.local_copy(asset.storage_key) as source:
+                result = await loop.run_in_executor(
+                    self._executor(), render_image, source, output_dir, self.widths, self.thumbnail_size
+                )
+            renditions = []
+            for rendition in result["renditions"]:
+                path = rendition.pop("path")
+                key = f"renditions/{asset.sha256[:2]}/{asset.sha256[2:4]}/{asset.sha256}/{rendition['name']}.webp"
+                rendition.update(key=key, content_type="image/webp", size_bytes=os.path.getsize(path))
+                self.storage.put_file(path, key)
+                renditions.append(rendition)
+            asset.width, asset.height = result["width"], result["height"]
+            asset.renditions = renditions
+            asset.status = "ready"
+            db.commit()
+        except Exception as e:
+            logger.error(f"Rendition generation failed for media {asset_id}: {str(e)}")
+            db.rollback()
+            db.query(MediaAsset).filter(MediaAsset.id == asset_id).update(
+                {MediaAsset.status: "failed", MediaAsset.error: str(e)[:1000]}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            db.close()
+
+    def requeue_processing(self, db: Session, session_factory) -> int:
+        """Reschedule images left in processing by a previous process"""
+        asset_ids = [asset_id for (asset_id,) in db.query(MediaAsset.id).filter(MediaAsset.status == "processing")]
+        for asset_id in asset_ids:
+            self.schedule_renditions(asset_id, session_factory)
+        return len(asset_ids)
+
+    def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    # Signed URLs
+
+    def _signature(self, key: str, expires: int) -> str:
+        return hmac.new(self._signing_key, f"{key}:{expires}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def sign_url(self, key: str, now: Optional[float] = None) -> str:
+        """URL valid for at least url_ttl_seconds; identical for every request in the same window"""
+        ttl = self.url_ttl_seconds
+        expires = (int(now if now is not None else time.time()) // ttl + 2) * ttl
+        return f"{self.public_url}/media/files/{key}?exp={expires}&sig={self._signature(key, expires)}"
+
+    def verify(self, key: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, expires), signature)
+
+    def describe(self, asset: MediaAsset) -> Dict[str, object]:
+        return {
+            "id": asset.id,
+            "sha256": asset.sha256,
+            "content_type": asset.content_type,
+            "size_bytes": asset.size_bytes,
+            "status": asset.status,
+            "width": asset.width,
+            "height": asset.height,
+            "url": self.sign_url(asset.storage_key),
+            "renditions": {
+                rendition["name"]: {
+                    "url": self.sign_url(rendition["key"]),
+                    "width": rendition["width"],
+                    "height": rendition["height"]
+                }
+                for rendition in asset.renditions or []
+            }
+        }
+
+
+# Create global instance
+settings = get_settings()
+media_service = MediaService(
+    storage=create_storage(settings.media_storage_backend, settings.media_root),
+    max_upload_bytes=settings.media_max_upload_bytes,
+    chunk_size=settings.media_chunk_size,
+    widths=settings.media_rendition_widths,
+    thumbnail_size=settings.media_thumbnail_size,
+    workers=settings.media_workers,
+    signing_key=settings.media_signing_key or settings.secret_key,
+    url_ttl_seconds=settings.media_url_ttl_seconds,
+    public_url=settings.media_public_url
+)
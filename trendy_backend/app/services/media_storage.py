@@ -0,0 +1,83 @@
+"""
+Media storage backends for TRENDY App
+The upload pipeline only talks to MediaStorage: files are staged on local
+disk, then committed under a content-addressed key. LocalMediaStorage keeps
+everything under one directory; an object-store backend implements the same
+methods (put_file as a multipart upload, local_copy as a ranged download).
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class MediaStorage:
+    def staging_file(self):
+        """A named temporary file on local disk for streaming an upload into"""
+        raise NotImplementedError
+
+    def put_file(self, local_path: str, key: str):
+        """Move a finished local file into storage under key"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """A local filesystem path holding the object for the duration of the block"""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path the object can be served from directly, if the backend has one"""
+        return None
+
+
+class LocalMediaStorage(MediaStorage):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._staging = os.path.join(self.root, ".staging")
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid media key: {key}")
+        return path
+
+    def staging_file(self):
+        os.makedirs(self._staging, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self._staging, delete=False)
+
+    def put_file(self, local_path: str, key: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Same filesystem as the staging dir, so this is an atomic rename
+        shutil.move(local_path, path)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        yield self._path(key)
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+
+def create_storage(backend: str, root: str) -> MediaStorage:
+    if backend == "local":
+        return LocalMediaStorage(root)
+    raise ValueError(f"Unknown media storage backend: {backend}")
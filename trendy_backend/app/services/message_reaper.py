@@ -0,0 +1,171 @@
+"""
+Message Reaper Service for TRENDY App
+Expires messages past expires_at in small bounded batches and applies
+burn-after-reading when a recipient reads a conversation.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.message import Message
+from app.models.message_reaction import MessageReaction
+from app.models.conversation import InboxEntry
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Try to import Prometheus client, but handle gracefully if not available
+try:
+    from prometheus_client import Counter, Gauge
+    REAPER_BACKLOG = Gauge("message_reaper_backlog", "Expired messages waiting to be reaped")
+    REAPER_REAPED = Counter("message_reaper_reaped_total", "Messages expired by the reaper", ["mode"])
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+class MessageReaper:
+    def __init__(self, batch_size: int = 500, mode: str = "tombstone"):
+        if mode not in ("tombstone", "delete"):
+            raise ValueError(f"Invalid reaper mode: {mode}")
+        self.batch_size = batch_size
+        self.mode = mode
+        self.total_reaped = 0
+        self.last_backlog = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_duration_ms = 0.0
+
+    def backlog_size(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Count expired rows still awaiting reaping (index range on expires_at)"""
+        now = now or datetime.utcnow()
+        return db.query(func.count(Message.id)).filter(Message.expires_at <= now).scalar() or 0
+
+    @staticmethod
+    def _clear_previews(db: Session, message_ids: List[int]):
+        """Inbox entries must not keep showing text of a message that is gone"""
+        db.query(InboxEntry).filter(
+            InboxEntry.last_message_id.in_(message_ids)
+        ).update({InboxEntry.last_message_preview: None}, synchronize_session=False)
+
+    def _expire(self, db: Session, message_ids: List[int]):
+        self._clear_previews(db, message_ids)
+        if self.mode == "delete":
+            db.query(MessageReaction).filter(
+                MessageReaction.message_id.in_(message_ids)
+            ).delete(synchronize_session=False)
+            db.query(Message).filter(
+                Message.reply_to_message_id.in_(message_ids)
+            ).update({Message.reply_to_message_id: None}, synchronize_session=False)
+            db.query(Message).filter(Message.id.in_(message_ids)).delete(synchronize_session=False)
+        else:
+            # Tombstone: drop the payload and leave the expires_at index
+            db.query(Message).filter(Message.id.in_(message_ids)).update({
+                Message.content: "",
+                Message.media_url: None,
+                Message.is_deleted: True,
+                Message.expires_at: None,
+            }, synchronize_session=False)
+
+    def reap_batch(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Expire at most batch_size messages in one short transaction"""
+        now = now or datetime.utcnow()
+        message_ids = [
+            message_id for (message_id,) in db.query(Message.id).filter(
+                Message.expires_at <= now
+            ).order_by(Message.expires_at).limit(self.batch_size)
+        ]
+        if not message_ids:
+            return 0
+        try:
+            self._expire(db, message_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(message_ids)
+
+    def run_once(self, db: Session, max_batches: int = 20) -> Dict[str, int]:
+        """Reap up to max_batches batches, then record the remaining backlog"""
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        reaped = 0
+        for _ in range(max_batches):
+            count = self.reap_batch(db, now)
+            reaped += count
+            if count < self.batch_size:
+                break
+
+        self.total_reaped += reaped
+        self.last_backlog = self.backlog_size(db, now)
+        self.last_run_at = now
+        self.last_run_duration_ms = (time.perf_counter() - started) * 1000
+        if PROMETHEUS_AVAILABLE:
+            REAPER_BACKLOG.set(self.last_backlog)
+            REAPER_REAPED.labels(mode=self.mode).inc(reaped)
+        return {"reaped": reaped, "backlog": self.last_backlog}
+
+    def burn_on_read(self, db: Session, conversation_id: int, reader_id: int,
+                     up_to_message_id: Optional[int] = None) -> int:
+        """Burn burn-after-reading messages addressed to reader_id once read (caller commits)"""
+        query = db.query(Message).filter(
+            Message.conversation_id == conversation_id,
+            Message.receiver_id == reader_id,
+            Message.is_burn_after_reading == True,
+            Message.is_deleted == False
+        )
+        if up_to_message_id is not None:
+            query = query.filter(Message.id <= up_to_message_id)
+        message_ids = [message_id for (message_id,) in query.with_entities(Message.id)]
+        if not message_ids:
+            return 0
+        self._clear_previews(db, message_ids)
+        return db.query(Message).filter(Message.id.in_(message_ids)).update({
+            Message.read_at: datetime.utcnow(),
+            Message.content: "",
+            Message.media_url: None,
+            Message.is_deleted: True,
+            Message.expires_at: None,
+        }, synchronize_session=False)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "mode": self.mode,
+            "batch_size": self.batch_size,
+            "total_reaped": self.total_reaped,
+            "backlog": self.last_backlog,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_duration_ms": round(self.last_run_duration_ms, 2),
+        }
+
+    async def run_forever(self, session_factory, interval_seconds: float = 30.0):
+        """Background loop; database work runs in the default executor"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.run_once(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                result = await loop.run_in_executor(None, tick)
+                if result["reaped"]:
+                    logger.info("Message reaper expired %d messages (backlog %d)", result["reaped"], result["backlog"])
+            except Exception as e:
+                logger.error(f"Message reaper failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Create global instance
+settings = get_settings()
+message_reaper = MessageReaper(
+    batch_size=settings.message_reaper_batch_size,
+    mode=settings.message_reaper_mode
+)
@@ -0,0 +1,261 @@
+"""
+Notification Pipeline for TRENDY App
+Request handlers enqueue follow/like/comment events without touching the
+database; a background worker coalesces bursts into one notification per
+recipient and target, bulk-writes rows and dispatches pushes in batches.
+"""
+
+import asyncio
+import logging
+import queue
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from app.models.notification_clean import Notification
+from app.models.user import User
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_ACTOR_IDS = 10
+
+TEMPLATES = {
+    "like": ("New like", "liked your post"),
+    "comment": ("New comment", "commented on your post"),
+    "follow": ("New follower", "started following you"),
+}
+
+
+@dataclass
+class NotificationEvent:
+    recipient_id: int
+    actor_id: int
+    type: str  # like, comment, follow
+    target_type: Optional[str] = None
+    target_id: Optional[int] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def group_key(self) -> str:
+        if self.target_type is None:
+            return self.type
+        return f"{self.type}:{self.target_type}:{self.target_id}"
+
+
+class PushTransport:
+    """Delivery interface; implementations return the ids they delivered"""
+
+    def send_batch(self, notifications: List[Dict]) -> List[int]:
+        raise NotImplementedError
+
+
+class LocalPushTransport(PushTransport):
+    """Development transport that records pushes in memory instead of sending them"""
+
+    def __init__(self, max_history: int = 1000):
+        self.sent: List[Dict] = []
+        self.max_history = max_history
+
+    def send_batch(self, notifications: List[Dict]) -> List[int]:
+        self.sent.extend(notifications)
+        del self.sent[:-self.max_history]
+        logger.debug("Local push transport delivered %d notifications", len(notifications))
+        return [n["id"] for n in notifications]
+
+
+class NotificationPipeline:
+    def __init__(
+        self,
+        transport: Optional[PushTransport] = None,
+        max_queue_size: int = 100000,
+        max_batch_size: int = 1000,
+        push_batch_size: int = 500,
+        coalesce_window: timedelta = timedelta(hours=24),
+    ):
+        self.transport = transport or LocalPushTransport()
+        self.events: "queue.Queue[NotificationEvent]" = queue.Queue(maxsize=max_queue_size)
+        # Events of a failed batch; drained ahead of the queue so they keep their order
+        self.retry: Deque[NotificationEvent] = deque()
+        self.max_batch_size = max_batch_size
+        self.push_batch_size = push_batch_size
+        self.coalesce_window = coalesce_window
+        self.dropped_events = 0
+
+    def enqueue(self, recipient_id: int, actor_id: int, type: str,
+                target_type: Optional[str] = None, target_id: Optional[int] = None) -> bool:
+        """Non-blocking; safe to call from sync and async handlers"""
+        if recipient_id is None or actor_id is None or recipient_id == actor_id:
+            return False
+        try:
+            self.events.put_nowait(NotificationEvent(recipient_id, actor_id, type, target_type, target_id))
+            return True
+        except queue.Full:
+            self.dropped_events += 1
+            return False
+
+    def _drain(self) -> List[NotificationEvent]:
+        batch = []
+        while self.retry and len(batch) < self.max_batch_size:
+            batch.append(self.retry.popleft())
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _coalesce(events: List[NotificationEvent]) -> Dict[Tuple[int, str], List[NotificationEvent]]:
+        groups: Dict[Tuple[int, str], List[NotificationEvent]] = {}
+        for event in events:
+            groups.setdefault((event.recipient_id, event.group_key), []).append(event)
+        return groups
+
+    @staticmethod
+    def _render(type: str, actor_name: str, actor_count: int) -> Tuple[str, str]:
+        title, action = TEMPLATES.get(type, ("Notification", type))
+        if actor_count <= 1:
+            return title, f"{actor_name} {action}"
+        others = actor_count - 1
+        return title, f"{actor_name} and {others} other{'s' if others > 1 else ''} {action}"
+
+    def process_batch(self, db: Session, events: List[NotificationEvent]) -> Dict[str, int]:
+        """Coalesce events, upsert notifications in bulk and dispatch pushes"""
+        if not events:
+            return {"events": 0, "inserted": 0, "updated": 0, "pushed": 0}
+
+        groups = self._coalesce(events)
+        now = datetime.utcnow()
+
+        # Unread notifications inside the window absorb new actors instead of adding rows
+        existing: Dict[Tuple[int, str], Notification] = {}
+        for notification in db.query(Notification).filter(
+            Notification.user_id.in_({recipient for recipient, _ in groups}),
+            Notification.group_key.in_({key for _, key in groups}),
+            Notification.is_read == False,
+            Notification.created_at >= now - self.coalesce_window
+        ):
+            existing[(notification.user_id, notification.group_key)] = notification
+
+        # Only the most recent actor of each group is named in the message
+        names = dict(db.query(User.id, User.username).filter(
+            User.id.in_({group[-1].actor_id for group in groups.values()})
+        ))
+
+        inserts, updates = [], []
+        for (recipient_id, key), group in groups.items():
+            latest = group[-1]
+            new_actors = list(dict.fromkeys(event.actor_id for event in reversed(group)))
+            current = existing.get((recipient_id, key))
+            if current is not None:
+                previous = (current.data or {}).get("actor_ids", [])
+                merged = list(dict.fromkeys(new_actors + previous))
+                # previous holds at most MAX_ACTOR_IDS ids, so repeat actors beyond that count again
+                actor_count = (current.actor_count or 1) + len([a for a in new_actors if a not in previous])
+            else:
+                merged = new_actors
+                actor_count = len(new_actors)
+
+            title, message = self._render(latest.type, names.get(merged[0], "Someone"), actor_count)
+            data = {
+                "actor_ids": merged[:MAX_ACTOR_IDS],
+                "target_type": latest.target_type,
+                "target_id": latest.target_id,
+            }
+            row = {
+                "title": title,
+                "message": message,
+                "data": data,
+                "actor_count": actor_count,
+                "created_at": now,
+                "is_sent": False,
+                "sent_at": None,
+            }
+            if current is not None:
+                updates.append({"id": current.id, **row})
+            else:
+                inserts.append({"user_id": recipient_id, "type": latest.type, "group_key": key, "is_read": False, **row})
+
+        if inserts:
+            db.bulk_insert_mappings(Notification, inserts)
+        if updates:
+            db.bulk_update_mappings(Notification, updates)
+        db.commit()
+
+        pushed = self.dispatch_pending(db, {recipient for recipient, _ in groups})
+        return {"events": len(events), "inserted": len(inserts), "updated": len(updates), "pushed": pushed}
+
+    def dispatch_pending(self, db: Session, user_ids) -> int:
+        """Send unsent notifications for user_ids through the transport in batches"""
+        pending = db.query(Notification).filter(
+            Notification.user_id.in_(user_ids),
+            Notification.is_sent == False
+        ).all()
+        pushed = 0
+        for start in range(0, len(pending), self.push_batch_size):
+            chunk = pending[start:start + self.push_batch_size]
+            payload = [
+                {"id": n.id, "user_id": n.user_id, "type": n.type, "title": n.title, "message": n.message, "data": n.data}
+                for n in chunk
+            ]
+            try:
+                delivered = self.transport.send_batch(payload)
+            except Exception as e:
+                logger.error(f"Push transport failed: {str(e)}")
+                continue
+            if delivered:
+                sent_at = datetime.utcnow()
+                db.bulk_update_mappings(Notification, [
+                    {"id": notification_id, "is_sent": True, "sent_at": sent_at} for notification_id in delivered
+                ])
+                db.commit()
+                pushed += len(delivered)
+        return pushed
+
+    def flush(self, db: Session) -> Dict[str, int]:
+        """Process everything currently queued"""
+        totals = {"events": 0, "inserted": 0, "updated": 0, "pushed": 0}
+        while True:
+            events = self._drain()
+            if not events:
+                return totals
+            try:
+                result = self.process_batch(db, events)
+            except Exception:
+                db.rollback()
+                # Put the batch back so the next flush retries it instead of losing it
+                self.retry.extendleft(reversed(events))
+                raise
+            for key, value in result.items():
+                totals[key] += value
+
+    async def run_forever(self, session_factory, interval_seconds: float = 1.0):
+        """Background loop; database work runs in the default executor"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.flush(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                if self.retry or not self.events.empty():
+                    await loop.run_in_executor(None, tick)
+            except Exception as e:
+                logger.error(f"Notification pipeline failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Create global instance
+settings = get_settings()
+notification_pipeline = NotificationPipeline(
+    max_batch_size=settings.notification_batch_size,
+    push_batch_size=settings.notification_push_batch_size,
+    coalesce_window=timedelta(minutes=settings.notification_coalesce_minutes)
+)
@@ -0,0 +1,201 @@
+"""
+Photo Service for TRENDY App
+Search goes through a token -> photo inverted index (prefix matching over a
+sorted vocabulary) and trending reads a score-ordered list that is updated in
+place when a photo's score changes. Favorites and viewing history are stored
+per user in indexed tables; history keeps one row per photo and is trimmed to
+a fixed number of entries per user.
+"""
+
+import logging
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.photo_interaction import PhotoFavorite, PhotoView
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Trending score added per favorite
+FAVORITE_WEIGHT = 1.0
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class PhotoIndex:
+    def __init__(self, photos: Iterable = ()):
+        self._lock = threading.Lock()
+        self.photos: Dict[str, object] = {}
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.vocabulary: List[str] = []
+        self.scores: Dict[str, float] = {}
+        # (-score, photo_id) ascending, i.e. highest score first
+        self.ranked: List[Tuple[float, str]] = []
+        for photo in photos:
+            self.add(photo)
+
+    def add(self, photo):
+        photo_id = str(photo.id)
+        with self._lock:
+            if photo_id in self.photos:
+                raise ValueError(f"Photo {photo_id} is already indexed")
+            self.photos[photo_id] = photo
+            tokens = set(tokenize(photo.title)) | set(tokenize(photo.photographer)) | set(tokenize(photo.category))
+            for tag in photo.tags:
+                tokens.update(tokenize(tag))
+            for token in tokens:
+                if token not in self.postings:
+                    insort(self.vocabulary, token)
+                self.postings[token].add(photo_id)
+            self.scores[photo_id] = photo.trending_score
+            insort(self.ranked, (-photo.trending_score, photo_id))
+
+    def _matching(self, prefix: str) -> Set[str]:
+        """Photo ids with any token starting with prefix"""
+        matches = set()
+        start = bisect_left(self.vocabulary, prefix)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self.postings[token]
+        return matches
+
+    def search(self, query: str, category: Optional[str] = None, photographer: Optional[str] = None,
+               limit: int = 20) -> list:
+        """Photos matching every query term (as a token prefix), best trending score first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            candidates = None
+            for term in sorted(terms, key=len, reverse=True):
+                matches = self._matching(term)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+            photos = [self.photos[photo_id] for photo_id in candidates]
+            scores = self.scores
+            photos.sort(key=lambda photo: -scores[str(photo.id)])
+        if category:
+            photos = [photo for photo in photos if category.lower() in photo.category.lower()]
+        if photographer:
+            photos = [photo for photo in photos if photographer.lower() in photo.photographer.lower()]
+        return photos[:limit]
+
+    def trending(self, limit: int = 20, category: Optional[str] = None, offset: int = 0) -> list:
+        with self._lock:
+            if not category:
+                return [self.photos[photo_id] for _, photo_id in self.ranked[offset:offset + limit]]
+            category = category.lower()
+            results = []
+            for _, photo_id in self.ranked:
+                photo = self.photos[photo_id]
+                if category in photo.category.lower():
+                    results.append(photo)
+                    if len(results) >= offset + limit:
+                        break
+            return results[offset:]
+
+    def get(self, photo_id: str):
+        return self.photos.get(str(photo_id))
+
+    def get_many(self, photo_ids: Iterable[str]) -> list:
+        return [self.photos[photo_id] for photo_id in photo_ids if photo_id in self.photos]
+
+    def adjust_score(self, photo_id: str, delta: float):
+        """Move one photo in the trending order; O(log n) search plus a list shift"""
+        with self._lock:
+            old = self.scores.get(photo_id)
+            if old is None or not delta:
+                return
+            position = bisect_left(self.ranked, (-old, photo_id))
+            if position < len(self.ranked) and self.ranked[position] == (-old, photo_id):
+                del self.ranked[position]
+            self.scores[photo_id] = old + delta
+            insort(self.ranked, (-(old + delta), photo_id))
+
+
+class PhotoInteractionService:
+    def __init__(self, history_limit: int = 500):
+        self.history_limit = history_limit
+        self._scores_loaded = False
+
+    def load_scores(self, db: Session, index: PhotoIndex):
+        """Fold stored favorite counts into the trending scores once per process"""
+        if self._scores_loaded:
+            return
+        counts = db.query(PhotoFavorite.photo_id, func.count()).group_by(PhotoFavorite.photo_id).all()
+        for photo_id, count in counts:
+            index.adjust_score(photo_id, FAVORITE_WEIGHT * count)
+        # Only after the query succeeded, so a failed load is retried on the next request
+        self._scores_loaded = True
+
+    def set_favorite(self, db: Session, index: PhotoIndex, user_id: int, photo_id: str, liked: bool) -> bool:
+        """Add or remove a favorite; True if anything changed"""
+        if liked:
+            try:
+                with db.begin_nested():
+                    db.add(PhotoFavorite(user_id=user_id, photo_id=photo_id))
+            except IntegrityError:
+                return False
+            db.commit()
+            index.adjust_score(photo_id, FAVORITE_WEIGHT)
+            return True
+        deleted = db.query(PhotoFavorite).filter(
+            PhotoFavorite.user_id == user_id,
+            PhotoFavorite.photo_id == photo_id
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            index.adjust_score(photo_id, -FAVORITE_WEIGHT)
+        return bool(deleted)
+
+    def favorites(self, db: Session, user_id: int, limit: int = 50) -> List[str]:
+        return [photo_id for (photo_id,) in db.query(PhotoFavorite.photo_id).filter(
+            PhotoFavorite.user_id == user_id
+        ).order_by(PhotoFavorite.created_at.desc(), PhotoFavorite.id.desc()).limit(limit)]
+
+    def record_view(self, db: Session, user_id: int, photo_id: str):
+        """Move the photo to the front of the user's history, trimming the oldest entries"""
+        now = datetime.utcnow()
+        updated = db.query(PhotoView).filter(
+            PhotoView.user_id == user_id,
+            PhotoView.photo_id == photo_id
+        ).update({PhotoView.viewed_at: now}, synchronize_session=False)
+        if not updated:
+            try:
+                with db.begin_nested():
+                    db.add(PhotoView(user_id=user_id, photo_id=photo_id, viewed_at=now))
+            except IntegrityError:
+                pass
+            # Only inserts can push the history past its cap
+            cutoff = db.query(PhotoView.viewed_at).filter(
+                PhotoView.user_id == user_id
+            ).order_by(PhotoView.viewed_at.desc()).offset(self.history_limit - 1).limit(1).scalar()
+            if cutoff is not None:
+                db.query(PhotoView).filter(
+                    PhotoView.user_id == user_id,
+                    PhotoView.viewed_at < cutoff
+                ).delete(synchronize_session=False)
+        db.commit()
+
+    def history(self, db: Session, user_id: int, limit: int = 50) -> List[str]:
+        return [photo_id for (photo_id,) in db.query(PhotoView.photo_id).filter(
+            PhotoView.user_id == user_id
+        ).order_by(PhotoView.viewed_at.desc()).limit(limit)]
+
+
+# Create global instance
+settings = get_settings()
+photo_interactions = PhotoInteractionService(history_limit=settings.photo_history_limit)
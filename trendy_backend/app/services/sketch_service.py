@@ -0,0 +1,274 @@
+"""
+Sketch Analytics Service for TRENDY App
+Tracks unique viewers and reach with HyperLogLog (per post, per creator, per
+ad type, site-wide; daily and lifetime) and heavy-hitter hashtags/content with
+Count-Min sketches. Each worker accumulates small in-memory sketches and a
+background flush merges them into the analytics_sketches table.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.sketches import CountMinSketch, HyperLogLog
+from app.models.analytics_event import AnalyticsSketch
+
+logger = logging.getLogger(__name__)
+
+HASHTAG_PATTERN = re.compile(r"#(\w{1,100})")
+
+
+def extract_hashtags(text: Optional[str]) -> List[str]:
+    return sorted({tag.lower() for tag in HASHTAG_PATTERN.findall(text or "")})
+
+
+class SketchAnalyticsService:
+    def __init__(self, hll_precision: int = 12, cms_width: int = 2048, cms_depth: int = 5,
+                 heavy_hitters: int = 100, max_live_sketches: int = 20000):
+        self.hll_precision = hll_precision
+        self.cms_width = cms_width
+        self.cms_depth = cms_depth
+        self.heavy_hitters = heavy_hitters
+        self.max_live_sketches = max_live_sketches
+        self._lock = threading.Lock()
+        self._hll: Dict[str, HyperLogLog] = {}
+        self._cms: Dict[str, CountMinSketch] = {}
+        self.flush_requested = threading.Event()
+
+    # Keys: "<scope>:<id>[:<day>]"; sketches without a day cover the lifetime
+    @staticmethod
+    def _day_keys(prefix: str, start: date, end: date) -> List[str]:
+        return [f"{prefix}:{start + timedelta(days=offset)}" for offset in range((end - start).days + 1)]
+
+    def _new_cms(self) -> CountMinSketch:
+        return CountMinSketch(self.cms_width, self.cms_depth, self.heavy_hitters)
+
+    def _add_unique(self, keys: Iterable[str], value):
+        with self._lock:
+            for key in keys:
+                sketch = self._hll.get(key)
+                if sketch is None:
+                    sketch = self._hll[key] = HyperLogLog(self.hll_precision)
+                sketch.add(value)
+            if len(self._hll) + len(self._cms) > self.max_live_sketches:
+                self.flush_requested.set()
+
+    def _add_counts(self, key: str, items: Iterable[str]):
+        with self._lock:
+            sketch = self._cms.get(key)
+            if sketch is None:
+                sketch = self._cms[key] = self._new_cms()
+            for item in items:
+                sketch.add(item)
+
+    def record_view(self, post_id: int, creator_id: Optional[int], viewer_id) -> None:
+        """Count a post view; O(1) per sketch and never touches the database"""
+        today = date.today()
+        if viewer_id is not None:
+            keys = [f"post:{post_id}", f"post:{post_id}:{today}", f"site:{today}"]
+            if creator_id is not None:
+                keys += [f"creator:{creator_id}", f"creator:{creator_id}:{today}"]
+            self._add_unique(keys, viewer_id)
+        self._add_counts(f"content:{today}", [f"post:{post_id}"])
+
+    def record_ad_impression(self, ad_type: str, user_id) -> None:
+        if user_id is None:
+            return
+        today = date.today()
+        self._add_unique([f"ad:{ad_type}:{today}", f"ad:all:{today}"], user_id)
+
+    def record_hashtags(self, hashtags: Iterable[str]) -> None:
+        hashtags = list(hashtags)
+        if hashtags:
+            self._add_counts(f"hashtags:{date.today()}", hashtags)
+
+    def _swap(self) -> Tuple[Dict[str, HyperLogLog], Dict[str, CountMinSketch]]:
+        with self._lock:
+            hll, self._hll = self._hll, {}
+            cms, self._cms = self._cms, {}
+            self.flush_requested.clear()
+        return hll, cms
+
+    def _restore(self, hll: Dict[str, HyperLogLog], cms: Dict[str, CountMinSketch]):
+        with self._lock:
+            for key, sketch in hll.items():
+                self._hll[key] = sketch.merge(self._hll[key]) if key in self._hll else sketch
+            for key, sketch in cms.items():
+                self._cms[key] = sketch.merge(self._cms[key]) if key in self._cms else sketch
+
+    @staticmethod
+    def _day_of(key: str) -> Optional[date]:
+        try:
+            return date.fromisoformat(key.rsplit(":", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def flush(self, db: Session, batch_size: int = 500) -> Dict[str, int]:
+        """Merge this worker's sketches into the stored blobs"""
+        hll, cms = self._swap()
+        if not hll and not cms:
+            return {"sketches": 0}
+        pending = [(key, "hll", sketch) for key, sketch in hll.items()] + \
+                  [(key, "cms", sketch) for key, sketch in cms.items()]
+        try:
+            now = datetime.utcnow()
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
+                # Row locks serialize concurrent flushes of the same keys (no-op on SQLite)
+                stored = {
+                    row.key: row for row in db.query(AnalyticsSketch).filter(
+                        AnalyticsSketch.key.in_([key for key, _, _ in chunk])
+                    ).with_for_update()
+                }
+                inserts, updates = [], []
+                for key, kind, sketch in chunk:
+                    row = stored.get(key)
+                    if row is None:
+                        inserts.append({"key": key, "kind": kind, "day": self._day_of(key),
+                                        "blob": sketch.to_bytes(), "updated_at": now})
+                        continue
+                    loader = HyperLogLog if kind == "hll" else CountMinSketch
+                    merged = loader.from_bytes(row.blob).merge(sketch)
+                    updates.append({"id": row.id, "blob": merged.to_bytes(), "updated_at": now})
+                if inserts:
+                    db.bulk_insert_mappings(AnalyticsSketch, inserts)
+                if updates:
+                    db.bulk_update_mappings(AnalyticsSketch, updates)
+            db.commit()
+        except Exception:
+            # Includes a unique-key race with another worker's insert; retried next flush
+            db.rollback()
+            self._restore(hll, cms)
+            raise
+        return {"sketches": len(pending)}
+
+    def _load(self, db: Optional[Session], keys: List[str], kind: str):
+        """Merge the stored blobs and this worker's unflushed sketches for keys"""
+        merged = HyperLogLog(self.hll_precision) if kind == "hll" else self._new_cms()
+        loader = HyperLogLog if kind == "hll" else CountMinSketch
+        if db is not None and keys:
+            for (blob,) in db.query(AnalyticsSketch.blob).filter(AnalyticsSketch.key.in_(keys)):
+                merged.merge(loader.from_bytes(blob))
+        with self._lock:
+            live = self._hll if kind == "hll" else self._cms
+            for key in keys:
+                if key in live:
+                    merged.merge(live[key])
+        return merged
+
+    def _load_each(self, db: Optional[Session], keys: List[str]) -> Dict[str, HyperLogLog]:
+        """Per-key HyperLogLogs (stored blob plus unflushed sketch) from one query"""
+        sketches = {key: HyperLogLog(self.hll_precision) for key in keys}
+        if db is not None and keys:
+            for key, blob in db.query(AnalyticsSketch.key, AnalyticsSketch.blob).filter(
+                AnalyticsSketch.key.in_(keys)
+            ):
+                sketches[key].merge(HyperLogLog.from_bytes(blob))
+        with self._lock:
+            for key in keys:
+                if key in self._hll:
+                    sketches[key].merge(self._hll[key])
+        return sketches
+
+    def _unique(self, db: Optional[Session], keys: List[str]) -> Dict[str, float]:
+        sketch = self._load(db, keys, "hll")
+        return {"estimate": sketch.count(), "relative_error": round(sketch.relative_error, 4)}
+
+    def post_stats(self, db: Session, post_id: int, days: Optional[int] = None) -> Dict[str, object]:
+        """Unique viewers of a post, lifetime or over the last `days` days"""
+        if days is None:
+            keys = [f"post:{post_id}"]
+        else:
+            today = date.today()
+            keys = self._day_keys(f"post:{post_id}", today - timedelta(days=days - 1), today)
+        return {"post_id": post_id, "days": days, "unique_viewers": self._unique(db, keys)}
+
+    def creator_reach(self, db: Session, creator_id: int, days: Optional[int] = None) -> Dict[str, float]:
+        """Distinct users who viewed any of the creator's posts"""
+        if days is None:
+            return self._unique(db, [f"creator:{creator_id}"])
+        today = date.today()
+        return self._unique(db, self._day_keys(f"creator:{creator_id}", today - timedelta(days=days - 1), today))
+
+    def ad_reach(self, db: Session, start: date, end: date, ad_type: Optional[str] = None) -> Dict[str, float]:
+        return self._unique(db, self._day_keys(f"ad:{ad_type or 'all'}", start, end))
+
+    def site_uniques(self, db: Session, start: date, end: date) -> Dict[str, float]:
+        return self._unique(db, self._day_keys("site", start, end))
+
+    def site_uniques_by_day(self, db: Session, start: date, end: date) -> Tuple[Dict[date, float], Dict[str, float]]:
+        """Daily site uniques and their union over the range, from one query"""
+        union = HyperLogLog(self.hll_precision)
+        daily = {}
+        for key, sketch in self._load_each(db, self._day_keys("site", start, end)).items():
+            daily[self._day_of(key)] = sketch.count()
+            union.merge(sketch)
+        return daily, {"estimate": union.count(), "relative_error": round(union.relative_error, 4)}
+
+    def top_items(self, db: Session, scope: str, days: int = 1, limit: int = 10) -> Dict[str, object]:
+        """Heavy hitters ("hashtags" or "content") over the last `days` days"""
+        today = date.today()
+        sketch = self._load(db, self._day_keys(scope, today - timedelta(days=days - 1), today), "cms")
+        return {
+            "items": [{"item": item, "count": count} for item, count in sketch.heavy_hitters(limit)],
+            "total": sketch.total,
+            # Estimates never undercount; overcount <= max_overcount with probability confidence
+            "max_overcount": int(sketch.epsilon * sketch.total),
+            "confidence": round(1 - sketch.delta, 4),
+        }
+
+    def sync_post_analytics(self, db: Session, post_ids: Iterable[int]) -> int:
+        """Write lifetime unique-viewer estimates into post_analytics rows"""
+        from app.models.enhanced_post import PostAnalytics
+
+        post_ids = list(post_ids)
+        if not post_ids:
+            return 0
+        rows = db.query(PostAnalytics.id, PostAnalytics.post_id).filter(PostAnalytics.post_id.in_(post_ids)).all()
+        updates = [
+            {"id": row_id, "unique_viewers": self._unique(db, [f"post:{post_id}"])["estimate"]}
+            for row_id, post_id in rows
+        ]
+        if updates:
+            db.bulk_update_mappings(PostAnalytics, updates)
+            db.commit()
+        return len(updates)
+
+    async def run_forever(self, session_factory, interval_seconds: float = 10.0):
+        """Background loop; flushes every interval or as soon as too many sketches are live"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            with self._lock:
+                post_ids = {int(key.split(":")[1]) for key in self._hll if key.startswith("post:") and key.count(":") == 1}
+            db = session_factory()
+            try:
+                result = self.flush(db)
+                self.sync_post_analytics(db, post_ids)
+                return result
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await loop.run_in_executor(None, tick)
+            except Exception as e:
+                logger.error(f"Sketch analytics flush failed: {str(e)}")
+            deadline = time.monotonic() + interval_seconds
+            while time.monotonic() < deadline and not self.flush_requested.is_set():
+                await asyncio.sleep(min(0.25, interval_seconds))
+
+
+# Create global instance
+settings = get_settings()
+sketch_analytics = SketchAnalyticsService(
+    hll_precision=settings.sketch_hll_precision,
+    cms_width=settings.sketch_cms_width,
+    cms_depth=settings.sketch_cms_depth
+)
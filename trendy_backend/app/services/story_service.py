@@ -0,0 +1,199 @@
+"""
+Story Service for TRENDY App
+Stories live for a fixed time after posting. Active stories are read through
+the (user_id, expires_at) index; the tray of followed authors is one joined
+query. Seen-state is one row per (viewer, author) holding a bitset over the
+author's story sequence numbers, rebased as old stories expire, so it stays a
+few bytes. A background sweeper archives expired stories in batches and drops
+seen rows that can only refer to expired stories.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.enhanced_post import Story, StorySeen
+from app.models.post import Follower
+from app.services.visibility import visibility_service
+
+logger = logging.getLogger(__name__)
+
+
+def has_bit(bits: bytes, index: int) -> bool:
+    return 0 <= index < len(bits) * 8 and bool(bits[index >> 3] & (1 << (index & 7)))
+
+
+def set_bit(bits: bytes, index: int) -> bytes:
+    buffer = bytearray(bits)
+    if index >= len(buffer) * 8:
+        buffer.extend(b"\x00" * ((index >> 3) + 1 - len(buffer)))
+    buffer[index >> 3] |= 1 << (index & 7)
+    return bytes(buffer)
+
+
+class StoryService:
+    def __init__(self, ttl_hours: float = 24.0):
+        self.ttl = timedelta(hours=ttl_hours)
+
+    @staticmethod
+    def _active(query, now: datetime):
+        return query.filter(Story.expires_at > now, Story.is_archived == False)
+
+    # Writes
+
+    def create(self, db: Session, user_id: int, **fields) -> Story:
+        """Create a story with the author's next sequence number"""
+        expires_at = datetime.utcnow() + self.ttl
+        for _ in range(3):
+            last = db.query(func.max(Story.sequence)).filter(Story.user_id == user_id).scalar()
+            story = Story(user_id=user_id, sequence=(last or 0) + 1, expires_at=expires_at, **fields)
+            try:
+                with db.begin_nested():
+                    db.add(story)
+            except IntegrityError:
+                continue  # a concurrent post took the sequence number
+            db.commit()
+            db.refresh(story)
+            return story
+        raise RuntimeError(f"Could not allocate a story sequence for user {user_id}")
+
+    def mark_seen(self, db: Session, viewer_id: int, story: Story) -> bool:
+        """Set the story's bit in the viewer's bitset for its author; True on first view"""
+        now = datetime.utcnow()
+        seen = db.query(StorySeen).filter(
+            StorySeen.viewer_id == viewer_id,
+            StorySeen.author_id == story.user_id
+        ).with_for_update().first()
+        if seen is not None and has_bit(seen.bits, story.sequence - seen.base_sequence):
+            return False
+        oldest = self._active(db.query(func.min(Story.sequence)), now).filter(
+            Story.user_id == story.user_id
+        ).scalar()
+        if seen is None:
+            base = story.sequence if oldest is None else min(oldest, story.sequence)
+            seen = StorySeen(viewer_id=viewer_id, author_id=story.user_id, base_sequence=base, bits=b"")
+            try:
+                with db.begin_nested():
+                    db.add(seen)
+            except IntegrityError:
+                return self.mark_seen(db, viewer_id, story)
+        elif oldest is not None and oldest > seen.base_sequence:
+            # Drop whole bytes that only cover expired stories before growing the bitset
+            dropped = min((oldest - seen.base_sequence) >> 3, len(seen.bits))
+            seen.bits = seen.bits[dropped:]
+            seen.base_sequence += dropped * 8
+        if story.sequence < seen.base_sequence:
+            return False
+        seen.bits = set_bit(seen.bits, story.sequence - seen.base_sequence)
+        seen.updated_at = now
+        db.query(Story).filter(Story.id == story.id).update(
+            {Story.views_count: Story.views_count + 1}, synchronize_session=False
+        )
+        db.commit()
+        return True
+
+    # Reads
+
+    def active_for_user(self, db: Session, user_id: int) -> List[Story]:
+        return self._active(db.query(Story), datetime.utcnow()).filter(
+            Story.user_id == user_id
+        ).order_by(Story.sequence).all()
+
+    def seen_bitsets(self, db: Session, viewer_id: int, author_ids: List[int]) -> Dict[int, StorySeen]:
+        if not author_ids:
+            return {}
+        return {
+            seen.author_id: seen
+            for seen in db.query(StorySeen).filter(
+                StorySeen.viewer_id == viewer_id,
+                StorySeen.author_id.in_(author_ids)
+            )
+        }
+
+    def is_seen(self, seen: Optional[StorySeen], story: Story) -> bool:
+        return seen is not None and has_bit(seen.bits, story.sequence - seen.base_sequence)
+
+    def tray(self, db: Session, viewer_id: int, limit: int = 50) -> List[Dict[str, object]]:
+        """Followed authors with active stories; authors with unseen stories first, then most recent"""
+        query = self._active(
+            db.query(Story).join(Follower, Follower.following_id == Story.user_id),
+            datetime.utcnow()
+        ).filter(Follower.follower_id == viewer_id)
+        hidden = visibility_service.exclude_clause(db, viewer_id, Story.user_id, "stories")
+        if hidden is not None:
+            query = query.filter(hidden)
+
+        by_author: Dict[int, List[Story]] = {}
+        for story in query.order_by(Story.user_id, Story.sequence):
+            by_author.setdefault(story.user_id, []).append(story)
+        seen = self.seen_bitsets(db, viewer_id, list(by_author))
+
+        tray = []
+        for author_id, stories in by_author.items():
+            unseen = [story for story in stories if not self.is_seen(seen.get(author_id), story)]
+            tray.append({
+                "user_id": author_id,
+                "story_ids": [story.id for story in stories],
+                "unseen_count": len(unseen),
+                "first_unseen_id": unseen[0].id if unseen else None,
+                "expires_at": max(story.expires_at for story in stories)
+            })
+        # Stories share one lifetime, so the latest expiry is the most recent post
+        tray.sort(key=lambda entry: entry["expires_at"], reverse=True)
+        tray.sort(key=lambda entry: entry["unseen_count"] == 0)
+        return tray[:limit]
+
+    # Expiry
+
+    def sweep(self, db: Session, batch_size: int = 1000) -> Dict[str, int]:
+        """Archive expired stories batch by batch, then prune stale seen bitsets"""
+        now = datetime.utcnow()
+        archived = 0
+        while True:
+            story_ids = [story_id for (story_id,) in db.query(Story.id).filter(
+                Story.is_archived == False,
+                Story.expires_at <= now
+            ).order_by(Story.expires_at).limit(batch_size)]
+            if not story_ids:
+                break
+            db.query(Story).filter(Story.id.in_(story_ids)).update(
+                {Story.is_archived: True}, synchronize_session=False
+            )
+            db.commit()
+            archived += len(story_ids)
+            if len(story_ids) < batch_size:
+                break
+        # A bitset untouched for a full story lifetime only has bits for expired stories
+        pruned = db.query(StorySeen).filter(
+            StorySeen.updated_at < now - self.ttl
+        ).delete(synchronize_session=False)
+        db.commit()
+        return {"archived": archived, "pruned": pruned}
+
+    async def run_forever(self, session_factory, interval_seconds: float = 60.0, batch_size: int = 1000):
+        """Background loop; archives expired stories every interval"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.sweep(db, batch_size)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await loop.run_in_executor(None, tick)
+            except Exception as e:
+                logger.error(f"Story expiry sweep failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Create global instance
+settings = get_settings()
+story_service = StoryService(ttl_hours=settings.story_ttl_hours)
@@ -1,8 +1,7 @@
-import stripe
 import os
 from typing import Dict, Optional, List
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, object_session
 from app.models.user import User
 from app.models.subscription_corrected import Subscription, Payment
 from app.core.config import get_settings
@@ -11,12 +10,19 @@ class StripeService:
     def __init__(self):
         # Initialize Stripe with API key from environment
         settings = get_settings()
-        stripe.api_key = os.getenv("STRIPE_SECRET_KEY") or settings.stripe_secret_key
-        if not stripe.api_key:
+        self.api_key = os.getenv("STRIPE_SECRET_KEY") or settings.stripe_secret_key
+        if not self.api_key:
             raise ValueError("STRIPE_SECRET_KEY environment variable is required")
+
+    def client(self):
+        """The stripe SDK, imported on first use; it loads requests for its HTTP client"""
+        import stripe
+        stripe.api_key = self.api_key
+        return stripe
     
     async def create_customer(self, user: User, email: str) -> str:
         """Create a Stripe customer for a user"""
+        stripe = self.client()
         try:
             customer = stripe.Customer.create(
                 email=email,
@@ -37,9 +43,11 @@ class StripeService:
         user: User, 
         price_id: str, 
         success_url: str, 
-        cancel_url: str
+        cancel_url: str,
+        client_reference_id: Optional[str] = None
     ) -> Dict:
         """Create a Stripe checkout session for subscription"""
+        stripe = self.client()
         try:
             # Get or create customer
             customer_id = await self.get_or_create_customer(user)
@@ -54,9 +62,14 @@ class StripeService:
                 mode='subscription',
                 success_url=success_url,
                 cancel_url=cancel_url,
+                client_reference_id=client_reference_id,
                 metadata={
                     "user_id": str(user.id),
                     "username": user.username
+                },
+                # Subscription webhook events carry the user even if they arrive before checkout completes
+                subscription_data={
+                    "metadata": {"user_id": str(user.id)}
                 }
             )
             
@@ -72,12 +85,17 @@ class StripeService:
     
     async def get_or_create_customer(self, user: User) -> str:
         """Get existing customer or create a new one"""
+        stripe = self.client()
         try:
-            # Check if user already has a Stripe customer ID
-            if user.subscriptions:
-                for subscription in user.subscriptions:
-                    if subscription.stripe_customer_id:
-                        return subscription.stripe_customer_id
+            # Check if user already has a Stripe customer ID, without loading every subscription
+            db = object_session(user)
+            if db is not None:
+                customer_id = db.query(Subscription.stripe_customer_id).filter(
+                    Subscription.user_id == user.id,
+                    Subscription.stripe_customer_id.isnot(None)
+                ).limit(1).scalar()
+                if customer_id:
+                    return customer_id
             
             # Create new customer
             customer_id = await self.create_customer(user, user.email)
@@ -97,6 +115,7 @@ class StripeService:
         description: str = None
     ) -> Dict:
         """Create a payment intent for one-time payments"""
+        stripe = self.client()
         try:
             customer_id = await self.get_or_create_customer(user)
             
@@ -123,63 +142,9 @@ class StripeService:
                 detail=f"Failed to create payment intent: {str(e)}"
             )
     
-    async def handle_webhook_event(self, payload: bytes, sig_header: str) -> Dict:
-        """Handle Stripe webhook events"""
-        try:
-            # Verify webhook signature
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, os.getenv("STRIPE_WEBHOOK_SECRET")
-            )
-            
-            # Handle different event types
-            if event['type'] == 'checkout.session.completed':
-                await self._handle_checkout_completed(event)
-            elif event['type'] == 'customer.subscription.updated':
-                await self._handle_subscription_updated(event)
-            elif event['type'] == 'customer.subscription.deleted':
-                await self._handle_subscription_deleted(event)
-            elif event['type'] == 'payment_intent.succeeded':
-                await self._handle_payment_succeeded(event)
-            
-            return {"status": "success", "event": event['type']}
-            
-        except stripe.error.SignatureVerificationError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid webhook signature"
-            )
-        except stripe.error.StripeError as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Webhook error: {str(e)}"
-            )
-    
-    async def _handle_checkout_completed(self, event: Dict):
-        """Handle checkout session completed event"""
-        session = event['data']['object']
-        user_id = session['metadata'].get('user_id')
-        subscription_id = session.get('subscription')
-        
-        # TODO: Update user subscription in database
-        # This would be implemented with database session
-        
-    async def _handle_subscription_updated(self, event: Dict):
-        """Handle subscription updated event"""
-        subscription = event['data']['object']
-        # TODO: Update subscription status in database
-        
-    async def _handle_subscription_deleted(self, event: Dict):
-        """Handle subscription deleted event"""
-        subscription = event['data']['object']
-        # TODO: Mark subscription as canceled in database
-        
-    async def _handle_payment_succeeded(self, event: Dict):
-        """Handle payment succeeded event"""
-        payment_intent = event['data']['object']
-        # TODO: Record successful payment in database
-    
     async def get_subscription_plans(self) -> List[Dict]:
         """Get available subscription plans"""
+        stripe = self.client()
         try:
             prices = stripe.Price.list(active=True, type='recurring')
             plans = []
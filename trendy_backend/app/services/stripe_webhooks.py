@@ -0,0 +1,332 @@
+"""
+Stripe Webhook Pipeline for TRENDY App
+The webhook endpoint only verifies the signature and stores the raw event in
+the stripe_events inbox, which is unique on the Stripe event id, so
+redeliveries are no-ops; then it answers. A background worker takes pending
+events in Stripe creation order. An event never overtakes an earlier event
+for the same subscription or payment that is waiting on a retry. Each batch
+is folded into one final state per object and written with bulk updates and
+inserts. Subscriptions remember the creation time of the last event applied,
+so late deliveries cannot roll their state back. Affected users' cached
+entitlements are dropped after each batch. Events are kept in the inbox and
+can be replayed.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.stripe_event import StripeEvent
+from app.models.subscription_corrected import Subscription, Payment
+from app.services.entitlements import entitlement_service
+
+logger = logging.getLogger(__name__)
+
+HANDLED_EVENTS = {
+    "checkout.session.completed",
+    "customer.subscription.created",
+    "customer.subscription.updated",
+    "customer.subscription.deleted",
+    "payment_intent.succeeded",
+    "payment_intent.payment_failed",
+}
+
+# Payment statuses only move forward
+PAYMENT_STATUS_RANK = {"pending": 0, "failed": 1, "succeeded": 2, "refunded": 3}
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature header value for payload, computed the way Stripe does; for local fixtures"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + payload, hashlib.sha256)
+    return f"t={timestamp},v1={signature.hexdigest()}"
+
+
+def ordering_key(event: Dict) -> Optional[str]:
+    """The subscription or payment intent an event applies to; events sharing a key are applied in order"""
+    obj = event["data"]["object"]
+    if event["type"] == "checkout.session.completed":
+        return obj.get("subscription") or obj.get("payment_intent") or obj.get("id")
+    if event["type"].startswith(("customer.subscription.", "payment_intent.")):
+        return obj.get("id")
+    return None
+
+
+def _timestamp(value: Optional[int]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(value) if value else None
+
+
+def _user_id(obj: Dict) -> Optional[int]:
+    value = (obj.get("metadata") or {}).get("user_id")
+    return int(value) if value and str(value).isdigit() else None
+
+
+class StripeWebhookProcessor:
+    def __init__(self, webhook_secret: str, batch_size: int = 100, max_attempts: int = 8,
+                 retry_base_seconds: float = 10.0, retry_max_seconds: float = 3600.0):
+        self.webhook_secret = webhook_secret
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+
+    # Ingest (request path)
+
+    def ingest(self, db: Session, payload: bytes, sig_header: Optional[str]) -> bool:
+        """Verify and store one event; False if it was already in the inbox"""
+        import stripe  # loads requests; only the webhook endpoint needs it
+
+        event = stripe.Webhook.construct_event(payload, sig_header, self.webhook_secret)
+        row = StripeEvent(
+            event_id=event["id"],
+            type=event["type"],
+            ordering_key=ordering_key(event),
+            stripe_created=int(event["created"]),
+            payload=payload.decode("utf-8"),
+            status="pending" if event["type"] in HANDLED_EVENTS else "ignored",
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        try:
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            return False
+        db.commit()
+        return True
+
+    # Processing (worker)
+
+    def _claim(self, db: Session) -> List[StripeEvent]:
+        """Due pending events in creation order, skipping keys with an event still backing off"""
+        now = datetime.utcnow()
+        blocked = {key for (key,) in db.query(StripeEvent.ordering_key).filter(
+            StripeEvent.status == "pending",
+            StripeEvent.next_attempt_at > now,
+            StripeEvent.ordering_key.isnot(None)
+        ).distinct()}
+        rows = db.query(StripeEvent).filter(
+            StripeEvent.status == "pending",
+            StripeEvent.next_attempt_at <= now
+        ).order_by(StripeEvent.stripe_created, StripeEvent.id).limit(self.batch_size).with_for_update(
+            skip_locked=True
+        ).all()
+        return [row for row in rows if row.ordering_key is None or row.ordering_key not in blocked]
+
+    @staticmethod
+    def _fold(event: Dict, row: StripeEvent, subscriptions: Dict[str, Dict], payments: Dict[str, Dict]) -> bool:
+        """Merge one event into the batch state; False if the event needs no write"""
+        obj = event["data"]["object"]
+        created = int(event["created"])
+        kind = event["type"]
+
+        if kind == "checkout.session.completed":
+            if not obj.get("subscription"):
+                return False  # one-time payments arrive as payment_intent events
+            state = subscriptions.setdefault(obj["subscription"], {"fields": {}, "event_at": 0, "rows": []})
+            state["fields"].setdefault("status", "active")
+            reference = obj.get("client_reference_id")
+            if reference and str(reference).isdigit():
+                state["record_id"] = int(reference)
+        elif kind.startswith("customer.subscription."):
+            state = subscriptions.setdefault(obj["id"], {"fields": {}, "event_at": 0, "rows": []})
+            items = (obj.get("items") or {}).get("data") or []
+            fields = {
+                "status": "canceled" if kind == "customer.subscription.deleted" else obj.get("status"),
+                "current_period_start": _timestamp(obj.get("current_period_start")),
+                "current_period_end": _timestamp(obj.get("current_period_end")),
+                "cancel_at_period_end": bool(obj.get("cancel_at_period_end")),
+                "canceled_at": _timestamp(obj.get("canceled_at")),
+            }
+            if items:
+                fields["plan_id"] = items[0]["price"]["id"]
+            if created >= state["event_at"]:
+                state["fields"].update(fields)
+        else:
+            state = payments.setdefault(obj["id"], {"fields": {}, "event_at": 0, "rows": []})
+            status = "succeeded" if kind == "payment_intent.succeeded" else "failed"
+            if PAYMENT_STATUS_RANK[status] >= PAYMENT_STATUS_RANK.get(state["fields"].get("status"), -1):
+                state["fields"].update({
+                    "status": status,
+                    "amount": (obj.get("amount_received") or obj.get("amount") or 0) / 100,
+                    "currency": (obj.get("currency") or "usd").upper(),
+                    "paid_at": _timestamp(created) if status == "succeeded" else None,
+                })
+
+        state["event_at"] = max(state["event_at"], created)
+        state["rows"].append(row)
+        state.setdefault("customer", obj.get("customer"))
+        if _user_id(obj) is not None:
+            state["user_id"] = _user_id(obj)
+        return True
+
+    def _write_subscriptions(self, db: Session, subscriptions: Dict[str, Dict], affected: set) -> List[StripeEvent]:
+        """Bulk-apply subscription state; returns the events that cannot be applied yet"""
+        if not subscriptions:
+            return []
+        existing = {
+            sub.stripe_subscription_id: sub
+            for sub in db.query(Subscription).filter(Subscription.stripe_subscription_id.in_(list(subscriptions)))
+        }
+        record_ids = [state["record_id"] for state in subscriptions.values() if "record_id" in state]
+        records = {
+            sub.id: sub
+            for sub in db.query(Subscription).filter(
+                Subscription.id.in_(record_ids),
+                Subscription.stripe_subscription_id.is_(None)
+            )
+        } if record_ids else {}
+
+        updates, inserts, deferred = [], [], []
+        for key, state in subscriptions.items():
+            sub = existing.get(key) or records.get(state.get("record_id"))
+            if sub is not None:
+                mapping = {"id": sub.id, "stripe_subscription_id": key}
+                if state.get("customer"):
+                    mapping["stripe_customer_id"] = state["customer"]
+                if sub.stripe_event_at is None or state["event_at"] >= sub.stripe_event_at:
+                    mapping.update(state["fields"])
+                    mapping["stripe_event_at"] = state["event_at"]
+                    affected.add(sub.user_id)
+                updates.append(mapping)
+            elif state.get("user_id") is not None:
+                inserts.append(dict(
+                    state["fields"],
+                    user_id=state["user_id"],
+                    stripe_subscription_id=key,
+                    stripe_customer_id=state.get("customer"),
+                    plan_id=state["fields"].get("plan_id") or "unknown",
+                    stripe_event_at=state["event_at"]
+                ))
+                affected.add(state["user_id"])
+            else:
+                # No local record or user yet; the checkout event may still be on its way
+                deferred.extend(state["rows"])
+        db.bulk_update_mappings(Subscription, updates)
+        db.bulk_insert_mappings(Subscription, inserts)
+        return deferred
+
+    def _write_payments(self, db: Session, payments: Dict[str, Dict]) -> List[StripeEvent]:
+        if not payments:
+            return []
+        existing = {
+            payment.stripe_payment_intent_id: payment
+            for payment in db.query(Payment).filter(Payment.stripe_payment_intent_id.in_(list(payments)))
+        }
+        updates, inserts, deferred = [], [], []
+        for key, state in payments.items():
+            fields = state["fields"]
+            payment = existing.get(key)
+            if payment is not None:
+                if PAYMENT_STATUS_RANK[fields["status"]] >= PAYMENT_STATUS_RANK.get(payment.status, 0):
+                    updates.append(dict(fields, id=payment.id))
+            elif state.get("user_id") is not None:
+                inserts.append(dict(fields, user_id=state["user_id"], stripe_payment_intent_id=key))
+            else:
+                deferred.extend(state["rows"])
+        db.bulk_update_mappings(Payment, updates)
+        db.bulk_insert_mappings(Payment, inserts)
+        return deferred
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1)))
+
+    def _retry(self, rows: Iterable[StripeEvent], error: str):
+        now = datetime.utcnow()
+        for row in rows:
+            row.attempts += 1
+            row.last_error = error[:1000]
+            if row.attempts >= self.max_attempts:
+                row.status = "failed"
+                logger.error(f"Stripe event {row.event_id} failed after {row.attempts} attempts: {error}")
+            else:
+                row.next_attempt_at = now + self._backoff(row.attempts)
+
+    def process_batch(self, db: Session) -> Dict[str, int]:
+        """Apply one batch of due events in a single transaction"""
+        rows = self._claim(db)
+        if not rows:
+            return {"processed": 0, "deferred": 0, "errored": 0}
+        event_ids = [row.id for row in rows]
+        subscriptions: Dict[str, Dict] = {}
+        payments: Dict[str, Dict] = {}
+        affected = set()
+        now = datetime.utcnow()
+        try:
+            for row in rows:
+                self._fold(json.loads(row.payload), row, subscriptions, payments)
+            deferred = self._write_subscriptions(db, subscriptions, affected) + self._write_payments(db, payments)
+            deferred_ids = {row.id for row in deferred}
+            for row in rows:
+                if row.id not in deferred_ids:
+                    row.status = "processed"
+                    row.processed_at = now
+                    row.last_error = None
+            self._retry(deferred, "Subscription or user not known yet")
+            db.commit()
+            # Drop cached entitlements so the new subscription state applies on the next check
+            entitlement_service.invalidate(*affected)
+            return {"processed": len(rows) - len(deferred_ids), "deferred": len(deferred_ids), "errored": 0}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Stripe webhook batch failed: {str(e)}")
+            rows = db.query(StripeEvent).filter(StripeEvent.id.in_(event_ids)).all()
+            self._retry(rows, str(e))
+            db.commit()
+            return {"processed": 0, "deferred": 0, "errored": len(rows)}
+
+    def replay(self, db: Session, event_ids: Optional[List[str]] = None, since: Optional[datetime] = None,
+               types: Optional[List[str]] = None) -> int:
+        """Put stored events back on the queue; subscriptions skip anything older than what they already hold"""
+        query = db.query(StripeEvent).filter(StripeEvent.type.in_(sorted(HANDLED_EVENTS)))
+        if event_ids:
+            query = query.filter(StripeEvent.event_id.in_(event_ids))
+        if since is not None:
+            query = query.filter(StripeEvent.stripe_created >= int(since.timestamp()))
+        if types:
+            query = query.filter(StripeEvent.type.in_(types))
+        count = query.update({
+            StripeEvent.status: "pending",
+            StripeEvent.attempts: 0,
+            StripeEvent.next_attempt_at: datetime.utcnow(),
+            StripeEvent.last_error: None
+        }, synchronize_session=False)
+        db.commit()
+        return count
+
+    async def run_forever(self, session_factory, interval_seconds: float = 1.0):
+        """Background loop; drains full batches back to back, then waits for the interval"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.process_batch(db)
+            finally:
+                db.close()
+
+        while True:
+            handled = 0
+            try:
+                handled = sum((await loop.run_in_executor(None, tick)).values())
+            except Exception as e:
+                logger.error(f"Stripe webhook worker failed: {str(e)}")
+            if handled < self.batch_size:
+                await asyncio.sleep(interval_seconds)
+
+
+# Create global instance
+settings = get_settings()
+stripe_webhooks = StripeWebhookProcessor(
+    webhook_secret=settings.stripe_webhook_secret,
+    batch_size=settings.stripe_webhook_batch_size,
+    max_attempts=settings.stripe_webhook_max_attempts
+)
@@ -0,0 +1,124 @@
+"""
+Token Store for TRENDY App
+Email verification and password reset tokens live in their own table instead
+of on the users row. Only the SHA-256 of each token is stored, looked up
+through a unique index. Consuming a token deletes its row, so it can be used
+once even under concurrent requests. Issuing is throttled per user and
+purpose, and a background job purges expired tokens in batches through the
+expiry index.
+"""
+
+import asyncio
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.auth_token import AuthToken
+
+logger = logging.getLogger(__name__)
+
+VERIFY_EMAIL = "verify_email"
+PASSWORD_RESET = "password_reset"
+
+
+class TokenThrottled(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Try again in {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+def hash_token(token: str) -> str:
+    """Tokens are 256-bit random values, so a fast unsalted hash is enough"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenStore:
+    def __init__(self, resend_interval_seconds: float = 60.0):
+        self.resend_interval = timedelta(seconds=resend_interval_seconds)
+
+    def issue(self, db: Session, user_id: int, purpose: str, ttl: timedelta) -> str:
+        """Replace the user's live token for purpose with a new one; raises TokenThrottled on rapid resends"""
+        now = datetime.utcnow()
+        last = db.query(AuthToken.created_at).filter(
+            AuthToken.user_id == user_id,
+            AuthToken.purpose == purpose
+        ).order_by(AuthToken.created_at.desc()).limit(1).scalar()
+        if last is not None and now - last < self.resend_interval:
+            raise TokenThrottled(int((last + self.resend_interval - now).total_seconds()) + 1)
+
+        token = secrets.token_urlsafe(32)
+        # One live token per user and purpose; older links stop working
+        db.query(AuthToken).filter(
+            AuthToken.user_id == user_id,
+            AuthToken.purpose == purpose
+        ).delete(synchronize_session=False)
+        db.add(AuthToken(
+            user_id=user_id,
+            purpose=purpose,
+            token_hash=hash_token(token),
+            expires_at=now + ttl,
+            created_at=now
+        ))
+        db.commit()
+        return token
+
+    def consume(self, db: Session, token: str, purpose: str, user_id: Optional[int] = None) -> Optional[int]:
+        """Use up a valid token and return its user id; None if unknown, expired or already used"""
+        query = db.query(AuthToken.id, AuthToken.user_id).filter(
+            AuthToken.token_hash == hash_token(token),
+            AuthToken.purpose == purpose,
+            AuthToken.expires_at > datetime.utcnow()
+        )
+        if user_id is not None:
+            query = query.filter(AuthToken.user_id == user_id)
+        row = query.first()
+        if row is None:
+            return None
+        # Only one concurrent caller can delete the row
+        deleted = db.query(AuthToken).filter(AuthToken.id == row.id).delete(synchronize_session=False)
+        db.commit()
+        return row.user_id if deleted else None
+
+    def purge(self, db: Session, batch_size: int = 1000) -> int:
+        """Delete expired tokens, one short transaction per batch"""
+        now = datetime.utcnow()
+        purged = 0
+        while True:
+            token_ids = [token_id for (token_id,) in db.query(AuthToken.id).filter(
+                AuthToken.expires_at <= now
+            ).limit(batch_size)]
+            if not token_ids:
+                break
+            db.query(AuthToken).filter(AuthToken.id.in_(token_ids)).delete(synchronize_session=False)
+            db.commit()
+            purged += len(token_ids)
+            if len(token_ids) < batch_size:
+                break
+        return purged
+
+    async def run_forever(self, session_factory, interval_seconds: float = 300.0, batch_size: int = 1000):
+        """Background loop; purges expired tokens every interval"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.purge(db, batch_size)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await loop.run_in_executor(None, tick)
+            except Exception as e:
+                logger.error(f"Token purge failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Create global instance
+settings = get_settings()
+token_store = TokenStore(resend_interval_seconds=settings.email_token_resend_seconds)
@@ -0,0 +1,122 @@
+"""
+User Counter Service for TRENDY App
+followers_count, following_count and posts_count are denormalized onto users.
+Writers adjust them with relative UPDATEs inside their own transaction, reads
+come from a short-lived per-worker cache, and a background reconciliation job
+walks users in id order and repairs any drift from the source tables.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.post import Follower, Post
+from app.models.user import User
+from app.services.follow_graph import AdjacencyCache
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("followers_count", "following_count", "posts_count")
+
+
+class UserCounterService:
+    def __init__(self, max_cached_users: int = 50000, ttl_seconds: float = 30.0):
+        self.cache = AdjacencyCache(max_cached_users, ttl_seconds)
+        # Next user id for the reconciliation sweep; wraps to 0 after the last user
+        self._cursor = 0
+
+    # Writes (no commit; they ride on the caller's transaction)
+
+    def adjust(self, db: Session, user_ids: Iterable[int], counter: str, delta: int):
+        """Add delta to counter for every user in user_ids with one UPDATE, never going below zero"""
+        user_ids = list(user_ids)
+        if not user_ids or not delta:
+            return
+        column = getattr(User, counter)
+        query = db.query(User).filter(User.id.in_(user_ids))
+        if delta < 0:
+            query = query.filter(column >= -delta)
+        query.update({column: column + delta}, synchronize_session=False)
+        self.cache.invalidate(*user_ids)
+
+    # Reads
+
+    def get_many(self, db: Session, user_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        results, missing = {}, []
+        for user_id in set(user_ids):
+            cached = self.cache.get(user_id)
+            if cached is None:
+                missing.append(user_id)
+            else:
+                results[user_id] = cached
+        for start in range(0, len(missing), 1000):
+            chunk = missing[start:start + 1000]
+            for user_id, *values in db.query(User.id, *(getattr(User, name) for name in COUNTERS)).filter(
+                User.id.in_(chunk)
+            ):
+                results[user_id] = {name: value or 0 for name, value in zip(COUNTERS, values)}
+                self.cache.put(user_id, results[user_id])
+        return results
+
+    def get(self, db: Session, user_id: int) -> Dict[str, int]:
+        return self.get_many(db, [user_id]).get(user_id)
+
+    # Reconciliation
+
+    @staticmethod
+    def _grouped_counts(db: Session, column, user_ids: List[int]) -> Dict[int, int]:
+        return dict(db.query(column, func.count()).filter(column.in_(user_ids)).group_by(column))
+
+    def reconcile(self, db: Session, batch_size: int = 1000) -> Dict[str, int]:
+        """Recount one batch of users from the source tables and fix any drift"""
+        user_ids = [user_id for (user_id,) in db.query(User.id).filter(
+            User.id >= self._cursor
+        ).order_by(User.id).limit(batch_size)]
+        if not user_ids:
+            self._cursor = 0
+            return {"checked": 0, "repaired": 0}
+
+        actual = {
+            "followers_count": self._grouped_counts(db, Follower.following_id, user_ids),
+            "following_count": self._grouped_counts(db, Follower.follower_id, user_ids),
+            "posts_count": self._grouped_counts(db, Post.user_id, user_ids),
+        }
+        stored = db.query(User.id, *(getattr(User, name) for name in COUNTERS)).filter(User.id.in_(user_ids))
+        repairs = []
+        for user_id, *values in stored:
+            expected = {name: actual[name].get(user_id, 0) for name in COUNTERS}
+            if any((value or 0) != expected[name] for name, value in zip(COUNTERS, values)):
+                repairs.append({"id": user_id, **expected})
+        if repairs:
+            db.bulk_update_mappings(User, repairs)
+            db.commit()
+            self.cache.invalidate(*(repair["id"] for repair in repairs))
+            logger.info(f"Repaired counters for {len(repairs)} users")
+        self._cursor = user_ids[-1] + 1
+        return {"checked": len(user_ids), "repaired": len(repairs)}
+
+    async def run_forever(self, session_factory, interval_seconds: float = 60.0, batch_size: int = 1000):
+        """Background loop; reconciles one batch of users per interval"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.reconcile(db, batch_size)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await loop.run_in_executor(None, tick)
+            except Exception as e:
+                logger.error(f"User counter reconciliation failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Create global instance
+settings = get_settings()
+user_counters = UserCounterService(ttl_seconds=settings.user_counter_cache_ttl_seconds)
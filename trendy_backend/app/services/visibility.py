@@ -0,0 +1,196 @@
+"""
+Visibility Filter Service for TRENDY App
+Applies blocks and mutes to read paths without joining user_blocks/user_mutes
+into every query. A block hides both users from each other everywhere; a mute
+hides the muted user from the muter on the surfaces its flags select. Each
+viewer's hidden authors are cached per surface as frozensets, and a bloom
+filter of every user with an active block or mute lets the common case (no
+restrictions at all) skip the cache and the database entirely.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, TypeVar
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.sketches import BloomFilter
+from app.models.user_relationships import UserBlock, UserMute
+from app.services.follow_graph import AdjacencyCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Surfaces with a mute flag; any other surface (search, profiles) applies blocks only
+MUTE_FLAGS = {
+    "posts": UserMute.mute_posts,
+    "stories": UserMute.mute_stories,
+    "comments": UserMute.mute_comments,
+    "messages": UserMute.mute_messages,
+}
+
+EMPTY = frozenset()
+
+
+class HiddenAuthors(NamedTuple):
+    blocked: frozenset  # blocked by the viewer or blocking the viewer
+    muted: Dict[str, frozenset]
+    valid_until: float  # monotonic time of the earliest expires_at among the rows
+
+    def for_surface(self, surface: str) -> frozenset:
+        muted = self.muted.get(surface, EMPTY)
+        return self.blocked | muted if muted else self.blocked
+
+
+class VisibilityService:
+    def __init__(self, max_cached_users: int = 50000, ttl_seconds: float = 30.0,
+                 bloom_capacity: int = 1000000, bloom_error_rate: float = 0.01):
+        self.cache = AdjacencyCache(max_cached_users, ttl_seconds)
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        # None until the first rebuild; every viewer is looked up until then
+        self._restricted: Optional[BloomFilter] = None
+        # Users invalidated while a rebuild is reading the tables
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _active(model, now: datetime):
+        return or_(model.expires_at.is_(None), model.expires_at > now)
+
+    # Loading
+
+    def rebuild_bloom(self, db: Session) -> int:
+        """Rebuild the filter of users that have any active block or mute"""
+        with self._lock:
+            self._pending.clear()
+        now = datetime.utcnow()
+        restricted = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        count = 0
+        for column, model in ((UserBlock.blocker_id, UserBlock), (UserBlock.blocked_id, UserBlock),
+                              (UserMute.muter_id, UserMute)):
+            for (user_id,) in db.query(column).filter(self._active(model, now)).distinct():
+                restricted.add(user_id)
+                count += 1
+        with self._lock:
+            restricted.update(self._pending)
+            self._restricted = restricted
+        return count
+
+    def _load(self, db: Session, viewer_id: int) -> HiddenAuthors:
+        now = datetime.utcnow()
+        expiries = []
+        blocked = set()
+        for blocker_id, blocked_id, expires_at in db.query(
+            UserBlock.blocker_id, UserBlock.blocked_id, UserBlock.expires_at
+        ).filter(
+            or_(UserBlock.blocker_id == viewer_id, UserBlock.blocked_id == viewer_id),
+            self._active(UserBlock, now)
+        ):
+            blocked.add(blocked_id if blocker_id == viewer_id else blocker_id)
+            if expires_at is not None:
+                expiries.append(expires_at.replace(tzinfo=None))
+
+        muted: Dict[str, set] = {surface: set() for surface in MUTE_FLAGS}
+        columns = [UserMute.muted_id, UserMute.expires_at] + list(MUTE_FLAGS.values())
+        for muted_id, expires_at, *flags in db.query(*columns).filter(
+            UserMute.muter_id == viewer_id,
+            self._active(UserMute, now)
+        ):
+            for surface, flag in zip(MUTE_FLAGS, flags):
+                if flag:
+                    muted[surface].add(muted_id)
+            if expires_at is not None:
+                expiries.append(expires_at.replace(tzinfo=None))
+
+        valid_until = float("inf")
+        if expiries:
+            valid_until = time.monotonic() + max(0.0, (min(expiries) - now).total_seconds())
+        return HiddenAuthors(
+            blocked=frozenset(blocked),
+            muted={surface: frozenset(ids) for surface, ids in muted.items() if ids},
+            valid_until=valid_until
+        )
+
+    def hidden_authors(self, db: Session, viewer_id: Optional[int], surface: str = "posts") -> frozenset:
+        """Author ids the viewer must not see on surface; empty for anonymous viewers"""
+        if viewer_id is None:
+            return EMPTY
+        if self._restricted is not None and viewer_id not in self._restricted:
+            return EMPTY
+        entry = self.cache.get(viewer_id)
+        if entry is None or time.monotonic() >= entry.valid_until:
+            entry = self._load(db, viewer_id)
+            self.cache.put(viewer_id, entry)
+        return entry.for_surface(surface)
+
+    # Read paths
+
+    def filter_visible(self, db: Session, viewer_id: Optional[int], author_ids: Iterable[int],
+                       surface: str = "posts") -> List[bool]:
+        """One visibility flag per author id, from a single cached lookup"""
+        author_ids = list(author_ids)
+        hidden = self.hidden_authors(db, viewer_id, surface)
+        if not hidden:
+            return [True] * len(author_ids)
+        return [author_id not in hidden for author_id in author_ids]
+
+    def filter_items(self, db: Session, viewer_id: Optional[int], items: Iterable[T], author_of,
+                     surface: str = "posts") -> List[T]:
+        """Drop items whose author (author_of(item)) is hidden from the viewer"""
+        items = list(items)
+        hidden = self.hidden_authors(db, viewer_id, surface)
+        if not hidden:
+            return items
+        return [item for item in items if author_of(item) not in hidden]
+
+    def exclude_clause(self, db: Session, viewer_id: Optional[int], author_column, surface: str = "posts"):
+        """A NOT IN filter for author_column, or None when nothing is hidden"""
+        hidden = self.hidden_authors(db, viewer_id, surface)
+        return author_column.notin_(sorted(hidden)) if hidden else None
+
+    def is_blocked_between(self, db: Session, user_id: int, other_id: int) -> bool:
+        return other_id in self.hidden_authors(db, user_id, "blocks")
+
+    # Invalidation
+
+    def invalidate(self, *user_ids: int):
+        """Call after any block/mute change involving these users"""
+        self.cache.invalidate(*user_ids)
+        with self._lock:
+            self._pending.update(user_ids)
+            if self._restricted is not None:
+                self._restricted.update(user_ids)
+
+    async def run_forever(self, session_factory, interval_seconds: float = 60.0):
+        """Background loop; rebuilds the restricted-users filter so other workers' changes and expiries show up"""
+        loop = asyncio.get_event_loop()
+
+        def tick():
+            db = session_factory()
+            try:
+                return self.rebuild_bloom(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await loop.run_in_executor(None, tick)
+            except Exception as e:
+                logger.error(f"Visibility filter rebuild failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Create global instance
+settings = get_settings()
+visibility_service = VisibilityService(
+    max_cached_users=settings.visibility_cache_users,
+    ttl_seconds=settings.visibility_cache_ttl_seconds,
+    bloom_capacity=settings.visibility_bloom_capacity,
+    bloom_error_rate=settings.visibility_bloom_error_rate
+)
@@ -0,0 +1 @@
+# Endpoint benchmark suite
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Shop catalog benchmark
+Generates a seeded synthetic catalog and compares the old list-comprehension
+filtering with CatalogIndex.search on the same queries (results are checked
+to match).
+
+Usage:
+    python -m benchmarks.catalog_bench --products 300000 --queries 500
+"""
+
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.catalog import CatalogIndex
+
+
+def synthetic_catalog(rng: random.Random, count: int, categories: int, subcategories: int, brands: int):
+    return [
+        SimpleNamespace(
+            id=str(i),
+            category=f"Category {rng.randrange(categories)}",
+            subcategory=f"Subcategory {rng.randrange(subcategories)}",
+            brand=f"Brand {rng.randrange(brands)}",
+            price=round(rng.uniform(5, 500), 2),
+            rating=round(rng.uniform(1, 5), 1),
+            trending_score=round(rng.uniform(0, 100), 1),
+            in_stock=rng.random() > 0.1
+        )
+        for i in range(count)
+    ]
+
+
+def list_filter(products, category, brand, min_price, max_price, limit):
+    """The previous api/shop.get_products implementation"""
+    if category:
+        products = [p for p in products if category.lower() in p.category.lower()]
+    if brand:
+        products = [p for p in products if brand.lower() in p.brand.lower()]
+    if min_price:
+        products = [p for p in products if p.price >= min_price]
+    if max_price:
+        products = [p for p in products if p.price <= max_price]
+    return sorted(products, key=lambda x: x.trending_score, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark faceted catalog search")
+    parser.add_argument("--products", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--subcategories", type=int, default=200)
+    parser.add_argument("--brands", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    products = synthetic_catalog(rng, args.products, args.categories, args.subcategories, args.brands)
+    started = time.perf_counter()
+    catalog = CatalogIndex(products)
+    print(f"Indexed {args.products:,} products in {time.perf_counter() - started:.2f}s")
+
+    queries = []
+    for _ in range(args.queries):
+        low = rng.uniform(5, 300)
+        queries.append({
+            "category": f"Category {rng.randrange(args.categories)}" if rng.random() < 0.7 else None,
+            "brand": f"Brand {rng.randrange(args.brands)}" if rng.random() < 0.2 else None,
+            "min_price": low if rng.random() < 0.5 else None,
+            "max_price": low + rng.uniform(10, 200) if rng.random() < 0.5 else None,
+        })
+
+    for name, run in (
+        ("list", lambda q: list_filter(products, q["category"], q["brand"], q["min_price"], q["max_price"], 20)),
+        ("index", lambda q: catalog.search(sort_by="trending", limit=20, with_facets=False, **q).items),
+        ("index+facets", lambda q: catalog.search(sort_by="trending", limit=20, **q).items),
+    ):
+        latencies = []
+        for query in queries:
+            t0 = time.perf_counter()
+            run(query)
+            latencies.append(time.perf_counter() - t0)
+        latencies = np.array(latencies) * 1000
+        print(f"{name:14s} p50 {np.percentile(latencies, 50):8.2f}ms  p99 {np.percentile(latencies, 99):8.2f}ms")
+
+    # "Brand 1" also matches "Brand 10".."Brand 1999" in both implementations (substring match)
+    mismatches = sum(
+        [p.id for p in list_filter(products, q["category"], q["brand"], q["min_price"], q["max_price"], 20)]
+        != [p.id for p in catalog.search(limit=20, with_facets=False, **q).items]
+        for q in queries[:50]
+    )
+    print(f"result mismatches vs list filter: {mismatches}/50")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Scalable benchmark data generator for TRENDY App
+Bulk-inserts users, posts, follow edges, direct conversations with their
+messages and inbox entries, with a fixed seed so every run produces the same
+dataset.
+
+Usage:
+    python -m benchmarks.datagen --database-url sqlite:///./bench.db \
+        --users 1000000 --posts 10000000 --follows 50000000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import bindparam, create_engine
+from sqlalchemy.engine import Engine
+
+from app.database import schema_metadata
+from app.models import User, Post, Follower, Message, Conversation, InboxEntry
+
+WORDS = [
+    "happy", "love", "trending", "viral", "music", "football", "movie", "chill",
+    "calm", "amazing", "fire", "weekend", "coffee", "travel", "sunset", "vibes",
+    "sad", "lonely", "excited", "awesome", "shop", "deal", "style", "night",
+]
+
+BENCH_EPOCH = datetime(2025, 1, 1)
+
+
+def _chunks(rows: Iterator[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk_insert(engine: Engine, table, rows: Iterator[Dict], batch_size: int, label: str) -> int:
+    """Insert rows with executemany in fixed-size transactions."""
+    total = 0
+    started = time.perf_counter()
+    for batch in _chunks(rows, batch_size):
+        with engine.begin() as conn:
+            conn.execute(table.insert(), batch)
+        total += len(batch)
+        if total % (batch_size * 20) == 0:
+            rate = total / (time.perf_counter() - started)
+            print(f"  {label}: {total:,} rows ({rate:,.0f} rows/s)")
+    print(f"✅ {label}: {total:,} rows in {time.perf_counter() - started:.1f}s")
+    return total
+
+
+def generate_users(count: int, rng: random.Random) -> Iterator[Dict]:
+    for user_id in range(1, count + 1):
+        yield {
+            "id": user_id,
+            "firebase_uid": f"bench_uid_{user_id}",
+            "email": f"bench_user_{user_id}@bench.trendy.app",
+            "username": f"bench_user_{user_id}",
+            "display_name": f"Bench User {user_id}",
+            "is_verified": rng.random() < 0.3,
+            "is_active": True,
+            "is_premium": rng.random() < 0.05,
+            "subscription_tier": "free",
+            "preferences": {},
+            "user_metadata": {},
+            "created_at": BENCH_EPOCH + timedelta(minutes=user_id),
+        }
+
+
+def _author(users: int, rng: random.Random) -> int:
+    # Skewed towards low ids so a minority of creators produce most content
+    return min(users, int(rng.paretovariate(1.2))) if rng.random() < 0.5 else rng.randint(1, users)
+
+
+def generate_posts(count: int, users: int, rng: random.Random) -> Iterator[Dict]:
+    for post_id in range(1, count + 1):
+        words = rng.sample(WORDS, 6)
+        yield {
+            "id": post_id,
+            "user_id": _author(users, rng),
+            "content": " ".join(words),
+            "media_urls": [],
+            "media_type": "image",
+            "tags": [],
+            "mentions": [],
+            "hashtags": [f"#{words[0]}", f"#{words[1]}"],
+            "likes_count": int(rng.expovariate(1 / 20)),
+            "comments_count": int(rng.expovariate(1 / 4)),
+            "shares_count": 0,
+            "views_count": int(rng.expovariate(1 / 200)),
+            "is_published": True,
+            "is_flagged": False,
+            "moderation_status": "approved",
+            "created_at": BENCH_EPOCH + timedelta(seconds=post_id * 3),
+        }
+
+
+def generate_follows(count: int, users: int, rng: random.Random) -> Iterator[Dict]:
+    """Yield `count` unique follow edges with a heavy-tailed in-degree."""
+    per_user = min(users - 1, -(-count // users))
+    emitted = 0
+    for follower_id in range(1, users + 1):
+        targets = set()
+        while len(targets) < per_user:
+            target = _author(users, rng)
+            if target != follower_id:
+                targets.add(target)
+        for target in sorted(targets):
+            yield {"follower_id": follower_id, "following_id": target, "created_at": BENCH_EPOCH}
+            emitted += 1
+            if emitted >= count:
+                return
+
+
+def generate_conversations(count: int, users: int, rng: random.Random) -> List[Tuple[int, int]]:
+    """`count` distinct direct pairs (low, high); one side is skewed towards active users"""
+    count = min(count, users * (users - 1) // 2)
+    pairs = set()
+    while len(pairs) < count:
+        a, b = _author(users, rng), rng.randint(1, users)
+        if a != b:
+            pairs.add((min(a, b), max(a, b)))
+    return sorted(pairs)
+
+
+def conversation_rows(pairs: List[Tuple[int, int]]) -> Iterator[Dict]:
+    for conversation_id, (low, high) in enumerate(pairs, start=1):
+        yield {"id": conversation_id, "kind": "direct", "user_low_id": low, "user_high_id": high,
+               "created_at": BENCH_EPOCH}
+
+
+def generate_messages(count: int, pairs: List[Tuple[int, int]], rng: random.Random,
+                      last: Dict[int, List]) -> Iterator[Dict]:
+    """Messages spread over the conversations; `last` collects each conversation's inbox state"""
+    for message_id in range(1, count + 1):
+        conversation_id = rng.randint(1, len(pairs))
+        low, high = pairs[conversation_id - 1]
+        sender = low if rng.random() < 0.5 else high
+        content = " ".join(rng.sample(WORDS, 5))
+        sent_at = BENCH_EPOCH + timedelta(seconds=message_id)
+        state = last.get(conversation_id)
+        # [message_id, sent_at, sender, preview, messages since the other side last wrote]
+        run = state[4] + 1 if state and state[2] == sender else 1
+        last[conversation_id] = [message_id, sent_at, sender, content, run]
+        yield {
+            "id": message_id,
+            "sender_id": sender,
+            "receiver_id": high if sender == low else low,
+            "conversation_id": conversation_id,
+            "content": content,
+            "message_type": "text",
+            "sent_at": sent_at,
+            "is_deleted": False,
+            "is_burn_after_reading": False,
+            "is_edited": False,
+        }
+
+
+def generate_inbox_entries(pairs: List[Tuple[int, int]], last: Dict[int, List]) -> Iterator[Dict]:
+    """Two entries per conversation, matching what ConversationService.record_message maintains"""
+    for conversation_id, participants in enumerate(pairs, start=1):
+        state = last.get(conversation_id)
+        for user_id in participants:
+            row = {"user_id": user_id, "conversation_id": conversation_id, "unread_count": 0,
+                   "last_message_id": None, "last_message_at": None, "last_sender_id": None,
+                   "last_message_preview": None, "last_read_message_id": None}
+            if state:
+                message_id, sent_at, sender, preview, run = state
+                row.update(last_message_id=message_id, last_message_at=sent_at, last_sender_id=sender,
+                           last_message_preview=preview)
+                if user_id == sender:
+                    row["last_read_message_id"] = message_id
+                else:
+                    row["unread_count"] = run
+            yield row
+
+
+def generate_dataset(
+    database_url: str,
+    users: int,
+    posts: int,
+    follows: int,
+    messages: int,
+    conversations: int,
+    batch_size: int = 10000,
+    seed: int = 42,
+) -> Dict[str, int]:
+    engine = create_engine(database_url)
+    schema_metadata().create_all(bind=engine)
+
+    rng = random.Random(seed)
+    counts = {
+        "users": _bulk_insert(engine, User.__table__, generate_users(users, rng), batch_size, "users"),
+        "posts": _bulk_insert(engine, Post.__table__, generate_posts(posts, users, rng), batch_size, "posts"),
+        "follows": _bulk_insert(engine, Follower.__table__, generate_follows(follows, users, rng), batch_size, "follows"),
+    }
+    pairs = generate_conversations(conversations, users, rng)
+    last: Dict[int, List] = {}
+    counts["conversations"] = _bulk_insert(engine, Conversation.__table__, conversation_rows(pairs), batch_size,
+                                           "conversations")
+    counts["messages"] = _bulk_insert(engine, Message.__table__, generate_messages(messages, pairs, rng, last),
+                                      batch_size, "messages")
+    counts["inbox_entries"] = _bulk_insert(engine, InboxEntry.__table__, generate_inbox_entries(pairs, last),
+                                           batch_size, "inbox_entries")
+    # Conversation rows carry the same last-message pointer as the inbox entries
+    pointers = (
+        {"conversation_id": conversation_id, "last_message_id": state[0], "last_message_at": state[1]}
+        for conversation_id, state in last.items()
+    )
+    update = Conversation.__table__.update().where(Conversation.__table__.c.id == bindparam("conversation_id"))
+    for batch in _chunks(pointers, batch_size):
+        with engine.begin() as conn:
+            conn.execute(update, batch)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a benchmark dataset")
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--follows", type=int, default=500000)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--conversations", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate_dataset(
+        args.database_url,
+        users=args.users,
+        posts=args.posts,
+        follows=args.follows,
+        messages=args.messages,
+        conversations=args.conversations,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Creator token ledger benchmark
+Appends a seeded stream of mints and transfers to a fresh ledger directory,
+reopens it (full log replay), then measures balance and history-page reads.
+For comparison it also times the previous full-chain scan of
+api/blockchain.get_token_balance on a smaller in-memory chain, since its cost
+grows with the chain length.
+
+Usage:
+    python -m benchmarks.ledger_bench --transactions 10000000 --accounts 100000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from app.core.ledger import Ledger, SYSTEM_ACCOUNT
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+def report(name, latencies):
+    latencies = [value * 1000 for value in latencies]
+    print(f"{name:18s} p50 {percentile(latencies, 50):8.4f}ms  p99 {percentile(latencies, 99):8.4f}ms")
+
+
+def transfers(rng: random.Random, total: int, accounts: int):
+    """Mint to every account first, then random transfers small enough to never overdraw"""
+    for i in range(min(total, accounts)):
+        yield SYSTEM_ACCOUNT, f"user{i}", 1000000.0, "token_creation"
+    for _ in range(total - accounts):
+        sender, receiver = rng.randrange(accounts), rng.randrange(accounts)
+        yield f"user{sender}", f"user{receiver}", round(rng.uniform(0.01, 1.0), 2), "token_transfer"
+
+
+def legacy_balance(chain, user_id):
+    """The previous api/blockchain.get_token_balance implementation"""
+    balance = 0
+    for block in chain:
+        for transaction in block['transactions']:
+            if transaction['receiver'] == user_id:
+                balance += transaction['amount']
+            if transaction['sender'] == user_id:
+                balance -= transaction['amount']
+    return balance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the creator token ledger")
+    parser.add_argument("--transactions", type=int, default=10000000)
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--block-size", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=10000)
+    parser.add_argument("--legacy-transactions", type=int, default=200000)
+    parser.add_argument("--fsync", action="store_true", help="fsync every block, as in production")
+    parser.add_argument("--directory", help="ledger directory (default: a temporary one, removed afterwards)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directory = args.directory or tempfile.mkdtemp(prefix="ledger_bench_")
+    try:
+        ledger = Ledger(directory, fsync=args.fsync)
+        started = time.perf_counter()
+        batch = []
+        for transfer in transfers(rng, args.transactions, args.accounts):
+            batch.append(transfer)
+            if len(batch) == args.block_size:
+                ledger.commit(batch)
+                batch = []
+        if batch:
+            ledger.commit(batch)
+        elapsed = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"Appended {args.transactions:,} transactions in {elapsed:.1f}s "
+              f"({args.transactions / elapsed:,.0f} tx/s, {size / 2 ** 20:,.0f} MiB on disk)")
+        ledger.close()
+
+        started = time.perf_counter()
+        ledger = Ledger(directory)
+        stats = ledger.stats()
+        elapsed = time.perf_counter() - started
+        print(f"Replayed {stats['transactions']:,} transactions / {stats['blocks']:,} blocks in {elapsed:.1f}s")
+
+        accounts = [f"user{rng.randrange(args.accounts)}" for _ in range(args.reads)]
+        latencies = []
+        for account in accounts:
+            t0 = time.perf_counter()
+            ledger.balance(account)
+            latencies.append(time.perf_counter() - t0)
+        report("balance", latencies)
+
+        latencies, cursors = [], []
+        for account in accounts[:args.reads // 10]:
+            t0 = time.perf_counter()
+            _, cursor = ledger.history(account, limit=50)
+            latencies.append(time.perf_counter() - t0)
+            cursors.append((account, cursor))
+        report("history page 1", latencies)
+        latencies = []
+        for account, cursor in cursors:
+            t0 = time.perf_counter()
+            ledger.history(account, cursor, limit=50)
+            latencies.append(time.perf_counter() - t0)
+        report("history page 2", latencies)
+
+        started = time.perf_counter()
+        blocks = ledger.verify()
+        print(f"Verified {blocks:,} Merkle roots and block hashes in {time.perf_counter() - started:.1f}s")
+        ledger.close()
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    chain, block = [], []
+    for sender, receiver, amount, kind in transfers(rng, args.legacy_transactions, args.accounts):
+        block.append({"sender": sender, "receiver": receiver, "amount": amount, "type": kind})
+        if len(block) == args.block_size:
+            chain.append({"transactions": block})
+            block = []
+    latencies = []
+    for account in accounts[:20]:
+        t0 = time.perf_counter()
+        legacy_balance(chain, account)
+        latencies.append(time.perf_counter() - t0)
+    report(f"legacy scan @{args.legacy_transactions // 1000}k", latencies)
+    projected = percentile(latencies, 50) * 1000 * args.transactions / args.legacy_transactions
+    print(f"  (linear in chain length: ~{projected:,.0f}ms per balance read at {args.transactions:,} transactions)")
+
+
+if __name__ == "__main__":
+    main()
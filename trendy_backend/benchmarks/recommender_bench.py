@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Recommender throughput benchmark
+Generates seeded power-law interactions, times the offline neighbor build and
+reports single-core recommendation requests per second with p50/p99 latency.
+
+Usage:
+    python -m benchmarks.recommender_bench --users 100000 --items 50000 --interactions 5000000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.core.recommender import SCIPY_AVAILABLE, TrendyRecommender
+
+ACTIONS = ["like", "play", "complete", "share", "save", "skip"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recommendation serving throughput")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--neighbors", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    # Zipf-like popularity so a few items dominate, as in real catalogs
+    item_weights = 1.0 / np.arange(1, args.items + 1) ** 0.8
+    item_weights /= item_weights.sum()
+    users = rng.integers(0, args.users, size=args.interactions)
+    items = rng.choice(args.items, size=args.interactions, p=item_weights)
+    actions = rng.integers(0, len(ACTIONS), size=args.interactions)
+
+    engine = TrendyRecommender(neighbors=args.neighbors)
+    started = time.perf_counter()
+    engine.load_interactions(
+        (f"u{u}", "music", f"m{i}", ACTIONS[a]) for u, i, a in zip(users.tolist(), items.tolist(), actions.tolist())
+    )
+    print(f"Loaded {args.interactions:,} interactions in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    result = engine.build()["music"]
+    print(f"Built top-{result['neighbors']} neighbors for {result['items']:,} items "
+          f"in {time.perf_counter() - started:.1f}s (scipy: {SCIPY_AVAILABLE})")
+
+    picker = random.Random(args.seed)
+    user_ids = [f"u{picker.randrange(args.users)}" for _ in range(args.requests)]
+    latencies = np.empty(args.requests)
+    started = time.perf_counter()
+    for n, user_id in enumerate(user_ids):
+        t0 = time.perf_counter()
+        engine.get_recommendations(user_id, "music", args.limit)
+        latencies[n] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.requests / elapsed:,.0f} requests/s on one core; "
+          f"p50 {np.percentile(latencies, 50) * 1e6:.0f}us, p99 {np.percentile(latencies, 99) * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark runner for TRENDY App
+Drives the load scenarios against the ASGI app in-process or through a
+real uvicorn server, reports p50/p95/p99 latency and throughput, and
+compares the results with a JSON baseline.
+
+Usage:
+    python -m benchmarks.datagen --database-url sqlite:///./bench.db
+    python -m benchmarks.run --database-url sqlite:///./bench.db --mode inprocess
+    python -m benchmarks.run --mode uvicorn --update-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.main import app
+from app.database import get_db
+from app.auth.middleware import get_current_user, get_current_user_id
+from app.models.user import User
+from benchmarks.scenarios import SCENARIOS, Scenario
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BENCH_USER_ID = 1
+
+
+def install_overrides(database_url: str):
+    """Point the app at the benchmark database and a fixed authenticated user."""
+    engine = create_engine(database_url, connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {})
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def bench_db():
+        db = BenchSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def bench_user(db: Session = Depends(get_db)) -> User:
+        return db.query(User).filter(User.id == BENCH_USER_ID).first()
+
+    app.dependency_overrides[get_db] = bench_db
+    app.dependency_overrides[get_current_user] = bench_user
+    app.dependency_overrides[get_current_user_id] = lambda: BENCH_USER_ID
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    users: int,
+    seed: int,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    remaining = iter(range(requests))
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        for _ in remaining:
+            kwargs = scenario.build(rng, users)
+            started = time.perf_counter()
+            response = await client.request(scenario.method, scenario.path, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+class UvicornThread:
+    """Runs the app under a real uvicorn server on a background thread"""
+
+    def __init__(self, port: int):
+        import uvicorn
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def run_suite(args) -> Dict[str, Dict[str, Any]]:
+    names = args.scenarios or list(SCENARIOS)
+    results = {}
+
+    if args.mode == "inprocess":
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    else:
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30.0)
+
+    async with client:
+        for name in names:
+            scenario = SCENARIOS[name]
+            await run_scenario(client, scenario, args.warmup, args.concurrency, args.users, args.seed)
+            results[name] = await run_scenario(client, scenario, args.requests, args.concurrency, args.users, args.seed)
+            report = results[name]
+            print(
+                f"{name:<18} p50={report['p50_ms']:>8.2f}ms p95={report['p95_ms']:>8.2f}ms "
+                f"p99={report['p99_ms']:>8.2f}ms {report['throughput_rps']:>8.1f} req/s "
+                f"errors={report['error_rate']:.1%}"
+            )
+    return results
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a list of regressions where p95 or throughput moved beyond `tolerance`."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["error_rate"] > previous["error_rate"]:
+            regressions.append(f"{name}: error rate {previous['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the endpoint benchmark suite")
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenarios", nargs="*", choices=sorted(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=10000, help="user count the dataset was generated with")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    install_overrides(args.database_url)
+
+    if args.mode == "uvicorn":
+        with UvicornThread(args.port):
+            results = asyncio.run(run_suite(args))
+    else:
+        results = asyncio.run(run_suite(args))
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "modes": {args.mode: results},
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        baseline.setdefault("modes", {})[args.mode] = results
+        baseline["generated_at"] = report["generated_at"]
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"✅ Baseline updated: {args.baseline}")
+        return 0
+
+    regressions = compare_with_baseline(results, baseline.get("modes", {}).get(args.mode, {}), args.tolerance)
+    for regression in regressions:
+        print(f"❌ Regression: {regression}")
+    if not regressions:
+        print("✅ No regressions against baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
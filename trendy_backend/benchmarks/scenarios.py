@@ -0,0 +1,59 @@
+"""
+Load scenarios for the endpoint benchmark suite
+Each scenario builds request kwargs from a per-request RNG so runs are
+reproducible and spread across the seeded dataset.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    build: Callable[[random.Random, int], Dict[str, Any]]
+
+
+def _feed(rng: random.Random, users: int) -> Dict[str, Any]:
+    return {"params": {"preferred_mood": rng.choice(["all", "happy", "chill", "hype"]), "limit": 20}}
+
+
+def _posts_page(rng: random.Random, users: int) -> Dict[str, Any]:
+    return {"params": {"skip": rng.randint(0, 200) * 20, "limit": 20}}
+
+
+def _search(rng: random.Random, users: int) -> Dict[str, Any]:
+    return {"params": {"query": f"bench_user_{rng.randint(1, users)}"}}
+
+
+def _inbox(rng: random.Random, users: int) -> Dict[str, Any]:
+    return {"params": {"skip": 0, "limit": 50}}
+
+
+def _conversations(rng: random.Random, users: int) -> Dict[str, Any]:
+    return {"params": {"limit": 20}}
+
+
+def _login(rng: random.Random, users: int) -> Dict[str, Any]:
+    return {"json": {"identifier": f"bench_user_{rng.randint(1, users)}", "password": "password"}}
+
+
+def _serve_ad(rng: random.Random, users: int) -> Dict[str, Any]:
+    return {"json": {"ad_unit_type": rng.choice(["banner", "interstitial", "rewarded"])}}
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("feed_mood", "GET", "/ai/feed/mood-based", _feed),
+        Scenario("feed_posts", "GET", "/api/v1/api/v2/posts", _posts_page),
+        Scenario("search_users", "GET", "/api/v1/users/search", _search),
+        Scenario("messaging_inbox", "GET", "/messages/", _inbox),
+        Scenario("messaging_conversations", "GET", "/messages/inbox", _conversations),
+        Scenario("auth_login", "POST", "/api/v1/auth/login", _login),
+        Scenario("ads_serve", "POST", "/api/v1/ads/serve", _serve_ad),
+    ]
+}
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Application cold-start benchmark
+Imports app.main in fresh interpreters with `python -X importtime`, from an
+empty working directory, and reports the median import time of app.main and
+the packages that cost the most. Exits 1 when the median exceeds the budget,
+when a module that must stay lazy was imported, or when the import left files
+behind (a database or ledger created at import time).
+
+Usage:
+    python -m benchmarks.startup_bench --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Optional or heavy modules that only specific requests may load
+LAZY_MODULES = ("numpy", "scipy", "PIL", "google.ads", "google.auth", "requests", "httpx", "stripe", "firebase_admin")
+
+
+def parse_importtime(stderr: str):
+    """{module: (self_us, cumulative_us)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def cold_import(module: str):
+    with tempfile.TemporaryDirectory(prefix="startup_bench_") as cwd:
+        env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+        leftovers = sorted(os.listdir(cwd))
+    return parse_importtime(result.stderr), wall, leftovers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import time")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    cumulative, walls, runs = [], [], []
+    for _ in range(args.runs):
+        modules, wall, leftovers = cold_import(args.module)
+        runs.append(modules)
+        cumulative.append(modules[args.module][1] / 1000)
+        walls.append(wall * 1000)
+
+    median = statistics.median(cumulative)
+    print(f"import {args.module}: median {median:.0f}ms (min {min(cumulative):.0f}ms), "
+          f"process wall {statistics.median(walls):.0f}ms, {len(runs[-1])} modules")
+
+    # Self time grouped by top-level package, from the last run
+    packages = defaultdict(int)
+    for name, (self_us, _) in runs[-1].items():
+        packages[name.split(".")[0]] += self_us
+    print(f"\nTop {args.top} packages by self time:")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:30s} {self_us / 1000:8.1f}ms")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+    eager = sorted(
+        name for name in runs[-1]
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    if eager:
+        failures.append(f"imported at startup but should load lazily: {', '.join(eager[:10])}")
+    if leftovers:
+        failures.append(f"importing left files in the working directory: {', '.join(leftovers)}")
+
+    print()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print(f"OK within the {args.budget_ms:.0f}ms cold-start budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
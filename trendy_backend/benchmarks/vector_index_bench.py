@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Content embedding index benchmark
+Generates seeded clustered embeddings, then reports exact brute-force latency
+and IVF recall@k / latency across nprobe settings, single and batched.
+
+Usage:
+    python -m benchmarks.vector_index_bench --items 1000000 --dim 64 --queries 200
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.vector_index import ExactIndex, IVFIndex, VectorIndex, recall_at_k
+
+
+def clustered_vectors(rng, count: int, dim: int, clusters: int) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return centers[labels] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+
+
+def timed_search(index, queries: np.ndarray, k: int, batch_size: int, **kwargs):
+    latencies, results = [], []
+    for start in range(0, len(queries), batch_size):
+        t0 = time.perf_counter()
+        results.extend(index.search(queries[start:start + batch_size], k, **kwargs))
+        latencies.append((time.perf_counter() - t0) / len(queries[start:start + batch_size]))
+    return results, np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact and IVF embedding search")
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists (default sqrt(items))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = clustered_vectors(rng, args.items, args.dim, clusters=max(16, args.items // 1000))
+    ids = [f"item_{i}" for i in range(args.items)]
+    queries = clustered_vectors(rng, args.queries, args.dim, clusters=max(16, args.items // 1000))
+    print(f"Generated {args.items:,} x {args.dim} embeddings ({vectors.nbytes / 1e6:.0f} MB)")
+
+    exact = ExactIndex(ids, vectors)
+    truth, per_query = timed_search(exact, queries, args.k, 1)
+    print(f"exact          single p50 {np.percentile(per_query, 50):8.2f}ms  p99 {np.percentile(per_query, 99):8.2f}ms")
+    _, batched = timed_search(exact, queries, args.k, args.batch_size)
+    print(f"exact          batch{args.batch_size} {np.mean(batched):8.2f}ms/query")
+
+    started = time.perf_counter()
+    ivf = IVFIndex(ids, vectors, n_lists=args.lists)
+    print(f"Built IVF with {len(ivf.centroids):,} lists in {time.perf_counter() - started:.1f}s")
+
+    with tempfile.TemporaryDirectory() as path:
+        ivf.save(path)
+        mapped = VectorIndex.load(path)  # memory-mapped, as the API workers load it
+        for nprobe in args.nprobe:
+            results, per_query = timed_search(mapped, queries, args.k, 1, nprobe=nprobe)
+            print(f"ivf nprobe={nprobe:<4} recall@{args.k} {recall_at_k(results, truth):.3f}  "
+                  f"p50 {np.percentile(per_query, 50):8.2f}ms  p99 {np.percentile(per_query, 99):8.2f}ms")
+        del mapped
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Migration script for the auth token store
+Creates auth_tokens, moves unexpired verification tokens off the users table
+(stored hashed, so links already sent keep working) and drops
+users.verification_token and users.verification_token_expires.
+"""
+
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.models.auth_token import AuthToken
+from app.services.token_store import VERIFY_EMAIL, hash_token
+
+
+def migrate():
+    """Create auth_tokens and move token columns off users"""
+    AuthToken.__table__.create(bind=engine, checkfirst=True)
+    print("✅ auth_tokens table ready")
+
+    columns = [column["name"] for column in inspect(engine).get_columns("users")]
+    if "verification_token" not in columns:
+        print("✅ users table has no token columns")
+        return
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, verification_token, verification_token_expires FROM users "
+            "WHERE verification_token IS NOT NULL AND verification_token_expires > :now"
+        ), {"now": now}).fetchall()
+        if rows:
+            conn.execute(AuthToken.__table__.insert(), [
+                {
+                    "user_id": user_id,
+                    "purpose": VERIFY_EMAIL,
+                    "token_hash": hash_token(token),
+                    # SQLite hands back DATETIME values as strings
+                    "expires_at": datetime.fromisoformat(expires_at) if isinstance(expires_at, str) else expires_at,
+                    "created_at": now
+                }
+                for user_id, token, expires_at in rows
+            ])
+        print(f"✅ Moved {len(rows)} live verification tokens")
+
+        conn.execute(text("DROP INDEX IF EXISTS ix_users_verification_token"))
+        conn.execute(text("ALTER TABLE users DROP COLUMN verification_token"))
+        conn.execute(text("ALTER TABLE users DROP COLUMN verification_token_expires"))
+    print("✅ Dropped token columns from users")
+
+
+if __name__ == "__main__":
+    migrate()
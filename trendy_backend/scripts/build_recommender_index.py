@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Offline build for the recommendation index
+Loads post likes and comments from the database (plus optional JSONL events
+for music, movies and shop), precomputes item-item neighbors and writes the
+index file the API loads through RECOMMENDER_INDEX_PATH.
+
+Usage:
+    python scripts/build_recommender_index.py --out data/recommender_index.npz \
+        --events interactions.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.models.post import Like, Comment
+from app.core.recommender import SCIPY_AVAILABLE, recommender
+
+
+def database_interactions(db, batch_size: int = 10000):
+    """Stream (user_id, "posts", post_id, action) tuples in id order"""
+    for model, action in ((Like, "like"), (Comment, "comment")):
+        last_id = 0
+        while True:
+            rows = db.query(model.id, model.user_id, model.post_id).filter(
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for _, user_id, post_id in rows:
+                yield user_id, "posts", post_id, action
+            last_id = rows[-1][0]
+
+
+def file_interactions(path: str):
+    """One JSON object per line with user_id, content_type, content_id and action"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                yield event["user_id"], event["content_type"], event["content_id"], event.get("action", "like")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the recommender neighbor index")
+    parser.add_argument("--out", required=True, help="output .npz path")
+    parser.add_argument("--events", help="optional JSONL file of extra interactions")
+    parser.add_argument("--skip-database", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    loaded = 0
+    if not args.skip_database:
+        db = SessionLocal()
+        try:
+            loaded += recommender.load_interactions(database_interactions(db))
+        finally:
+            db.close()
+    if args.events:
+        loaded += recommender.load_interactions(file_interactions(args.events))
+    print(f"Loaded {loaded:,} interactions in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    for content_type, result in recommender.build().items():
+        print(f"  {content_type}: {result['users']:,} users, {result['items']:,} items, "
+              f"{result['interactions']:,} interactions, top-{result['neighbors']} neighbors")
+    print(f"Built index in {time.perf_counter() - started:.1f}s (scipy: {SCIPY_AVAILABLE})")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    recommender.save(args.out)
+    print(f"✅ Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Migration script for conversation-indexed messaging
+Creates conversations/inbox_entries, adds messages.conversation_id with its
+composite index, and backfills existing messages in batches.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, SessionLocal
+from app.models.conversation import Conversation, InboxEntry
+from app.services.conversation_service import conversation_service
+
+
+def migrate():
+    """Apply schema changes and backfill conversation ids"""
+    Conversation.__table__.create(bind=engine, checkfirst=True)
+    InboxEntry.__table__.create(bind=engine, checkfirst=True)
+    print("✅ conversations and inbox_entries tables ready")
+
+    inspector = inspect(engine)
+    if "messages" not in inspector.get_table_names():
+        print("messages table does not exist yet; nothing to backfill")
+        return
+
+    columns = [column["name"] for column in inspector.get_columns("messages")]
+    with engine.begin() as conn:
+        if "conversation_id" not in columns:
+            print("Adding conversation_id column to messages table...")
+            conn.execute(text("ALTER TABLE messages ADD COLUMN conversation_id INTEGER"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_messages_conversation_sent "
+            "ON messages (conversation_id, sent_at, id)"
+        ))
+    print("✅ messages.conversation_id and ix_messages_conversation_sent ready")
+
+    db = SessionLocal()
+    try:
+        updated = conversation_service.backfill(db)
+        print(f"✅ Backfilled {updated} messages")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
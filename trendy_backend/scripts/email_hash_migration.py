@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Migration script for contact import
+Adds users.email_hash with its index and backfills it in batches.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, SessionLocal
+from app.models.user import User, hash_email
+
+
+def migrate(batch_size: int = 1000):
+    """Add the email_hash column and fill it for existing users"""
+    columns = [column["name"] for column in inspect(engine).get_columns("users")]
+    with engine.begin() as conn:
+        if "email_hash" not in columns:
+            print("Adding email_hash column to users table...")
+            conn.execute(text("ALTER TABLE users ADD COLUMN email_hash VARCHAR(64)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_email_hash ON users (email_hash)"))
+    print("✅ users.email_hash and ix_users_email_hash ready")
+
+    db = SessionLocal()
+    try:
+        updated = 0
+        while True:
+            rows = db.query(User.id, User.email).filter(User.email_hash.is_(None)).limit(batch_size).all()
+            if not rows:
+                break
+            db.bulk_update_mappings(User, [{"id": user_id, "email_hash": hash_email(email)} for user_id, email in rows])
+            db.commit()
+            updated += len(rows)
+        print(f"✅ Backfilled {updated} email hashes")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Migration script for the canonical follow graph
+Renames the legacy followers.followed_id column, adds is_mutual, removes
+duplicate edges, creates the unique forward and reverse indexes, copies
+follows recorded only in user_relationships and backfills is_mutual.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.models.post import Follower
+
+
+def migrate():
+    """Bring the followers table to the canonical schema and backfill it"""
+    inspector = inspect(engine)
+    if "followers" not in inspector.get_table_names():
+        Follower.__table__.create(bind=engine, checkfirst=True)
+        print("✅ followers table created")
+        inspector = inspect(engine)
+
+    columns = [column["name"] for column in inspector.get_columns("followers")]
+    with engine.begin() as conn:
+        if "followed_id" in columns and "following_id" not in columns:
+            print("Renaming followers.followed_id to following_id...")
+            conn.execute(text("ALTER TABLE followers RENAME COLUMN followed_id TO following_id"))
+        if "is_mutual" not in columns:
+            print("Adding is_mutual column to followers table...")
+            conn.execute(text("ALTER TABLE followers ADD COLUMN is_mutual BOOLEAN NOT NULL DEFAULT FALSE"))
+
+        removed = conn.execute(text(
+            "DELETE FROM followers WHERE id NOT IN "
+            "(SELECT MIN(id) FROM followers GROUP BY follower_id, following_id)"
+        )).rowcount
+        print(f"✅ Removed {removed} duplicate follow edges")
+
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_followers_follower_following "
+            "ON followers (follower_id, following_id)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_followers_following_follower "
+            "ON followers (following_id, follower_id)"
+        ))
+        print("✅ Forward and reverse follow indexes ready")
+
+        if "user_relationships" in inspector.get_table_names():
+            copied = conn.execute(text(
+                "INSERT INTO followers (follower_id, following_id, is_mutual) "
+                "SELECT DISTINCT r.follower_id, r.following_id, FALSE FROM user_relationships r "
+                "WHERE r.relationship_type = 'FOLLOWING' AND r.follower_id <> r.following_id "
+                "AND NOT EXISTS (SELECT 1 FROM followers f "
+                "WHERE f.follower_id = r.follower_id AND f.following_id = r.following_id)"
+            )).rowcount
+            print(f"✅ Copied {copied} follows from user_relationships")
+
+        conn.execute(text(
+            "UPDATE followers SET is_mutual = EXISTS (SELECT 1 FROM followers r "
+            "WHERE r.follower_id = followers.following_id AND r.following_id = followers.follower_id)"
+        ))
+        if "user_relationships" in inspector.get_table_names():
+            conn.execute(text(
+                "UPDATE user_relationships SET is_mutual = EXISTS (SELECT 1 FROM followers f "
+                "WHERE f.follower_id = user_relationships.following_id "
+                "AND f.following_id = user_relationships.follower_id "
+                "AND EXISTS (SELECT 1 FROM followers g WHERE g.follower_id = user_relationships.follower_id "
+                "AND g.following_id = user_relationships.following_id))"
+            ))
+        print("✅ Backfilled is_mutual")
+
+
+if __name__ == "__main__":
+    migrate()
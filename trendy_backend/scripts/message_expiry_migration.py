@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Migration script for the message reaper
+Creates ix_messages_expires_at, the index the reaper's expiry range scan and
+backlog count read from, on messages tables created before the baseline
+covered app.db.base.Base, and ix_inbox_entries_last_message_id, which the
+reaper uses to clear previews of the messages it deletes.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+
+def migrate():
+    """Add the reaper's indexes to messages and inbox_entries"""
+    tables = inspect(engine).get_table_names()
+    if "messages" not in tables:
+        print("messages table does not exist yet; nothing to index")
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_messages_expires_at ON messages (expires_at)"))
+        if "inbox_entries" in tables:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_inbox_entries_last_message_id ON inbox_entries (last_message_id)"
+            ))
+    print("✅ ix_messages_expires_at and ix_inbox_entries_last_message_id ready")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for TRENDY App
+The app no longer creates tables when it is imported; run this once per
+deploy, before starting the workers. The baseline creates any missing table
+for every model the app's routers use, then each
+*_migration.py script runs in order. A step that raises stops the run and is
+not recorded, so it is retried next time; applied steps are recorded in
+schema_migrations and skipped afterwards. Every script is also safe to
+re-run on its own.
+
+Usage:
+    python scripts/migrate.py            # apply pending steps
+    python scripts/migrate.py --check    # exit 1 if any step is pending
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import text
+
+# Add the app directory and this directory to the path
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPTS_DIR))
+sys.path.append(SCRIPTS_DIR)
+
+from app.database import engine, schema_metadata
+
+# Order matters: later scripts assume the columns and tables of earlier ones
+MIGRATIONS = (
+    "conversation_migration",
+    "follow_graph_migration",
+    "email_hash_migration",
+    "user_counters_migration",
+    "story_expiry_migration",
+    "auth_token_migration",
+    "stripe_webhook_migration",
+    "post_moderation_migration",
+    "message_expiry_migration",
+    "notification_migration",
+)
+
+
+def create_baseline():
+    """Create missing tables for every model registered by the app's routers"""
+    import app.models  # noqa: F401
+    from app.main import ROUTERS
+
+    for module_name, _ in ROUTERS:
+        importlib.import_module(module_name)
+    schema_metadata().create_all(bind=engine)
+
+
+def applied_steps():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+        ))
+        return {name for (name,) in conn.execute(text("SELECT name FROM schema_migrations"))}
+
+
+def record(name: str):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :now)"),
+                     {"name": name, "now": datetime.utcnow()})
+
+
+def migrate(check: bool = False) -> int:
+    """Apply pending steps; returns how many were pending"""
+    steps = [("baseline", create_baseline)] + [
+        (name, lambda name=name: importlib.import_module(name).migrate()) for name in MIGRATIONS
+    ]
+    done = applied_steps()
+    pending = [(name, step) for name, step in steps if name not in done]
+    if check:
+        for name, _ in pending:
+            print(f"⏳ {name} is pending")
+        return len(pending)
+
+    for name, step in pending:
+        print(f"▶️  {name}")
+        try:
+            step()
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            raise
+        record(name)
+    # The baseline also picks up tables for models added since it was first recorded
+    if "baseline" in done:
+        create_baseline()
+    print(f"✅ Schema up to date ({len(pending)} steps applied)")
+    return len(pending)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="only report pending steps")
+    args = parser.parse_args()
+
+    pending = migrate(check=args.check)
+    sys.exit(1 if args.check and pending else 0)
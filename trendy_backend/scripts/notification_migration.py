@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Migration script for the notification pipeline
+Adds notifications.group_key and actor_count, which the coalescing worker
+writes on every insert, and the feed, unread-count and coalescing indexes.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+
+def migrate():
+    """Bring an existing notifications table to the pipeline schema"""
+    inspector = inspect(engine)
+    if "notifications" not in inspector.get_table_names():
+        print("notifications table does not exist yet; the baseline creates it")
+        return
+
+    columns = [column["name"] for column in inspector.get_columns("notifications")]
+    with engine.begin() as conn:
+        if "group_key" not in columns:
+            print("Adding group_key column to notifications table...")
+            conn.execute(text("ALTER TABLE notifications ADD COLUMN group_key VARCHAR(100)"))
+        if "actor_count" not in columns:
+            print("Adding actor_count column to notifications table...")
+            conn.execute(text("ALTER TABLE notifications ADD COLUMN actor_count INTEGER DEFAULT 1"))
+            conn.execute(text("UPDATE notifications SET actor_count = 1 WHERE actor_count IS NULL"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_user_read_created "
+            "ON notifications (user_id, is_read, created_at)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_user_created ON notifications (user_id, created_at)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_user_group_key ON notifications (user_id, group_key)"
+        ))
+    print("✅ notifications.group_key, actor_count and indexes ready")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migration script for asynchronous post moderation
+Creates the partial indexes feeds (approved posts) and moderation workers
+(pending posts) read from, on posts tables created before they existed.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+
+def migrate():
+    """Add the moderation_status partial indexes to posts"""
+    inspector = inspect(engine)
+    if "posts" not in inspector.get_table_names():
+        print("posts table does not exist yet; the baseline creates it with its indexes")
+        return
+
+    columns = [column["name"] for column in inspector.get_columns("posts")]
+    with engine.begin() as conn:
+        if "moderation_status" not in columns:
+            print("Adding moderation_status column to posts table...")
+            conn.execute(text("ALTER TABLE posts ADD COLUMN moderation_status VARCHAR(20) DEFAULT 'approved'"))
+            conn.execute(text("UPDATE posts SET moderation_status = 'approved' WHERE moderation_status IS NULL"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_posts_approved_created "
+            "ON posts (created_at) WHERE moderation_status = 'approved'"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_posts_pending_created "
+            "ON posts (created_at) WHERE moderation_status = 'pending'"
+        ))
+    print("✅ ix_posts_approved_created and ix_posts_pending_created ready")
+
+
+if __name__ == "__main__":
+    migrate()
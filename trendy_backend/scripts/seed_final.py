@@ -279,13 +279,13 @@ def create_sample_data():
             
             existing = db.query(Follower).filter(
                 Follower.follower_id == follower.id,
-                Follower.followed_id == followed.id
+                Follower.following_id == followed.id
             ).first()
             
             if not existing:
                 follow = Follower(
                     follower_id=follower.id,
-                    followed_id=followed.id
+                    following_id=followed.id
                 )
                 db.add(follow)
         
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Migration script for story expiry and seen-state
+Adds stories.sequence (numbered per author in id order), the active-story and
+sweeper indexes, the story_seen table, and archives already expired stories.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.models  # noqa: F401  (registers users, which stories and story_seen reference)
+from app.database import engine, SessionLocal, schema_metadata
+from app.models.enhanced_post import Story, StorySeen
+from app.services.story_service import StoryService
+
+
+def migrate():
+    """Bring the stories table to the indexed schema and create story_seen"""
+    # The full schema metadata, so the foreign keys to users.id resolve
+    metadata = schema_metadata()
+    inspector = inspect(engine)
+    if "stories" not in inspector.get_table_names():
+        metadata.create_all(bind=engine, tables=[metadata.tables[Story.__tablename__]])
+        print("✅ stories table created")
+    else:
+        columns = [column["name"] for column in inspector.get_columns("stories")]
+        with engine.begin() as conn:
+            if "sequence" not in columns:
+                print("Adding sequence column to stories table...")
+                conn.execute(text("ALTER TABLE stories ADD COLUMN sequence INTEGER NOT NULL DEFAULT 0"))
+                conn.execute(text(
+                    "UPDATE stories SET sequence = (SELECT COUNT(*) FROM stories s "
+                    "WHERE s.user_id = stories.user_id AND s.id <= stories.id)"
+                ))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_stories_user_sequence ON stories (user_id, sequence)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_stories_user_expires ON stories (user_id, expires_at)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_stories_archived_expires ON stories (is_archived, expires_at)"
+            ))
+        print("✅ Story sequence and expiry indexes ready")
+
+    if "enhanced_posts" in inspector.get_table_names():
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_enhanced_posts_story_expires_at "
+                "ON enhanced_posts (story_expires_at)"
+            ))
+
+    metadata.create_all(bind=engine, tables=[metadata.tables[StorySeen.__tablename__]])
+    print("✅ story_seen table ready")
+
+    db = SessionLocal()
+    try:
+        result = StoryService().sweep(db, batch_size=5000)
+        print(f"✅ Archived {result['archived']} expired stories")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Archiving failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Migration script for the Stripe webhook inbox
+Creates stripe_events and adds subscriptions.stripe_event_at, which the
+webhook worker uses to ignore events older than the state already applied.
+
+Usage:
+    python scripts/stripe_webhook_migration.py
+    python scripts/stripe_webhook_migration.py --replay-since 2026-01-01
+    python scripts/stripe_webhook_migration.py --replay evt_123 evt_456
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, SessionLocal
+from app.models.stripe_event import StripeEvent
+
+
+def migrate():
+    """Create stripe_events and add the event watermark to subscriptions"""
+    StripeEvent.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_stripe_events_status_next_attempt "
+            "ON stripe_events (status, next_attempt_at)"
+        ))
+    print("✅ stripe_events table ready")
+
+    columns = [column["name"] for column in inspect(engine).get_columns("subscriptions")]
+    if "stripe_event_at" in columns:
+        print("✅ subscriptions.stripe_event_at already exists")
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE subscriptions ADD COLUMN stripe_event_at INTEGER"))
+    print("✅ Added subscriptions.stripe_event_at")
+
+
+def replay(event_ids=None, since=None):
+    """Re-queue stored events for the webhook worker"""
+    from app.services.stripe_webhooks import stripe_webhooks
+
+    db = SessionLocal()
+    try:
+        count = stripe_webhooks.replay(db, event_ids=event_ids, since=since)
+    finally:
+        db.close()
+    print(f"✅ Re-queued {count} Stripe events")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replay", nargs="+", metavar="EVENT_ID")
+    parser.add_argument("--replay-since", type=datetime.fromisoformat, metavar="DATE")
+    args = parser.parse_args()
+
+    migrate()
+    if args.replay or args.replay_since:
+        replay(event_ids=args.replay, since=args.replay_since)
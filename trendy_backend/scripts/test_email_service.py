@@ -1,54 +1,113 @@
 """
 Test script for email service functionality
+Runs the outbound queue against a local aiosmtpd stub server and an
+in-memory SQLite database: queued emails are delivered over a single SMTP
+connection, temporary rejections are retried later and permanent ones fail.
+
+    pip install aiosmtpd
+    python scripts/test_email_service.py
 """
 
 import asyncio
-import sys
 import os
+import sys
+from datetime import datetime, timedelta
+
+from aiosmtpd.controller import Controller
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 # Add the app directory to the Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.email_outbox import OutboundEmail
+from app.services.email_service import EmailService, SMTPTransport, TemplateCache
+
+HOST, PORT = "127.0.0.1", 8025
+
+
+class StubHandler:
+    """Accepts everything except addresses starting with temp- (451) or bad- (550)"""
+
+    def __init__(self):
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("temp-"):
+            return "451 Try again later"
+        if address.startswith("bad-"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 Message accepted for delivery"
+
+
+def build_service() -> EmailService:
+    return EmailService(
+        transport=SMTPTransport(HOST, PORT, username=None, password=None, starttls=False),
+        templates=TemplateCache(),
+        sender="noreply@example.com",
+        sender_name="TRENDY App",
+        verification_url="http://localhost:8000/api/v1/auth/email/verify",
+        password_reset_url="http://localhost:3000/reset-password",
+        batch_size=100,
+        max_per_second=200.0,
+        retry_base_seconds=60.0
+    )
 
-from services.email_service import email_service
 
 async def test_email_service():
     """Test email service functionality"""
     print("Testing email service...")
-    
+    handler = StubHandler()
+    controller = Controller(handler, hostname=HOST, port=PORT)
+    controller.start()
+
+    engine = create_engine("sqlite://")
+    OutboundEmail.__table__.create(bind=engine)
+    db = sessionmaker(bind=engine)()
+    service = build_service()
+
     try:
-        # Test sending verification email
-        print("Sending verification email...")
-        await email_service.send_verification_email(
-            "test@example.com", 
-            "Test User", 
-            "test_token_123"
-        )
-        print("✓ Verification email sent successfully")
-        
-        # Test sending password reset email
-        print("Sending password reset email...")
-        await email_service.send_password_reset_email(
-            "test@example.com", 
-            "Test User", 
-            "reset_token_123"
-        )
-        print("✓ Password reset email sent successfully")
-        
-        # Test sending welcome email
-        print("Sending welcome email...")
-        await email_service.send_welcome_email(
-            "test@example.com", 
-            "Test User"
-        )
-        print("✓ Welcome email sent successfully")
-        
+        for i in range(20):
+            await service.send_welcome_email(db, f"user{i}@example.com", f"User {i}")
+        await service.send_verification_email(db, "temp-user@example.com", "Temp", "token_123")
+        await service.send_password_reset_email(db, "bad-user@example.com", "Bad", "reset_123")
+        print(f"✓ Queued {db.query(OutboundEmail).count()} emails")
+
+        stats = service.deliver_batch(db)
+        assert stats == {"sent": 20, "retrying": 1, "failed": 1}, stats
+        assert len(handler.delivered) == 20
+        assert service.transport.connections_opened == 1, service.transport.connections_opened
+        print(f"✓ Delivered 20 emails over {service.transport.connections_opened} SMTP connection")
+
+        retrying = db.query(OutboundEmail).filter(OutboundEmail.recipient == "temp-user@example.com").one()
+        assert retrying.status == "pending" and retrying.attempts == 1
+        assert retrying.next_attempt_at > datetime.utcnow() + timedelta(seconds=20)
+        print(f"✓ Temporary failure rescheduled for {retrying.next_attempt_at:%H:%M:%S}")
+
+        failed = db.query(OutboundEmail).filter(OutboundEmail.recipient == "bad-user@example.com").one()
+        assert failed.status == "failed"
+        print(f"✓ Permanent failure recorded: {failed.last_error}")
+
+        assert service.deliver_batch(db) == {"sent": 0, "retrying": 0, "failed": 0}
+        print("✓ Nothing due until the retry time")
+
         print("\nAll email service tests passed! 🎉")
-        
+
     except Exception as e:
-        print(f"❌ Email service test failed: {e}")
+        print(f"❌ Email service test failed: {e!r}")
         return False
-    
+
+    finally:
+        service.shutdown()
+        db.close()
+        controller.stop()
+
     return True
 
 if __name__ == "__main__":
-    asyncio.run(test_email_service())
+    sys.exit(0 if asyncio.run(test_email_service()) else 1)
@@ -0,0 +1,72 @@
+"""
+Test script for the creator token ledger
+Mints close to the int64 balance limit in a temporary directory, checks that
+a mint which would overflow is rejected before anything reaches the log, and
+that the log still replays with the same balances when the ledger is reopened.
+
+    python scripts/test_ledger.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.ledger import Ledger, SYSTEM_ACCOUNT, INT64_MAX, UNITS
+
+NEAR_LIMIT = 5e12  # 5e18 micro-units; a second mint to the same account overflows int64
+
+
+def test_ledger():
+    """Test that overflowing blocks are rejected and the log stays replayable"""
+    print("Testing creator token ledger...")
+    with tempfile.TemporaryDirectory(prefix="ledger_test_") as directory:
+        try:
+            ledger = Ledger(directory)
+            ledger.commit([(SYSTEM_ACCOUNT, "creator", NEAR_LIMIT, "token_creation")])
+            assert ledger.balance("creator") == NEAR_LIMIT
+            print(f"✓ Minted {NEAR_LIMIT:.0f} tokens")
+
+            sizes = {name: os.path.getsize(os.path.join(directory, name))
+                     for name in ("accounts.log", "transactions.log", "blocks.log")}
+            try:
+                ledger.commit([(SYSTEM_ACCOUNT, "creator", NEAR_LIMIT, "token_creation")])
+                raise AssertionError("Overflowing mint was accepted")
+            except ValueError as e:
+                print(f"✓ Overflowing mint rejected: {e}")
+            for name, size in sizes.items():
+                assert os.path.getsize(os.path.join(directory, name)) == size, f"{name} grew"
+            print("✓ Nothing written for the rejected block")
+
+            for amount in (INT64_MAX / UNITS * 2, float("inf"), float("nan")):
+                try:
+                    ledger.commit([(SYSTEM_ACCOUNT, "other", amount, "token_creation")])
+                    raise AssertionError(f"Amount {amount} was accepted")
+                except ValueError:
+                    pass
+            print("✓ Out-of-range and non-finite amounts rejected")
+
+            block = ledger.commit([("creator", "fan", 1.5, "token_transfer")])
+            assert block.index == 2
+            assert ledger.balance("fan") == 1.5
+            assert len(ledger.history("creator")[0]) == 2
+
+            reopened = Ledger(directory)
+            assert reopened.balance("creator") == ledger.balance("creator")
+            assert reopened.balance("fan") == 1.5
+            assert reopened.balance(SYSTEM_ACCOUNT) == -NEAR_LIMIT
+            assert [entry.seq for entry in reopened.history("creator")[0]] == [1, 0]
+            print("✓ Reopened ledger replays the log with the same balances")
+
+            print("\nAll ledger tests passed! 🎉")
+
+        except Exception as e:
+            print(f"❌ Ledger test failed: {e!r}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if test_ledger() else 1)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Migration script for denormalized user counters
+Adds users.followers_count/following_count/posts_count and fills them with
+one full reconciliation sweep.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, SessionLocal
+from app.services.user_counters import COUNTERS, UserCounterService
+
+
+def migrate(batch_size: int = 5000):
+    """Add the counter columns and backfill them from followers and posts"""
+    columns = [column["name"] for column in inspect(engine).get_columns("users")]
+    with engine.begin() as conn:
+        for name in COUNTERS:
+            if name not in columns:
+                print(f"Adding {name} column to users table...")
+                conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"))
+    print("✅ User counter columns ready")
+
+    service = UserCounterService()
+    db = SessionLocal()
+    try:
+        checked = repaired = 0
+        while True:
+            result = service.reconcile(db, batch_size)
+            if not result["checked"]:
+                break
+            checked += result["checked"]
+            repaired += result["repaired"]
+        print(f"✅ Checked {checked} users, backfilled counters for {repaired}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()